@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from distutils.core import setup
+from setuptools import setup
 from glob import glob
 
 PACKAGE_NAME = 'minescrubber'
@@ -30,6 +30,10 @@ setup(
         'shiboken2>=5.15.0',
         'Pillow>=7.2.0'
     ],
+    extras_require={
+        # The numpy render backend and the generated boards
+        'fast': ['numpy'],
+    },
     license='MIT',
     classifiers=[
         'Development Status :: 5 - Production/Stable',
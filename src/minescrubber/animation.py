@@ -0,0 +1,743 @@
+import collections
+import enum
+import functools
+import random
+from time import perf_counter
+
+
+from PIL import ImageDraw, Image
+
+
+from .imager import COLOR, union_rect
+
+
+class DIRECTION(enum.Enum):
+    LEFT = -1
+    RIGHT = 1
+    TOP = -1
+    BOTTOM = 1
+
+
+@enum.unique
+class AXIS(enum.Enum):
+    X = 0
+    Y = 1
+    XY = 2
+
+
+@enum.unique
+class METHOD(enum.Enum):
+    SLIDE = 0
+    FADE = 1
+    FLIP = 2
+
+
+FLIP_MID_COLOR = COLOR.gray_27
+
+# A FADE frame is a single opaque paste
+CHEAPEST_METHOD = METHOD.FADE
+
+
+@functools.lru_cache(maxsize=None)
+def get_color_ramp(method, nb_frames, fill_to, fill_from):
+    # The FADE and FLIP fill colours only depend on the frame index, so they
+    # are computed once per animation setting as a table indexed by frame
+    # and shared by every animating cell
+    ramp = []
+    for frame in range(nb_frames + 1):
+        orig_incr = frame / nb_frames
+        if method == METHOD.FADE:
+            src = _fix_alpha(fill_from)
+            alpha = int(255 * orig_incr)
+            dst_color = fill_to
+        elif method == METHOD.FLIP:
+            if orig_incr <= 0.5:
+                incr = _rescale(orig_incr, 0.0, 0.5, 0.0, 1.0)
+                src = _fix_alpha(fill_from)
+                dst_color = FLIP_MID_COLOR
+            else:
+                incr = _rescale(orig_incr, 0.5, 1.0, 0.0, 1.0)
+                src = _fix_alpha(FLIP_MID_COLOR)
+                dst_color = fill_to
+            alpha = int(255 * incr)
+        else:
+            error_msg = f'The method {method} has no color ramp'
+            raise RuntimeError(error_msg)
+
+        r, g, b = dst_color
+        ramp.append(_alpha_blend(src, (r, g, b, alpha)))
+
+    return tuple(ramp)
+
+
+def _fix_alpha(color, normalized=False):
+    alpha = 1 if normalized else 255
+    if len(color) == 3:
+        return (*color, alpha)
+    return color
+
+
+def _alpha_blend(src, dst):
+    src = _normalize_color(src)
+    r_src, g_src, b_src, a_src = src
+
+    dst = _normalize_color(dst)
+    r_dst, g_dst, b_dst, a_dst = dst
+
+    a_mix = a_src + a_dst - (a_src * a_dst)
+
+    r_mix = _blend(r_src, a_src, r_dst, a_dst, a_mix)
+    g_mix = _blend(g_src, a_src, g_dst, a_dst, a_mix)
+    b_mix = _blend(b_src, a_src, b_dst, a_dst, a_mix)
+    result = r_mix, g_mix, b_mix, a_mix
+
+    return _denormalize_color(result)
+
+
+def _blend(c_src, a_src, c_dst, a_dst, a_mix):
+    if a_mix == 0:
+        return 0
+    return ((c_dst * a_dst) + (c_src * a_src * (1 - a_dst))) / a_mix
+
+
+def _normalize_color(color):
+    color = _fix_alpha(color)
+    return tuple(map(lambda x: x / 255, color))
+
+
+def _denormalize_color(color):
+    color = _fix_alpha(color, normalized=True)
+    return tuple(map(lambda x: int(x * 255), color))
+
+
+def _rescale(val, min_in, max_in, min_out, max_out):
+    if min_in == max_in:
+        return 0
+    return min_out + (
+        (val - min_in) * (max_out - min_out) / (max_in - min_in)
+    )
+
+
+class KeyframeCache:
+    # The frames of an animation only depend on the cell size, the method,
+    # the axis/directions, the fill colours and the number of frames. Each
+    # animation is rendered once as a sequence of small RGBA tiles, where
+    # tile `n` holds everything frames 1 to `n` drew (transparent
+    # elsewhere), and is then played back on any cell by pasting tiles.
+    # Frames are (tile, mask) pairs, the mask is None for opaque tiles.
+    MAX_ANIMATIONS = 64
+
+    def __init__(self, max_animations=None):
+        self._max_animations = max_animations or self.MAX_ANIMATIONS
+        self._animations = collections.OrderedDict()
+
+    def get_frames(
+            self, method, x_size, y_size, nb_frames, fill_to,
+            fill_from=None, axis=AXIS.XY, x_dir=DIRECTION.RIGHT,
+            y_dir=DIRECTION.BOTTOM,
+    ):
+        if method != METHOD.SLIDE:
+            axis = x_dir = y_dir = None
+
+        key = (
+            method, x_size, y_size, nb_frames, fill_to, fill_from, axis,
+            x_dir, y_dir,
+        )
+        frames = self._animations.get(key)
+        if frames is None:
+            frames = self._render_frames(*key)
+            self._animations[key] = frames
+            while len(self._animations) > self._max_animations:
+                self._animations.popitem(last=False)
+        else:
+            self._animations.move_to_end(key)
+
+        return frames
+
+    def clear(self):
+        self._animations.clear()
+
+    def _render_frames(
+            self, method, x_size, y_size, nb_frames, fill_to, fill_from,
+            axis, x_dir, y_dir,
+    ):
+        # Tiles cover the cell only, the flip animation used to spill one
+        # pixel past it on the right that nothing would clear afterwards
+        tile = Image.new('RGBA', (x_size + 1, y_size + 1), color=(0, 0, 0, 0))
+        frames = [(tile, tile)]
+        for frame in range(1, nb_frames + 1):
+            tile = tile.copy()
+            draw_context = ImageDraw.Draw(tile)
+            if method == METHOD.SLIDE:
+                self._rectangle(
+                    draw_context, frame, nb_frames, x_size, y_size,
+                    axis=axis, x_dir=x_dir, y_dir=y_dir, fill=fill_to,
+                )
+            elif method == METHOD.FADE:
+                self._fade(
+                    draw_context, frame, nb_frames, x_size, y_size,
+                    fill_to, fill_from,
+                )
+            elif method == METHOD.FLIP:
+                self._flip(
+                    draw_context, frame, nb_frames, x_size, y_size,
+                    fill_to, fill_from,
+                )
+            else:
+                error_msg = f'The method {method} is not implemented'
+                raise RuntimeError(error_msg)
+
+            # Opaque tiles can be pasted as a plain copy, without a mask
+            is_opaque = tile.getextrema()[3] == (255, 255)
+            frames.append((tile, None if is_opaque else tile))
+
+        return tuple(frames)
+
+    def _draw_rectangle(self, draw_context, start, end, fill):
+        # Corners may come in any order, Pillow wants them sorted
+        (x0, y0), (x1, y1) = start, end
+        draw_context.rectangle(
+            [
+                (min(x0, x1), min(y0, y1)),
+                (max(x0, x1), max(y0, y1)),
+            ],
+            fill=fill,
+        )
+
+    def _rectangle(
+            self, draw_context, frame, nb_frames, x_size, y_size,
+            axis=AXIS.XY, x_dir=DIRECTION.RIGHT, y_dir=DIRECTION.BOTTOM,
+            fill=None,
+    ):
+        x, y = 0, 0
+        if axis == AXIS.XY:
+            if x_dir == DIRECTION.LEFT:
+                x += x_size
+            if y_dir == DIRECTION.TOP:
+                y += y_size
+        elif axis == AXIS.X:
+            if x_dir == DIRECTION.LEFT:
+                x += x_size
+        elif axis == AXIS.Y:
+            if y_dir == DIRECTION.TOP:
+                y += y_size
+
+        _x_incr = int(x_size * frame / nb_frames) * x_dir.value
+        _y_incr = int(y_size * frame / nb_frames) * y_dir.value
+
+        x_incr = x_size
+        y_incr = y_size
+        if axis == AXIS.X:
+            x_incr = _x_incr
+        elif axis == AXIS.Y:
+            y_incr = _y_incr
+        elif axis == AXIS.XY:
+            x_incr = _x_incr
+            y_incr = _y_incr
+
+        self._draw_rectangle(
+            draw_context,
+            (x, y),
+            (x + x_incr, y + y_incr),
+            fill=fill,
+        )
+
+    def _fade(
+            self, draw_context, frame, nb_frames, x_size, y_size, fill_to,
+            fill_from,
+    ):
+        result = get_color_ramp(
+            METHOD.FADE, nb_frames, fill_to, fill_from,
+        )[frame]
+
+        self._draw_rectangle(
+            draw_context,
+            (0, 0),
+            (x_size, y_size),
+            fill=result,
+        )
+
+    def _flip(
+            self, draw_context, frame, nb_frames, x_size, y_size, fill_to,
+            fill_from,
+    ):
+        orig_incr = frame / nb_frames
+        fill = get_color_ramp(
+            METHOD.FLIP, nb_frames, fill_to, fill_from,
+        )[frame]
+
+        incr = None
+        if orig_incr <= 0.5:
+            incr = _rescale(
+                val=orig_incr,
+                min_in=0.0,
+                max_in=0.5,
+                min_out=0.0,
+                max_out=1.0,
+            )
+
+            r1_start = (0, 0)
+            r1_end = (int(x_size * incr / 2), y_size)
+            r2_start = (x_size - int(x_size * incr / 2) + 1, 0)
+            r2_end = (x_size, y_size)
+        else:
+            incr = _rescale(
+                val=orig_incr,
+                min_in=0.5,
+                max_in=1.0,
+                min_out=0.0,
+                max_out=1.0,
+            )
+
+            r1_start = (
+                int(x_size / 2) - int(x_size * incr / 2),
+                0,
+            )
+
+            r1_end = (
+                int(x_size / 2),
+                y_size,
+            )
+
+            r2_start = (
+                int(x_size / 2) + 1,
+                0,
+            )
+
+            r2_end = (
+                int(x_size / 2) + 1 + int(x_size * incr / 2),
+                y_size,
+            )
+
+        # First rect
+        self._draw_rectangle(draw_context, r1_start, r1_end, fill=fill)
+
+        # Second rect
+        self._draw_rectangle(draw_context, r2_start, r2_end, fill=fill)
+
+
+class SingleAnimController:
+    # Animates a single cell. It owns no timer, the `AnimController` clock
+    # advances it through `advance()` along with every other active cell.
+    # Frames come from the shared `KEYFRAMES` cache so playing one is a
+    # single paste.
+    DEFAULT_TIME = 1  # In seconds
+    KEYFRAMES = KeyframeCache()
+
+    def __init__(self, board_image=None, rng=None):
+        self._is_running = False
+        self._board_image = board_image
+        self._rng = rng or random
+        self._time = 0
+        self._step = 0
+        self._fps = 6
+        self._nb_frames = 0
+        self._frames_played = 0
+        self._elapsed = 0
+        self._rect = None
+        self._origin = None
+        self._frames = None
+        self.name = None
+
+    @property
+    def is_running(self):
+        return self._is_running
+
+    @property
+    def fps(self):
+        return self._fps
+
+    @fps.setter
+    def fps(self, val):
+        self._fps = val
+
+    @property
+    def step(self):
+        return self._step
+
+    @property
+    def rect(self):
+        return self._rect
+
+    @property
+    def qt_image(self):
+        return self._board_image.qt_image
+
+    def animate_rectangle(self, x, y, x_size, y_size, fill=None, time=None):
+        axis = self._rng.choice(list(AXIS))
+        x_dir = self._rng.choice(list(DIRECTION))
+        y_dir = self._rng.choice(list(DIRECTION))
+
+        self._run(x, y, x_size, y_size, time=time)
+        self._frames = self.KEYFRAMES.get_frames(
+            METHOD.SLIDE, x_size, y_size, self._nb_frames, fill,
+            axis=axis, x_dir=x_dir, y_dir=y_dir,
+        )
+
+    def fade(self, x, y, x_size, y_size, fill_to, fill_from, time=None):
+        self._run(x, y, x_size, y_size, time=time)
+        self._frames = self.KEYFRAMES.get_frames(
+            METHOD.FADE, x_size, y_size, self._nb_frames, fill_to,
+            fill_from=fill_from,
+        )
+
+    def flip(self, x, y, x_size, y_size, fill_to, fill_from, time=None):
+        self._run(x, y, x_size, y_size, time=time)
+        self._frames = self.KEYFRAMES.get_frames(
+            METHOD.FLIP, x_size, y_size, self._nb_frames, fill_to,
+            fill_from=fill_from,
+        )
+
+    def advance(self, elapsed):
+        # Move the animation `elapsed` milliseconds forward and show the
+        # latest frame that became due. Returns the rect of the board image
+        # that was drawn on or None if no frame was due.
+        if not self._is_running:
+            return
+
+        self._elapsed += elapsed
+        frames_due = min(self._nb_frames, int(self._elapsed / self._step))
+        if frames_due <= self._frames_played:
+            return
+
+        self._time -= self._step * (frames_due - self._frames_played)
+        self._frames_played = frames_due
+
+        # Tiles are cumulative so skipped frames need not be pasted
+        tile, mask = self._frames[self._frames_played]
+        self._board_image.image.paste(tile, self._origin, mask)
+
+        if self._frames_played == self._nb_frames:
+            self._stop()
+
+        return self._rect
+
+    def finish(self):
+        # Jump straight to the last frame
+        if not self._is_running:
+            return
+
+        tile, mask = self._frames[self._nb_frames]
+        self._board_image.image.paste(tile, self._origin, mask)
+        self._stop()
+        return self._rect
+
+    def _stop(self):
+        self._time = 0
+        self._fps = 0
+        self._nb_frames = 0
+        self._is_running = False
+
+    def _run(self, x, y, x_size, y_size, time=None):
+        self._origin = (x, y)
+        self._rect = (x, y, x + x_size + 1, y + y_size + 1)
+
+        time = time or self.DEFAULT_TIME
+        self._time = time * 1000
+        self._step = self._time / self._fps
+        self._nb_frames = int(self._time / self._step)
+        self._elapsed = 0
+        self._is_running = True
+
+
+class CellAnimations:
+    # Reveal animations of a group of cells played on the board image. It
+    # has no clock of its own, whoever owns it calls `advance()` with the
+    # time elapsed since the previous call: the Qt timer of `AnimController`
+    # or a simulated clock when rendering headless.
+    #
+    # In adaptive mode cells wait in a queue, nearest to the clicked slot
+    # first, and at most `MAX_CONCURRENT` of them animate at once so that a
+    # large flood fill opens in waves. Each frame is timed and every frame
+    # over `frame_budget` (in milliseconds) degrades the animation one more
+    # step: the cells still queued use the cheapest method, then half the
+    # fps, then every cell jumps to its last frame.
+    MAX_CONCURRENT = 64
+    FRAME_BUDGET = 1000 / 60
+    DEFAULT_ANIM_SETTINGS = {
+        METHOD.SLIDE: {
+            'time': 0.1,
+            'fps': 6,
+        },
+        METHOD.FLIP: {
+            'time': 0.5,
+            'fps': 20,
+        },
+        METHOD.FADE: {
+            'time': 0.1,
+            'fps': 6,
+        },
+    }
+
+    def __init__(
+            self, board_image, method=METHOD.FADE, adaptive=False, rng=None,
+    ):
+        self._board_image = board_image
+        self._rng = rng or random
+        self._single_controllers = []
+        self._pending = collections.deque()
+        self._streams = []
+        self._method = method
+        self._fps = 6
+        self._adaptive = adaptive
+        self._frame_budget = self.FRAME_BUDGET
+        self._degradation = 0
+        self._frame_cost = 0
+
+    @property
+    def method(self):
+        return self._method
+
+    @method.setter
+    def method(self, method):
+        self._method = method
+
+    @property
+    def fps(self):
+        return self._fps
+
+    @fps.setter
+    def fps(self, val):
+        self._fps = val
+
+    @property
+    def board_image(self):
+        return self._board_image
+
+    @board_image.setter
+    def board_image(self, board_image):
+        self._board_image = board_image
+
+    @property
+    def adaptive(self):
+        return self._adaptive
+
+    @adaptive.setter
+    def adaptive(self, adaptive):
+        self._adaptive = adaptive
+
+    @property
+    def rng(self):
+        # Picks the random SLIDE directions, a seeded `random.Random` makes
+        # them reproducible
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng):
+        self._rng = rng or random
+
+    @property
+    def frame_budget(self):
+        return self._frame_budget
+
+    @frame_budget.setter
+    def frame_budget(self, frame_budget):
+        self._frame_budget = frame_budget
+
+    @property
+    def frame_cost(self):
+        # Milliseconds spent in the last `advance()`
+        return self._frame_cost
+
+    @property
+    def degradation(self):
+        return self._degradation
+
+    @property
+    def is_running(self):
+        return bool(self._single_controllers or self._pending or self._streams)
+
+    @property
+    def interval(self):
+        # Milliseconds between the frames of the fastest running animation
+        if not self._single_controllers:
+            if self._streams:
+                # Waiting on the next ring of a stream
+                return 1000 / self._fps
+            return
+
+        return min(sac.step for sac in self._single_controllers)
+
+    def reveal_cells(
+            self, cells, fill,
+            fill_from=None, time=None, fps=None, origin=None,
+    ):
+        # Cells scrolled out of view are not animated
+        cells = [
+            cell for cell in cells
+            if self._board_image.clip_rect(
+                self._board_image.get_cell_rect(cell.slot)
+            ) is not None
+        ]
+        if not self._adaptive:
+            for x, y in self._get_cell_coordinates(cells):
+                self._start(
+                    x, y, self.method, fill, fill_from, time, fps,
+                )
+            return
+
+        if not self.is_running:
+            self._degradation = 0
+
+        if origin is not None:
+            origin_x, origin_y = origin
+            cells = sorted(
+                cells,
+                key=lambda cell: max(
+                    abs(cell.slot[0] - origin_x),
+                    abs(cell.slot[1] - origin_y),
+                ),
+            )
+
+        for x, y in self._get_cell_coordinates(cells):
+            self._pending.append(
+                (x, y, self.method, fill, fill_from, time, fps)
+            )
+
+        self._start_pending()
+
+    def reveal_layers(self, layers, fill, fill_from=None, time=None, fps=None):
+        # Reveals the cells of `layers`, an iterable of lists of cells such
+        # as the rings of a flood fill while it gets computed. The first one
+        # starts at once and every `advance()` takes the next one, so the
+        # rings after it are only computed once the ones before are playing.
+        self._streams.append((iter(layers), fill, fill_from, time, fps))
+        self._next_layers(self._streams[-1:])
+
+    def advance(self, elapsed):
+        # Returns the union rect of the cells drawn or None
+        start_time = perf_counter()
+        dirty_rect = None
+        for sac in list(self._single_controllers):
+            dirty_rect = union_rect(dirty_rect, sac.advance(elapsed))
+            if not sac.is_running:
+                self._single_controllers.remove(sac)
+
+        self._next_layers(list(self._streams))
+        if self._adaptive:
+            self._start_pending()
+
+        self._frame_cost = (perf_counter() - start_time) * 1000
+        if self._adaptive and self._frame_cost > self._frame_budget:
+            dirty_rect = union_rect(dirty_rect, self._degrade())
+
+        return dirty_rect
+
+    def finish(self):
+        # Show the last frame of every running and queued cell at once
+        while self._streams:
+            self._next_layers(list(self._streams))
+
+        dirty_rect = None
+        for sac in self._single_controllers:
+            dirty_rect = union_rect(dirty_rect, sac.finish())
+
+        self._single_controllers = []
+        while self._pending:
+            sac = self._start(*self._pending.popleft())
+            dirty_rect = union_rect(dirty_rect, sac.finish())
+
+        self._single_controllers = []
+        return dirty_rect
+
+    def _next_layers(self, streams):
+        # Starts the next layer of each stream, the ones run dry are dropped
+        for stream in streams:
+            layers, fill, fill_from, time, fps = stream
+            cells = next(layers, None)
+            if cells is None:
+                self._streams.remove(stream)
+                continue
+
+            self.reveal_cells(
+                cells=cells,
+                fill=fill,
+                fill_from=fill_from,
+                time=time,
+                fps=fps,
+            )
+
+    def _degrade(self):
+        self._degradation += 1
+        if self._degradation <= 2:
+            return
+
+        return self.finish()
+
+    def _start_pending(self):
+        while (
+                self._pending
+                and len(self._single_controllers) < self.MAX_CONCURRENT
+        ):
+            self._start(*self._pending.popleft())
+
+    def _start(self, x, y, method, fill, fill_from, time, fps):
+        if self._degradation >= 1:
+            method = CHEAPEST_METHOD
+
+        if self._degradation >= 2:
+            fps = fps or self.DEFAULT_ANIM_SETTINGS[method]['fps']
+            fps = max(1, int(fps / 2))
+
+        sac = SingleAnimController(
+            board_image=self._board_image,
+            rng=self._rng,
+        )
+        self._single_controllers.append(sac)
+        if method == METHOD.SLIDE:
+            self._animate_rectangle(sac, x, y, fill, time, fps)
+        elif method == METHOD.FADE:
+            self._fade(sac, x, y, fill, fill_from, time, fps)
+        elif method == METHOD.FLIP:
+            self._flip(sac, x, y, fill, fill_from, time, fps)
+        else:
+            error_msg = f'The method {method} is not implemented'
+            raise RuntimeError(error_msg)
+
+        return sac
+
+    def _animate_rectangle(self, sac, x, y, fill, time, fps):
+        time = time or self.DEFAULT_ANIM_SETTINGS[METHOD.SLIDE]['time']
+        sac.fps = fps or self.DEFAULT_ANIM_SETTINGS[METHOD.SLIDE]['fps']
+        sac.animate_rectangle(
+            x=x,
+            y=y,
+            x_size=self._board_image.cell_image_size - 1,
+            y_size=self._board_image.cell_image_size - 1,
+            fill=fill,
+            time=time,
+        )
+
+    def _fade(self, sac, x, y, fill_to, fill_from, time, fps):
+        time = time or self.DEFAULT_ANIM_SETTINGS[METHOD.FADE]['time']
+        sac.fps = fps or self.DEFAULT_ANIM_SETTINGS[METHOD.FADE]['fps']
+        sac.fade(
+            x=x,
+            y=y,
+            x_size=self._board_image.cell_image_size - 1,
+            y_size=self._board_image.cell_image_size - 1,
+            fill_to=fill_to,
+            fill_from=fill_from,
+            time=time,
+        )
+
+    def _flip(self, sac, x, y, fill_to, fill_from, time, fps):
+        time = time or self.DEFAULT_ANIM_SETTINGS[METHOD.FLIP]['time']
+        sac.fps = fps or self.DEFAULT_ANIM_SETTINGS[METHOD.FLIP]['fps']
+        sac.flip(
+            x=x,
+            y=y,
+            x_size=self._board_image.cell_image_size - 1,
+            y_size=self._board_image.cell_image_size - 1,
+            fill_to=fill_to,
+            fill_from=fill_from,
+            time=time,
+        )
+
+    def _get_cell_coordinates(self, cells):
+        return list(
+            map(
+                self._board_image.slot_to_pixel,
+                [cell.slot for cell in cells],
+            )
+        )
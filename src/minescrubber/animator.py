@@ -1,440 +1,159 @@
-import enum
 import io
-import functools
 
 
-from PIL import ImageDraw, Image
+from PIL import Image
 
 
 from .qt import BaseDialog, QtCore, QtWidgets, QtGui
+from . import instrument
 from .imager import COLOR
+from .animation import METHOD, CellAnimations
 
 
-class DIRECTION(enum.Enum):
-    LEFT = -1
-    RIGHT = 1
-    TOP = -1
-    BOTTOM = 1
-
-
-@enum.unique
-class AXIS(enum.Enum):
-    X = 0
-    Y = 1
-    XY = 2
-
-
-@enum.unique
-class METHOD(enum.Enum):
-    SLIDE = 0
-    FADE = 1
-    FLIP = 2
-
-
-class SingleAnimController(QtCore.QObject):
-    UPDATE_SIGNAL = QtCore.Signal()
-    DONE_SIGNAL = QtCore.Signal(QtCore.QObject)
-    DEFAULT_TIME = 1  # In seconds
+class AnimController(QtCore.QObject):
+    # Plays `CellAnimations` on a Qt timer. Emits the union rect of all the
+    # cells drawn during a frame. Records the time spent drawing each frame
+    # and the number of frames the timer fell behind by.
+    UPDATE_SIGNAL = QtCore.Signal(tuple)
+    DONE_SIGNAL = QtCore.Signal()
+    DEFAULT_ANIM_SETTINGS = CellAnimations.DEFAULT_ANIM_SETTINGS
 
-    def __init__(self, board_image=None, parent=None):
+    def __init__(
+            self, board_image, method=METHOD.FADE, adaptive=False,
+            rng=None, parent=None,
+    ):
         super().__init__(parent=parent)
-        self._is_running = False
-        self._board_image = board_image
-        self._time = 0
-        self._step = 0
-        self._fps = 6
-        self._nb_frames = 0
-        self._frames_played = 0
-        self._draw_context = ImageDraw.Draw(self._board_image.image)
-        self._animate_func_to_use = None
-        self._animate_func_args = None
-        self._animate_func_kwargs = None
+        self._animations = CellAnimations(
+            board_image,
+            method=method,
+            adaptive=adaptive,
+            rng=rng,
+        )
+
+        # A single clock drives every active cell animation
         self._timer = QtCore.QTimer()
-        self._timer.timeout.connect(self._update)
-        self.name = None
+        self._timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self._elapsed_timer = QtCore.QElapsedTimer()
+
+        self.tick_timer = instrument.FrameTimer('anim_tick')
+        self.dropped_frames = instrument.FrameTimer(
+            'dropped_frames',
+            unit='frames',
+        )
 
     @property
-    def is_running(self):
-        return self._is_running
+    def method(self):
+        return self._animations.method
+
+    @method.setter
+    def method(self, method):
+        self._animations.method = method
 
     @property
     def fps(self):
-        return self._fps
+        return self._animations.fps
 
     @fps.setter
     def fps(self, val):
-        self._fps = val
+        self._animations.fps = val
 
     @property
-    def qt_image(self):
-        return self._board_image.qt_image
-
-    def animate_rectangle(self, x, y, x_size, y_size, fill=None, time=None):
-        import random
-        axis = random.choice(list(AXIS))
-        x_dir = random.choice(list(DIRECTION))
-        y_dir = random.choice(list(DIRECTION))
-
-        if axis == AXIS.XY:
-            if x_dir == DIRECTION.LEFT:
-                x += x_size
-            if y_dir == DIRECTION.TOP:
-                y += y_size
-        elif axis == AXIS.X:
-            if x_dir == DIRECTION.LEFT:
-                x += x_size
-        elif axis == AXIS.Y:
-            if y_dir == DIRECTION.TOP:
-                y += y_size
-
-        animate_func_args = (x, y, x_size, y_size)
-        animate_func_kwargs = {
-            'axis': axis,
-            'x_dir': x_dir,
-            'y_dir': y_dir,
-            'fill': fill,
-        }
-
-        self._animate_func_to_use = functools.partial(
-            self._rectangle,
-            *animate_func_args,
-            **animate_func_kwargs,
-        )
-
-        self._run(
-            time=time,
-        )
-
-    def fade(self, x, y, x_size, y_size, fill_to, fill_from, time=None):
-        animate_func_args = (x, y, x_size, y_size, fill_to, fill_from)
-        animate_func_kwargs = {}
-        self._animate_func_to_use = functools.partial(
-            self._fade,
-            *animate_func_args,
-            **animate_func_kwargs,
-        )
-
-        self._run(
-            time=time,
-        )
-
-    def flip(self, x, y, x_size, y_size, fill_to, fill_from, time=None):
-        animate_func_args = (x, y, x_size, y_size, fill_to, fill_from)
-        animate_func_kwargs = {}
-        self._animate_func_to_use = functools.partial(
-            self._flip,
-            *animate_func_args,
-            **animate_func_kwargs,
-        )
-
-        self._run(
-            time=time,
-        )
-
-    def _run(self, time=None):
-        time = time or self.DEFAULT_TIME
-        self._time = time * 1000
-        self._step = self._time / self._fps
-        self._nb_frames = int(self._time / self._step)
-        self._timer.setInterval(self._step)
-        self._timer.start()
-
-    def _update(self):
-        if self._frames_played == self._nb_frames:
-            self._timer.stop()
-            self._time = 0
-            self._fps = 0
-            self._nb_frames = 0
-            self._is_running = False
-            self.DONE_SIGNAL.emit(self)
-            return
-
-        self._frames_played += 1
-        self._time -= self._step
-        self._animate_func_to_use()
-        self.UPDATE_SIGNAL.emit()
-
-    def _rectangle(
-            self, x, y, x_size, y_size, axis=AXIS.XY,
-            x_dir=DIRECTION.RIGHT, y_dir=DIRECTION.BOTTOM, fill=None
-    ):
-        _x_incr = (
-            int(x_size * self._frames_played / self._nb_frames)
-            * x_dir.value
-        )
-        _y_incr = (
-            int(y_size * self._frames_played / self._nb_frames)
-            * y_dir.value
-        )
-
-        x_incr = x_size
-        y_incr = y_size
-        if axis == AXIS.X:
-            x_incr = _x_incr
-        elif axis == AXIS.Y:
-            y_incr = _y_incr
-        elif axis == AXIS.XY:
-            x_incr = _x_incr
-            y_incr = _y_incr
-
-        self._draw_context.rectangle(
-            [
-                (x, y),
-                (x + x_incr, y + y_incr),
-            ],
-            fill=fill,
-        )
-
-    def _fade(self, x, y, x_size, y_size, fill_to, fill_from):
-        fill_from = self._fix_alpha(fill_from)
-
-        alpha = int(255 * self._frames_played / self._nb_frames)
-        r, g, b = fill_to
-        fill_to = (r, g, b, alpha)
-
-        result = self._alpha_blend(fill_from, fill_to)
-
-        self._draw_context.rectangle(
-            [
-                (x, y),
-                (x + x_size, y + y_size),
-            ],
-            fill=result,
-        )
-
-    def _fix_alpha(self, color, normalized=False):
-        alpha = 1 if normalized else 255
-        if len(color) == 3:
-            return (*color, alpha)
-        return color
-
-    def _alpha_blend(self, src, dst):
-        src = self._normalize_color(src)
-        r_src, g_src, b_src, a_src = src
-
-        dst = self._normalize_color(dst)
-        r_dst, g_dst, b_dst, a_dst = dst
-
-        a_mix = a_src + a_dst - (a_src * a_dst)
-
-        r_mix = self._blend(r_src, a_src, r_dst, a_dst, a_mix)
-        g_mix = self._blend(g_src, a_src, g_dst, a_dst, a_mix)
-        b_mix = self._blend(b_src, a_src, b_dst, a_dst, a_mix)
-        result = r_mix, g_mix, b_mix, a_mix
-
-        return self._denormalize_color(result)
-
-    def _blend(self, c_src, a_src, c_dst, a_dst, a_mix):
-        if a_mix == 0:
-            return 0
-        return ((c_dst * a_dst) + (c_src * a_src * (1 - a_dst))) / a_mix
-
-    def _normalize_color(self, color):
-        color = self._fix_alpha(color)
-        return tuple(map(lambda x: x / 255, color))
-
-    def _denormalize_color(self, color):
-        color = self._fix_alpha(color, normalized=True)
-        return tuple(map(lambda x: int(x * 255), color))
-
-    def _flip(self, x, y, x_size, y_size, fill_to, fill_from):
-        orig_incr = self._frames_played / self._nb_frames
-        mid_color = COLOR.gray_27
-
-        incr = None
-        if orig_incr <= 0.5:
-            incr = self._rescale(
-                val=orig_incr,
-                min_in=0.0,
-                max_in=0.5,
-                min_out=0.0,
-                max_out=1.0,
-            )
-
-            src = self._fix_alpha(fill_from)
-            alpha = int(255 * incr)
-            r, g, b = mid_color
-            dst = (r, g, b, alpha)
-            fill = self._alpha_blend(src, dst)
-
-            r1_start = (x, y)
-            r1_end = (x + int(x_size * incr / 2), y + y_size)
-            r2_start = (x + x_size - int(x_size * incr / 2) + 1, y)
-            r2_end = (x + x_size, y + y_size)
-        else:
-            incr = self._rescale(
-                val=orig_incr,
-                min_in=0.5,
-                max_in=1.0,
-                min_out=0.0,
-                max_out=1.0,
-            )
-
-            src = self._fix_alpha(mid_color)
-            alpha = int(255 * incr)
-            r, g, b = fill_to
-            dst = (r, g, b, alpha)
-            fill = self._alpha_blend(src, dst)
-            r1_start = (
-                x + int(x_size / 2) - int(x_size * incr / 2),
-                y,
-            )
-
-            r1_end = (
-                x + int(x_size / 2),
-                y + y_size,
-            )
-
-            r2_start = (
-                x + int(x_size / 2) + 1,
-                y,
-            )
-
-            r2_end = (
-                x + int(x_size / 2) + 1 + int(x_size * incr / 2),
-                y + y_size,
-            )
-
-        # First rect
-        self._draw_context.rectangle(
-            [r1_start, r1_end],
-            fill=fill,
-        )
-
-        # Second rect
-        self._draw_context.rectangle(
-            [r2_start, r2_end],
-            fill=fill,
-        )
+    def adaptive(self):
+        return self._animations.adaptive
 
-    def _rescale(self, val, min_in, max_in, min_out, max_out):
-        if min_in == max_in:
-            return 0
-        return min_out + (
-            (val - min_in) * (max_out - min_out) / (max_in - min_in)
-        )
+    @adaptive.setter
+    def adaptive(self, adaptive):
+        self._animations.adaptive = adaptive
 
+    @property
+    def rng(self):
+        return self._animations.rng
 
-class AnimController(QtCore.QObject):
-    UPDATE_SIGNAL = QtCore.Signal()
-    DONE_SIGNAL = QtCore.Signal()
-    DEFAULT_ANIM_SETTINGS = {
-        METHOD.SLIDE: {
-            'time': 0.1,
-            'fps': 6,
-        },
-        METHOD.FLIP: {
-            'time': 0.5,
-            'fps': 20,
-        },
-        METHOD.FADE: {
-            'time': 0.1,
-            'fps': 6,
-        },
-    }
-
-    def __init__(self, board_image, method=METHOD.FADE, parent=None):
-        super().__init__(parent=parent)
-        self._board_image = board_image
-        self._single_controllers = []
-        self._method = method
-        self._fps = 6
+    @rng.setter
+    def rng(self, rng):
+        self._animations.rng = rng
 
     @property
-    def method(self):
-        return self._method
+    def frame_budget(self):
+        return self._animations.frame_budget
 
-    @method.setter
-    def method(self, method):
-        self._method = method
+    @frame_budget.setter
+    def frame_budget(self, frame_budget):
+        self._animations.frame_budget = frame_budget
 
     @property
-    def fps(self):
-        return self._fps
+    def board_image(self):
+        return self._animations.board_image
 
-    @fps.setter
-    def fps(self, val):
-        self._fps = val
+    @board_image.setter
+    def board_image(self, board_image):
+        self._animations.board_image = board_image
 
     @property
     def qt_image(self):
-        return self._board_image.qt_image
+        return self.board_image.qt_image
+
+    @property
+    def is_running(self):
+        return self._animations.is_running
 
     def reveal_cells(
             self, cells, fill,
-            fill_from=None, time=None, fps=None
+            fill_from=None, time=None, fps=None, origin=None,
     ):
-        coords = self._get_cell_coordinates(cells)
-        for coord in coords:
-            x, y = coord
-            sac = SingleAnimController(board_image=self._board_image)
-            self._single_controllers.append(sac)
-            if self.method == METHOD.SLIDE:
-                self._animate_rectangle(sac, x, y, fill, time, fps)
-            elif self.method == METHOD.FADE:
-                self._fade(sac, x, y, fill, fill_from, time, fps)
-            elif self.method == METHOD.FLIP:
-                self._flip(sac, x, y, fill, fill_from, time, fps)
-            else:
-                error_msg = f'The method {self.method} is not implemented'
-                raise RuntimeError(error_msg)
-
-            sac.UPDATE_SIGNAL.connect(self._update)
-            sac.DONE_SIGNAL.connect(self._done)
-
-    def _animate_rectangle(self, sac, x, y, fill, time, fps):
-        time = time or self.DEFAULT_ANIM_SETTINGS[METHOD.SLIDE]['time']
-        sac.fps = fps or self.DEFAULT_ANIM_SETTINGS[METHOD.SLIDE]['fps']
-        sac.animate_rectangle(
-            x=x,
-            y=y,
-            x_size=self._board_image.cell_image_size - 1,
-            y_size=self._board_image.cell_image_size - 1,
+        self._animations.reveal_cells(
+            cells=cells,
             fill=fill,
+            fill_from=fill_from,
             time=time,
+            fps=fps,
+            origin=origin,
         )
+        self._start_clock()
 
-    def _fade(self, sac, x, y, fill_to, fill_from, time, fps):
-        time = time or self.DEFAULT_ANIM_SETTINGS[METHOD.FADE]['time']
-        sac.fps = fps or self.DEFAULT_ANIM_SETTINGS[METHOD.FADE]['fps']
-        sac.fade(
-            x=x,
-            y=y,
-            x_size=self._board_image.cell_image_size - 1,
-            y_size=self._board_image.cell_image_size - 1,
-            fill_to=fill_to,
+    def reveal_layers(self, layers, fill, fill_from=None, time=None, fps=None):
+        self._animations.reveal_layers(
+            layers=layers,
+            fill=fill,
             fill_from=fill_from,
             time=time,
+            fps=fps,
         )
+        self._start_clock()
 
-    def _flip(self, sac, x, y, fill_to, fill_from, time, fps):
-        time = time or self.DEFAULT_ANIM_SETTINGS[METHOD.FLIP]['time']
-        sac.fps = fps or self.DEFAULT_ANIM_SETTINGS[METHOD.FLIP]['fps']
-        sac.flip(
-            x=x,
-            y=y,
-            x_size=self._board_image.cell_image_size - 1,
-            y_size=self._board_image.cell_image_size - 1,
-            fill_to=fill_to,
-            fill_from=fill_from,
-            time=time,
+    def _start_clock(self):
+        if not self._animations.is_running:
+            self.DONE_SIGNAL.emit()
+            return
+
+        # Tick as often as the fastest running animation needs
+        self._timer.setInterval(max(1, int(self._animations.interval)))
+        if not self._timer.isActive():
+            self._elapsed_timer.start()
+            self._timer.start()
+
+    def _tick(self):
+        elapsed = self._elapsed_timer.restart()
+        self.dropped_frames.record(
+            max(0, int(elapsed / max(1, self._timer.interval())) - 1)
         )
 
-    def _update(self):
-        self.UPDATE_SIGNAL.emit()
+        self.tick_timer.start()
+        dirty_rect = self._animations.advance(elapsed)
+        self.tick_timer.stop()
+        if dirty_rect is not None:
+            self.UPDATE_SIGNAL.emit(dirty_rect)
 
-    def _done(self, controller_obj):
-        self._single_controllers.remove(controller_obj)
-        if not self._single_controllers:
+        if not self._animations.is_running:
+            self._timer.stop()
             self.DONE_SIGNAL.emit()
+            return
 
-    def _get_cell_coordinates(self, cells):
-        return list(
-            map(
-                self._board_image.slot_to_pixel,
-                [cell.slot for cell in cells],
-            )
-        )
+        # Degraded or newly started cells may play at another fps
+        interval = max(1, int(self._animations.interval))
+        if interval != self._timer.interval():
+            self._timer.setInterval(interval)
 
 
 # This widget is used only for testing the animation
@@ -454,8 +173,8 @@ class AnimView(BaseDialog):
         title = 'Anim View'
         self.setWindowTitle(title)
         self.setFixedSize(
-            max(304, self._ac.qt_image.width() + 40),
-            self._ac.qt_image.height() + 180,
+            max(304, self._board_image.width + 40),
+            self._board_image.height + 180,
         )
 
         self._main_layout = QtWidgets.QVBoxLayout(self)
@@ -557,7 +276,7 @@ class AnimView(BaseDialog):
         self._board_image.image = Image.open(self._orig_image_data)
         self._update()
 
-    def _update(self):
+    def _update(self, rect=None):
         self._pixmap = QtGui.QPixmap.fromImage(self._ac.qt_image)
         self._image_label.setPixmap(self._pixmap)
 
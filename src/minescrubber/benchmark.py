@@ -0,0 +1,599 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+
+from . import (
+    headless, imager, animation, viewport, solver, boardstate, boardgen,
+    noguess,
+)
+
+
+BOARD_SIZES = (9, 18, 36, 72)
+MINE_DENSITY = 0.15
+MINE_DENSITIES = (0.1, 0.15, 0.2)
+UNCOVER_RATIO = 0.5
+MAX_UNCOVER_CLICKS = 1000
+NB_PIXEL_LOOKUPS = 10000
+MAX_REVEALED_CELLS = 256
+REGRESSION_TOLERANCE = 0.25
+SOLVER_SIZES = (36, 100, 250)
+STATE_SIZE = 1000
+GENERATION_SIZES = (500, 1000, 2000)
+NO_GUESS_SIZES = (9, 16, 30)
+NO_GUESS_DENSITY = 0.15
+
+
+def create_board(size, mine_density=MINE_DENSITY, seed=0, generated=False):
+    return create_ui(
+        size, mine_density=mine_density, seed=seed, generated=generated,
+    ).board
+
+
+def create_ui(size, mine_density=MINE_DENSITY, seed=0, generated=False):
+    # A game with roughly `UNCOVER_RATIO` of its safe cells uncovered and
+    # a few flags so that every overlay kind gets drawn. `generated` plays
+    # it on a `boardgen.GeneratedBoard`, for sizes past the core ones.
+    rng = random.Random(seed)
+    ui = headless.create_ui(generated=generated)
+    nb_mines = max(1, int(size * size * mine_density))
+    board = ui.new_game(size, size, nb_mines, seed=seed)
+    if generated:
+        board.place_mines()
+
+    safe_slots = [cell.slot for cell in board.cells if not cell.has_mine]
+    rng.shuffle(safe_slots)
+    nb_clicks = min(
+        MAX_UNCOVER_CLICKS,
+        int(len(safe_slots) * UNCOVER_RATIO),
+    )
+    for slot in safe_slots[:nb_clicks]:
+        if ui.is_game_over or ui.is_game_solved:
+            break
+        if not ui.board.get_cell(slot).is_uncovered:
+            ui.select(slot)
+
+    mine_slots = [cell.slot for cell in ui.board.cells if cell.has_mine]
+    for slot in mine_slots[:int(len(mine_slots) / 2)]:
+        ui.flag(slot)
+
+    return ui
+
+
+def time_call(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def bench_redraw(sizes=BOARD_SIZES, repeat=5, backend='pil'):
+    # Full redraw time per board size, `us_per_cell` should stay flat as
+    # the number of cells grows if redraw is linear in board area
+    results = []
+    for size in sizes:
+        board_image = imager.BoardImage(create_board(size), backend=backend)
+        seconds = time_call(board_image.draw, repeat=repeat)
+        nb_cells = size * size
+        results.append({
+            'backend': backend,
+            'size': size,
+            'cells': nb_cells,
+            'seconds': seconds,
+            'us_per_cell': seconds * 1e6 / nb_cells,
+        })
+
+    return results
+
+
+def bench_present(sizes=BOARD_SIZES, nb_clicks=10, seed=0):
+    # Time and bytes to get a click on screen, both present paths timed
+    # alike on the same frames. Before the shared buffer every frame made
+    # a full `ImageQt` copy of the board plus a full `QPixmap.fromImage()`
+    # upload. Now `qt_image` shares the PIL pixels and only the dirty
+    # region gets painted, here into an image standing for the window.
+    from PIL import ImageQt
+    from .qt import QtCore, QtGui
+
+    # The pixmaps need an application, offscreen without a display
+    app = headless.create_application()
+    rng = random.Random(seed)
+    results = []
+    for size in sizes:
+        ui = create_ui(size, seed=seed)
+        board_image = imager.BoardImage(ui.board)
+        window = QtGui.QImage(
+            board_image.width,
+            board_image.height,
+            QtGui.QImage.Format_RGBA8888,
+        )
+
+        before = []
+        after = []
+        for _ in range(nb_clicks):
+            covered_slots = [
+                cell.slot for cell in ui.board.cells
+                if not cell.is_uncovered and not cell.is_flagged
+            ]
+            if not covered_slots:
+                break
+
+            board_image.update_image(ui.flag(rng.choice(covered_slots)))
+
+            start = time.perf_counter()
+            qt_image = ImageQt.ImageQt(board_image.image)
+            pixmap = QtGui.QPixmap.fromImage(qt_image)
+            before.append((
+                time.perf_counter() - start,
+                qt_image.sizeInBytes() + pixmap.toImage().sizeInBytes(),
+            ))
+
+            left, top, right, bottom = board_image.dirty_rect
+            rect = QtCore.QRect(left, top, right - left, bottom - top)
+            start = time.perf_counter()
+            painter = QtGui.QPainter(window)
+            painter.drawImage(rect, board_image.qt_image, rect)
+            painter.end()
+            after.append((
+                time.perf_counter() - start,
+                rect.width() * rect.height() * board_image.qt_image.depth()
+                // 8,
+            ))
+
+        nb_frames = max(1, len(before))
+        results.append({
+            'size': size,
+            'platform': app.platformName(),
+            'seconds_per_frame_before': (
+                sum(seconds for seconds, _ in before) / nb_frames
+            ),
+            'seconds_per_frame_after': (
+                sum(seconds for seconds, _ in after) / nb_frames
+            ),
+            'bytes_per_frame_before': (
+                sum(nb_bytes for _, nb_bytes in before) / nb_frames
+            ),
+            'bytes_per_frame_after': (
+                sum(nb_bytes for _, nb_bytes in after) / nb_frames
+            ),
+        })
+
+    return results
+
+
+def get_board_sizes():
+    # From the smallest to the largest board the core allows
+    board = headless.create_board(9, 9, 1)
+    return tuple(sorted(
+        set(BOARD_SIZES) | {board.MIN_CELLS, board.MAX_CELLS}
+    ))
+
+
+def create_board_image(board, backend='pil'):
+    # Same choice of image as the main window
+    if viewport.needs_viewport(board):
+        return viewport.ViewportImage(board, backend=backend)
+
+    return imager.BoardImage(board, backend=backend)
+
+
+def bench_hot_paths(
+        sizes=BOARD_SIZES, densities=MINE_DENSITIES, repeat=5,
+        backend='pil', seed=0,
+):
+    # Times the rendering hot paths for every board size and mine density.
+    # `per_unit` is the time in microseconds per cell for the drawing
+    # benchmarks, per lookup for `pixel_to_slot` and per frame for the
+    # reveal animations.
+    rng = random.Random(seed)
+    results = []
+    for size in sizes:
+        for density in densities:
+            ui = create_ui(size, mine_density=density, seed=seed)
+            board_image = create_board_image(ui.board, backend=backend)
+
+            def add_result(name, seconds, nb_units):
+                results.append({
+                    'benchmark': name,
+                    'backend': backend,
+                    'size': size,
+                    'density': density,
+                    'cells': size * size,
+                    'seconds': seconds,
+                    'per_unit': seconds * 1e6 / max(1, nb_units),
+                })
+
+            nb_cells = size * size
+            add_result(
+                'init_image',
+                time_call(
+                    lambda: board_image.init_image(ui.board),
+                    repeat=repeat,
+                ),
+                nb_cells,
+            )
+            add_result(
+                'draw',
+                time_call(board_image.draw, repeat=repeat),
+                nb_cells,
+            )
+
+            # A viewport draws its cells in tiles, not one by one
+            if not isinstance(board_image, viewport.ViewportImage):
+                add_result(
+                    'draw_cell',
+                    time_call(
+                        lambda: [
+                            board_image._draw_cell(x, y)
+                            for y in range(size)
+                            for x in range(size)
+                        ],
+                        repeat=repeat,
+                    ),
+                    nb_cells,
+                )
+
+            pixels = [
+                (
+                    rng.randrange(board_image.width),
+                    rng.randrange(board_image.height),
+                )
+                for _ in range(NB_PIXEL_LOOKUPS)
+            ]
+            add_result(
+                'pixel_to_slot',
+                time_call(
+                    lambda: [board_image.pixel_to_slot(*p) for p in pixels],
+                    repeat=repeat,
+                ),
+                NB_PIXEL_LOOKUPS,
+            )
+
+            covered_cells = [
+                cell for cell in ui.board.cells if not cell.is_uncovered
+            ]
+            cells = rng.sample(
+                covered_cells,
+                min(MAX_REVEALED_CELLS, len(covered_cells)),
+            )
+            for method in animation.METHOD:
+                nb_frames = []
+                seconds = time_call(
+                    lambda: nb_frames.append(
+                        headless.play_reveal(board_image, cells, method)
+                    ),
+                    repeat=repeat,
+                )
+                add_result(
+                    f'reveal_{method.name.lower()}',
+                    seconds,
+                    nb_frames[-1],
+                )
+
+    return results
+
+
+def get_opening_slot(board):
+    # The benchmark peeks at the mines only to open the game on a zero hint
+    # so that the solver has something to work with
+    for cell in board.cells:
+        if not cell.has_mine and cell.hint == 0:
+            return cell.slot
+
+
+def bench_solver(sizes=SOLVER_SIZES, mine_density=MINE_DENSITY):
+    # Plays every board with the solver until it has to guess. A step is
+    # one constraint looked at, `steps_per_second` should stay flat as the
+    # board grows since moves only revisit the constraints around them.
+    # The boards are `boardgen.GeneratedBoard`s, the sizes go past what the
+    # core allows. Their mines are placed by the first select, which opens
+    # on a zero hint wherever it is.
+    results = []
+    for size in sizes:
+        ui = headless.create_ui(generated=True)
+        nb_mines = max(1, int(size * size * mine_density))
+        board = ui.new_game(size, size, nb_mines, seed=0)
+        opening_slot = get_opening_slot(board)
+        if opening_slot is None:
+            continue
+
+        start = time.perf_counter()
+        board_solver = solver.Solver(ui.select(opening_slot))
+        nb_moves = 0
+        while not (ui.is_game_over or ui.is_game_solved):
+            slot = board_solver.next_move()
+            if slot is None:
+                break
+
+            board = ui.select(slot)
+            board_solver.update(board, slots=[slot] + list(board.last_swept))
+            nb_moves += 1
+
+        seconds = time.perf_counter() - start
+        results.append({
+            'size': size,
+            'cells': size * size,
+            'moves': nb_moves,
+            'steps': board_solver.nb_steps,
+            'seconds': seconds,
+            'steps_per_second': board_solver.nb_steps / max(seconds, 1e-9),
+            'solved': ui.is_game_solved,
+        })
+
+    return results
+
+
+def bench_board_state(size=STATE_SIZE, seed=0):
+    # Memory taken by the state of a huge board as sets of slots (covered,
+    # flagged, mines, uncovered slots of the solver) and a dict of hints,
+    # the way the UI layers used to keep it, against a
+    # `boardstate.BoardState`. The sizes go past the core ones, the board
+    # is a `boardgen.GeneratedBoard`.
+    board = create_board(size, seed=seed, generated=True)
+
+    def get_slot_sets():
+        return (
+            {cell.slot for cell in board.cells if not cell.is_uncovered},
+            {cell.slot for cell in board.cells if cell.is_flagged},
+            {cell.slot for cell in board.cells if cell.has_mine},
+            {cell.slot for cell in board.cells if cell.is_uncovered},
+            {cell.slot: cell.hint for cell in board.cells},
+        )
+
+    _, bytes_before = measure_memory(get_slot_sets)
+    _, bytes_after = measure_memory(
+        lambda: boardstate.BoardState.from_board(board)
+    )
+    return {
+        'size': size,
+        'cells': size * size,
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'ratio': bytes_before / max(1, bytes_after),
+    }
+
+
+def bench_generation(
+        sizes=GENERATION_SIZES, mine_density=MINE_DENSITY, repeat=5,
+):
+    # Time to place the mines of a `boardgen.GeneratedBoard` around a first
+    # select in the middle and compute its hints, ready to be drawn
+    results = []
+    for size in sizes:
+        nb_mines = int(size * size * mine_density)
+
+        def generate():
+            board = boardgen.GeneratedBoard(size, size, nb_mines, seed=0)
+            board.place_mines(safe_slot=(size // 2, size // 2))
+
+        seconds = time_call(generate, repeat=repeat)
+        results.append({
+            'size': size,
+            'cells': size * size,
+            'mines': nb_mines,
+            'seconds': seconds,
+        })
+
+    return results
+
+
+def bench_no_guess(
+        sizes=NO_GUESS_SIZES, mine_density=NO_GUESS_DENSITY, nb_boards=10,
+):
+    # Time for the process pool of `noguess.find_seeds()` to find boards
+    # that can be solved without guessing
+    results = []
+    for size in sizes:
+        nb_mines = int(size * size * mine_density)
+        start = time.perf_counter()
+        seeds = list(noguess.find_seeds(
+            size, size, nb_mines, nb_boards=nb_boards, seed=0,
+        ))
+        seconds = time.perf_counter() - start
+        results.append({
+            'size': size,
+            'mines': nb_mines,
+            'boards': len(seeds),
+            'seconds': seconds,
+            'ms_per_board': seconds * 1000 / len(seeds),
+        })
+
+    return results
+
+
+def measure_memory(func):
+    # Result of `func` and the bytes it still holds once it returned
+    tracemalloc.start()
+    try:
+        result = func()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, size
+
+
+def compare_results(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    # Results more than `tolerance` slower than the same benchmark in the
+    # baseline
+    def get_key(result):
+        return (
+            result['benchmark'],
+            result['backend'],
+            result['size'],
+            result['density'],
+        )
+
+    baseline_seconds = {
+        get_key(result): result['seconds'] for result in baseline
+    }
+    regressions = []
+    for result in results:
+        seconds = baseline_seconds.get(get_key(result))
+        if seconds is None or result['seconds'] <= seconds * (1 + tolerance):
+            continue
+
+        regressions.append(dict(result, baseline_seconds=seconds))
+
+    return regressions
+
+
+def print_summary():
+    backends = ['pil'] if imager.numpy is None else ['pil', 'numpy']
+    for result in sum([bench_redraw(backend=b) for b in backends], []):
+        print(
+            f"redraw ({result['backend']}) "
+            f"{result['size']}x{result['size']}: "
+            f"{result['seconds'] * 1000:.2f} ms, "
+            f"{result['us_per_cell']:.2f} us/cell"
+        )
+
+    for result in bench_present():
+        print(
+            f"present {result['size']}x{result['size']}: "
+            f"{result['seconds_per_frame_before'] * 1000:.3f} ms, "
+            f"{result['bytes_per_frame_before']:.0f} bytes/frame before, "
+            f"{result['seconds_per_frame_after'] * 1000:.3f} ms, "
+            f"{result['bytes_per_frame_after']:.0f} bytes/frame after"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the minescrubber rendering hot paths',
+    )
+    parser.add_argument(
+        '--sizes', type=int, nargs='+',
+        help='board sizes, defaults to MIN_CELLS to MAX_CELLS',
+    )
+    parser.add_argument(
+        '--densities', type=float, nargs='+', default=MINE_DENSITIES,
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--backend', choices=imager.BoardImage.BACKENDS, default='pil',
+    )
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument(
+        '--baseline',
+        help='results file of a previous run to check for regressions',
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=REGRESSION_TOLERANCE,
+    )
+    parser.add_argument(
+        '--summary', action='store_true',
+        help='only print the redraw and present summary',
+    )
+    parser.add_argument(
+        '--solver', action='store_true',
+        help='only print the solver steps per second',
+    )
+    parser.add_argument(
+        '--generate', action='store_true',
+        help='only print the time to generate huge boards',
+    )
+    parser.add_argument(
+        '--state', action='store_true',
+        help='only print the memory taken by the board state',
+    )
+    parser.add_argument(
+        '--no-guess', action='store_true',
+        help='only print the time to find boards solvable without guessing',
+    )
+    args = parser.parse_args(argv)
+
+    if args.summary:
+        print_summary()
+        return 0
+
+    if args.solver:
+        for result in bench_solver(sizes=args.sizes or SOLVER_SIZES):
+            print(
+                f"solver {result['size']}x{result['size']}: "
+                f"{result['moves']} moves, {result['steps']} steps, "
+                f"{result['seconds'] * 1000:.2f} ms, "
+                f"{result['steps_per_second']:.0f} steps/s"
+            )
+        return 0
+
+    if args.generate:
+        for result in bench_generation(
+                sizes=args.sizes or GENERATION_SIZES,
+                repeat=args.repeat,
+        ):
+            print(
+                f"generate {result['size']}x{result['size']} "
+                f"({result['mines']} mines): "
+                f"{result['seconds'] * 1000:.2f} ms"
+            )
+        return 0
+
+    if args.no_guess:
+        for result in bench_no_guess(sizes=args.sizes or NO_GUESS_SIZES):
+            print(
+                f"no guess {result['size']}x{result['size']} "
+                f"({result['mines']} mines): "
+                f"{result['boards']} boards in "
+                f"{result['seconds'] * 1000:.0f} ms, "
+                f"{result['ms_per_board']:.1f} ms/board"
+            )
+        return 0
+
+    if args.state:
+        result = bench_board_state(size=(args.sizes or [STATE_SIZE])[0])
+        print(
+            f"board state {result['size']}x{result['size']}: "
+            f"{result['bytes_before'] / 2 ** 20:.1f} MB as slot sets, "
+            f"{result['bytes_after'] / 2 ** 20:.2f} MB as planes "
+            f"({result['ratio']:.0f}x less)"
+        )
+        return 0
+
+    results = bench_hot_paths(
+        sizes=args.sizes or get_board_sizes(),
+        densities=args.densities,
+        repeat=args.repeat,
+        backend=args.backend,
+    )
+    for result in results:
+        print(
+            f"{result['benchmark']} ({result['backend']}) "
+            f"{result['size']}x{result['size']} "
+            f"@{result['density']:.2f}: "
+            f"{result['seconds'] * 1000:.2f} ms, "
+            f"{result['per_unit']:.2f} us/unit"
+        )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+
+    regressions = compare_results(results, baseline, args.tolerance)
+    for result in regressions:
+        print(
+            f"REGRESSION {result['benchmark']} ({result['backend']}) "
+            f"{result['size']}x{result['size']} "
+            f"@{result['density']:.2f}: "
+            f"{result['seconds'] * 1000:.2f} ms, was "
+            f"{result['baseline_seconds'] * 1000:.2f} ms"
+        )
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
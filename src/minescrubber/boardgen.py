@@ -0,0 +1,226 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+from . import boardstate, floodfill
+
+
+# Mines are never placed within this many cells of the first select, so
+# the game always opens on an empty cell
+SAFE_RADIUS = 1
+
+
+def _check_numpy():
+    if numpy is None:
+        error_msg = 'Generating boards needs numpy to be installed!'
+        raise RuntimeError(error_msg)
+
+
+def place_mines(
+        width, height, nb_mines, safe_slot=None, safe_radius=SAFE_RADIUS,
+        rng=None,
+):
+    # A (height, width) uint8 grid with `nb_mines` ones, none of them in the
+    # square of `safe_radius` around `safe_slot`. The mine indices are drawn
+    # among the cells left once the safe ones are taken out and shifted past
+    # them, so nothing gets drawn twice nor rejected.
+    _check_numpy()
+    rng = rng or numpy.random.default_rng()
+    nb_cells = width * height
+    safe_indices = numpy.zeros(0, dtype=numpy.int64)
+    if safe_slot is not None:
+        x, y = safe_slot
+        ys, xs = numpy.mgrid[
+            max(0, y - safe_radius):min(height, y + safe_radius + 1),
+            max(0, x - safe_radius):min(width, x + safe_radius + 1),
+        ]
+        safe_indices = numpy.sort((ys * width + xs).ravel())
+
+    nb_candidates = nb_cells - len(safe_indices)
+    if not 0 <= nb_mines <= nb_candidates:
+        error_msg = (
+            f'Cannot place {nb_mines} mines on a {width}x{height} board '
+            f'with {len(safe_indices)} safe cells!'
+        )
+        raise ValueError(error_msg)
+
+    indices = rng.choice(nb_candidates, nb_mines, replace=False)
+    if len(safe_indices):
+        indices += numpy.searchsorted(
+            safe_indices - numpy.arange(len(safe_indices)),
+            indices,
+            side='right',
+        )
+
+    mines = numpy.zeros(nb_cells, dtype=numpy.uint8)
+    mines[indices] = 1
+    return mines.reshape(height, width)
+
+
+def compute_hints(mines):
+    # Mines around every cell, a 3x3 box sum done as a sum over the rows
+    # then over the columns, minus the cell itself
+    padded = numpy.pad(mines, 1)
+    rows = padded[:, :-2] + padded[:, 1:-1] + padded[:, 2:]
+    return rows[:-2] + rows[1:-1] + rows[2:] - mines
+
+
+class GeneratedCell:
+    # View over one cell of a `GeneratedBoard`, it holds no state of its own
+    __slots__ = ('_state', 'slot')
+
+    def __init__(self, state, slot):
+        self._state = state
+        self.slot = slot
+
+    @property
+    def has_mine(self):
+        return self._state.has_mine(self.slot)
+
+    @property
+    def hint(self):
+        return self._state.get_hint(self.slot)
+
+    @property
+    def is_flagged(self):
+        return self._state.is_flagged(self.slot)
+
+    @property
+    def is_uncovered(self):
+        return not self._state.is_covered(self.slot)
+
+
+class _CellData:
+    # `board.data`, the cells are made when looked up
+    def __init__(self, state):
+        self._state = state
+
+    def __getitem__(self, slot):
+        x, y = slot
+        if not (0 <= x < self._state.width and 0 <= y < self._state.height):
+            raise KeyError(slot)
+
+        return GeneratedCell(self._state, slot)
+
+    def __contains__(self, slot):
+        x, y = slot
+        return 0 <= x < self._state.width and 0 <= y < self._state.height
+
+    def __len__(self):
+        return self._state.nb_cells
+
+    def __iter__(self):
+        for y in range(self._state.height):
+            for x in range(self._state.width):
+                yield x, y
+
+    def values(self):
+        for slot in self:
+            yield GeneratedCell(self._state, slot)
+
+
+class GeneratedBoard:
+    # Board for the sizes the core takes too long to set up. The mines are
+    # placed on the first select by `place_mines()` and `compute_hints()`,
+    # and the whole board lives in a `boardstate.BoardState` that the
+    # renderer draws from directly. `data`, `cells` and `get_cell()` hand
+    # out views over it, made on demand. Moves are played the way the core
+    # plays them.
+    def __init__(self, width, height, nb_mines, seed=None):
+        _check_numpy()
+        self.width = width
+        self.height = height
+        self.nb_mines = nb_mines
+        self.last_swept = floodfill.SweptSlots()
+        self._rng = numpy.random.default_rng(seed)
+        self._state = boardstate.BoardState(width, height)
+        self._data = _CellData(self._state)
+        self._has_mines = False
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def cells(self):
+        return self._data.values()
+
+    @property
+    def nb_flagged(self):
+        return self._state.nb_flagged
+
+    @property
+    def has_mines(self):
+        return self._has_mines
+
+    @property
+    def is_solved(self):
+        # Every safe cell uncovered
+        return self._state.nb_covered == self.nb_mines
+
+    def get_cell(self, slot):
+        return self._data[slot]
+
+    def place_mines(self, safe_slot=None):
+        mines = place_mines(
+            self.width,
+            self.height,
+            self.nb_mines,
+            safe_slot=safe_slot,
+            rng=self._rng,
+        )
+        self._state.set_mines(
+            numpy.packbits(mines.ravel(), bitorder='little').tobytes(),
+            compute_hints(mines).tobytes(),
+        )
+        self._has_mines = True
+
+    def select(self, slot):
+        # Returns False when the slot held a mine
+        for _ in self.sweep(slot):
+            pass
+
+        # Lost when the select uncovered a mine
+        return not (self.last_swept and self._state.has_mine(slot))
+
+    def sweep(self, slot):
+        # Plays a select one ring of `floodfill.sweep_layers()` at a time,
+        # `last_swept` gets every ring as it is taken
+        state = self._state
+        self.last_swept = floodfill.SweptSlots()
+        if state.is_flagged(slot) or not state.is_covered(slot):
+            return
+
+        if not self._has_mines:
+            self.place_mines(safe_slot=slot)
+
+        if state.has_mine(slot):
+            state.set_covered(slot, False)
+            self.last_swept.add_layer([slot])
+            yield [slot]
+            return
+
+        for layer in floodfill.sweep_layers(
+                slot, self.width, self.height, self._uncover,
+        ):
+            self.last_swept.add_layer(layer)
+            yield layer
+
+    def flag(self, slot):
+        if not self._state.is_covered(slot):
+            return
+
+        self._state.set_flagged(slot, not self._state.is_flagged(slot))
+
+    def _uncover(self, slot):
+        if self._state.is_flagged(slot) or not self._state.is_covered(slot):
+            return
+
+        self._state.set_covered(slot, False)
+        return self._state.get_hint(slot)
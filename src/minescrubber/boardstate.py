@@ -0,0 +1,194 @@
+class BoardState:
+    # Compact mirror of a board for the UI layers that look at every cell
+    # over and over (renderer, solver, hit testing) and would otherwise
+    # walk the cell objects of the core. Mines, covered and flagged cells
+    # are bit planes indexed by y * width + x, in the layout of the replay
+    # masks, and hints take a byte per cell: a 1000x1000 board fits in
+    # about 1.4 MB.
+    #
+    # The mirror is kept in sync by `sync()`, with the slots a move changed
+    # (`board.last_swept`, a flagged slot) or with the whole board.
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        nb_bytes = (width * height + 7) // 8
+        self._mines = bytearray(nb_bytes)
+        self._covered = bytearray(b'\xff' * nb_bytes)
+        self._flagged = bytearray(nb_bytes)
+        self._hints = bytearray(width * height)
+        self._nb_covered = width * height
+        self._nb_flagged = 0
+
+        # Bits past the last cell stay cleared so that planes compare as
+        # bytes
+        if width * height % 8:
+            self._covered[-1] = (1 << (width * height % 8)) - 1
+
+    @classmethod
+    def from_board(cls, board):
+        state = cls(board.width, board.height)
+        state.sync(board)
+        return state
+
+    @property
+    def nb_cells(self):
+        return self.width * self.height
+
+    @property
+    def nb_covered(self):
+        return self._nb_covered
+
+    @property
+    def nb_flagged(self):
+        return self._nb_flagged
+
+    @property
+    def nbytes(self):
+        return (
+            len(self._mines) + len(self._covered) + len(self._flagged)
+            + len(self._hints)
+        )
+
+    @property
+    def mines(self):
+        # The planes are shared, not copied, and must not be modified
+        return self._mines
+
+    @property
+    def covered(self):
+        return self._covered
+
+    @property
+    def flagged(self):
+        return self._flagged
+
+    @property
+    def hints(self):
+        return self._hints
+
+    @property
+    def is_solved(self):
+        # Every mine covered and every covered cell a mine, compared a
+        # plane at a time
+        return self._covered == self._mines
+
+    def index(self, slot):
+        x, y = slot
+        return y * self.width + x
+
+    def slot(self, index):
+        return index % self.width, index // self.width
+
+    def has_mine(self, slot):
+        x, y = slot
+        index = y * self.width + x
+        return bool(self._mines[index >> 3] >> (index & 7) & 1)
+
+    def is_covered(self, slot):
+        x, y = slot
+        index = y * self.width + x
+        return bool(self._covered[index >> 3] >> (index & 7) & 1)
+
+    def is_flagged(self, slot):
+        x, y = slot
+        index = y * self.width + x
+        return bool(self._flagged[index >> 3] >> (index & 7) & 1)
+
+    def get_hint(self, slot):
+        return self._hints[self.index(slot)]
+
+    def set_covered(self, slot, is_covered):
+        if self._set_bit(self._covered, self.index(slot), is_covered):
+            self._nb_covered += 1 if is_covered else -1
+
+    def set_flagged(self, slot, is_flagged):
+        if self._set_bit(self._flagged, self.index(slot), is_flagged):
+            self._nb_flagged += 1 if is_flagged else -1
+
+    def set_mines(self, mines, hints):
+        # The mine plane and the hints of every cell at once, laid out as
+        # `mines` and `hints`
+        if len(mines) != len(self._mines) or len(hints) != len(self._hints):
+            error_msg = (
+                f'Mines and hints do not fit a {self.width}x{self.height} '
+                'board!'
+            )
+            raise ValueError(error_msg)
+
+        self._mines[:] = mines
+        self._hints[:] = hints
+
+    def mine_slots(self):
+        return self._get_slots(self._mines)
+
+    def covered_slots(self):
+        return self._get_slots(self._covered)
+
+    def flagged_slots(self):
+        return self._get_slots(self._flagged)
+
+    def sync(self, board, slots=None):
+        # Copies the cells at `slots`, all of them by default, from `board`
+        # and returns the slots whose state changed
+        if slots is None:
+            cells = board.cells
+        else:
+            cells = [board.data[slot] for slot in slots]
+
+        changed_slots = []
+        for cell in cells:
+            x, y = cell.slot
+            index = y * self.width + x
+            byte = index >> 3
+            bit = 1 << (index & 7)
+            is_changed = False
+
+            is_covered = not cell.is_uncovered
+            if bool(self._covered[byte] & bit) != is_covered:
+                self._covered[byte] ^= bit
+                self._nb_covered += 1 if is_covered else -1
+                is_changed = True
+
+            if bool(self._flagged[byte] & bit) != cell.is_flagged:
+                self._flagged[byte] ^= bit
+                self._nb_flagged += 1 if cell.is_flagged else -1
+                is_changed = True
+
+            # Mines and hints only change once, when the first select
+            # places the mines
+            if bool(self._mines[byte] & bit) != cell.has_mine:
+                self._mines[byte] ^= bit
+                is_changed = True
+
+            hint = cell.hint or 0
+            if self._hints[index] != hint:
+                self._hints[index] = hint
+                is_changed = True
+
+            if is_changed:
+                changed_slots.append(cell.slot)
+
+        return changed_slots
+
+    def _set_bit(self, plane, index, value):
+        # Returns whether the bit changed
+        byte = index >> 3
+        bit = 1 << (index & 7)
+        if bool(plane[byte] & bit) == bool(value):
+            return False
+
+        plane[byte] ^= bit
+        return True
+
+    def _get_slots(self, plane):
+        # Slots of the bits set in `plane`, empty bytes are skipped whole
+        for byte_index, byte in enumerate(plane):
+            if not byte:
+                continue
+
+            index = byte_index << 3
+            while byte:
+                if byte & 1:
+                    yield self.slot(index)
+                byte >>= 1
+                index += 1
@@ -0,0 +1,142 @@
+from . import conf, instrument, viewport
+from .qt import QtCore, QtGui, QtWidgets
+
+
+def create_canvas(board_image, parent=None):
+    if conf.BOARD_VIEW == 'label':
+        return LabelCanvas(board_image=board_image, parent=parent)
+
+    return BoardCanvas(board_image=board_image, parent=parent)
+
+
+class _CanvasMixin:
+    # Hit testing, scrolling and zooming shared by both board views, which
+    # define `CELL_CLICKED_SIGNAL`, `ZOOMED_SIGNAL`, `PAINTED_SIGNAL` and
+    # `update_rect()`
+    def _init_canvas(self, board_image):
+        self._board_image = board_image
+        self.frame_timer = instrument.FrameTimer(type(self).__name__)
+        self.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+
+    @property
+    def board_image(self):
+        return self._board_image
+
+    @board_image.setter
+    def board_image(self, board_image):
+        self._board_image = board_image
+        self.update_rect()
+
+    def mousePressEvent(self, event):
+        slot = self._board_image.pixel_to_slot(event.x(), event.y())
+        if slot is None:
+            return
+
+        self.CELL_CLICKED_SIGNAL.emit(slot, event.button())
+
+    def wheelEvent(self, event):
+        # Wheel scrolls (horizontally with shift), ctrl + wheel zooms
+        if not isinstance(self._board_image, viewport.ViewportImage):
+            return
+
+        steps = event.angleDelta().y() / 120
+        modifiers = event.modifiers()
+        if modifiers & QtCore.Qt.ControlModifier:
+            self._board_image.set_zoom(
+                self._board_image.cell_image_size + int(steps * 4)
+            )
+            self.update_rect()
+            self.ZOOMED_SIGNAL.emit()
+            return
+
+        distance = -steps * 3 * self._board_image.cell_image_size
+        if modifiers & QtCore.Qt.ShiftModifier:
+            self._board_image.scroll_by(distance, 0)
+        else:
+            self._board_image.scroll_by(0, distance)
+
+        if self._board_image.dirty_rect is not None:
+            self.update_rect(self._board_image.dirty_rect)
+
+    def _get_image_size(self):
+        return QtCore.QSize(self._board_image.width, self._board_image.height)
+
+
+class BoardCanvas(_CanvasMixin, QtWidgets.QWidget):
+    # Paints the board straight from the `qt_image` shared with the board
+    # image, repainting only the regions passed to `update_rect()`
+    CELL_CLICKED_SIGNAL = QtCore.Signal(tuple, object)
+    ZOOMED_SIGNAL = QtCore.Signal()
+    PAINTED_SIGNAL = QtCore.Signal()
+
+    def __init__(self, board_image, parent=None):
+        super().__init__(parent=parent)
+        self.setAttribute(QtCore.Qt.WA_OpaquePaintEvent)
+        self._init_canvas(board_image)
+        self.setFixedSize(self._get_image_size())
+
+    def update_rect(self, rect=None):
+        if self.size() != self._get_image_size():
+            self.setFixedSize(self._get_image_size())
+            rect = None
+
+        if rect is None:
+            return self.update()
+
+        rect = self._board_image.clip_rect(rect)
+        if rect is None:
+            return
+
+        left, top, right, bottom = rect
+        self.update(QtCore.QRect(left, top, right - left, bottom - top))
+
+    def paintEvent(self, event):
+        self.frame_timer.start()
+        painter = QtGui.QPainter(self)
+        rect = event.rect()
+        painter.drawImage(rect, self._board_image.qt_image, rect)
+        painter.end()
+        self.frame_timer.stop()
+        self.PAINTED_SIGNAL.emit()
+
+
+class LabelCanvas(_CanvasMixin, QtWidgets.QLabel):
+    # The board shown as a pixmap in a label, kept to compare frame times
+    # with `BoardCanvas`
+    CELL_CLICKED_SIGNAL = QtCore.Signal(tuple, object)
+    ZOOMED_SIGNAL = QtCore.Signal()
+    PAINTED_SIGNAL = QtCore.Signal()
+
+    def __init__(self, board_image, parent=None):
+        super().__init__(parent=parent)
+        self._init_canvas(board_image)
+        self._pixmap = QtGui.QPixmap.fromImage(self._board_image.qt_image)
+        self.setPixmap(self._pixmap)
+        self.setFixedSize(self._get_image_size())
+
+    def update_rect(self, rect=None):
+        if rect is not None:
+            rect = self._board_image.clip_rect(rect)
+            if rect is None:
+                return
+
+        self.frame_timer.start()
+        image_size = self._get_image_size()
+        if rect is None or self._pixmap.size() != image_size:
+            self._pixmap = QtGui.QPixmap.fromImage(self._board_image.qt_image)
+            self.setFixedSize(image_size)
+        else:
+            # Only push the changed region into the existing pixmap
+            left, top, right, bottom = rect
+            painter = QtGui.QPainter(self._pixmap)
+            painter.drawImage(
+                QtCore.QPoint(left, top),
+                self._board_image.qt_image,
+                QtCore.QRect(left, top, right - left, bottom - top),
+            )
+            painter.end()
+
+        self.setPixmap(self._pixmap)
+        self.repaint()
+        self.frame_timer.stop()
+        self.PAINTED_SIGNAL.emit()
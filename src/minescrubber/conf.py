@@ -1,5 +1,43 @@
 import os
+import warnings
 
 
 RESOURCE_DIR = os.path.join(os.path.dirname(__file__), 'resources')
 FONT_FILE_PATH = os.path.join(RESOURCE_DIR, 'DejaVuSans.ttf')
+
+# Board view, 'canvas' paints only the dirty regions of the board, 'label'
+# is the former pixmap in a label, kept to compare their frame times
+BOARD_VIEW = os.environ.get('MINESCRUBBER_BOARD_VIEW', 'canvas')
+
+# Print the timings of the board view, animations and clicks on exit
+FRAME_STATS = bool(os.environ.get('MINESCRUBBER_FRAME_STATS'))
+
+# Show the timings overlay on the board at startup, F3 toggles it
+HUD = bool(os.environ.get('MINESCRUBBER_HUD'))
+
+# Shade the covered cells by their mine probability at startup, F4 toggles it
+HEATMAP = bool(os.environ.get('MINESCRUBBER_HEATMAP'))
+
+# Only deal boards that can be solved without guessing, opened for the
+# player in the middle, F5 toggles it for the next game
+NO_GUESS = bool(os.environ.get('MINESCRUBBER_NO_GUESS'))
+
+# Seed of the session, fixes the mine layouts and animations of its games.
+# A seed that is not an integer is ignored rather than failing the import.
+SEED = os.environ.get('MINESCRUBBER_SEED')
+try:
+    SEED = None if SEED is None else int(SEED)
+except ValueError:
+    warnings.warn(
+        f'MINESCRUBBER_SEED should be an integer, ignoring {SEED!r}'
+    )
+    SEED = None
+
+# Append a replay of every game played to this file when set
+REPLAY_FILE = os.environ.get('MINESCRUBBER_REPLAY_FILE')
+
+# Open this replay file at startup and scrub through its last game
+PLAY_REPLAY_FILE = os.environ.get('MINESCRUBBER_PLAY_REPLAY_FILE')
+
+# Dump the timings as JSON to this file on exit when set
+INSTRUMENT_FILE = os.environ.get('MINESCRUBBER_INSTRUMENT_FILE')
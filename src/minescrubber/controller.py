@@ -1,12 +1,15 @@
-from minescrubber_core import abstract
+import functools
 
 
-from . import mainwindow
+from minescrubber_core import abstract
 
 
 class UI(abstract.UI):
-    def __init__(self):
-        self.main_window = mainwindow.MainWidget()
+    def __init__(self, seed=None):
+        # Imported here so that the headless modules of the package do not
+        # need Qt
+        from . import mainwindow
+        self.main_window = mainwindow.MainWidget(seed=seed)
 
     def init_board(self, board):
         self.main_window.init_board(board)
@@ -57,6 +60,7 @@ class Controller(abstract.Controller):
         sys.exit(app.exec_())
 
 
-def run():
+def run(seed=None):
+    # `seed` (or MINESCRUBBER_SEED) makes the session reproducible
     controller = Controller()
-    controller.run(ui_class=UI)
+    controller.run(ui_class=functools.partial(UI, seed=seed))
@@ -0,0 +1,411 @@
+import argparse
+import bisect
+import collections
+import io
+import math
+import multiprocessing
+import os
+import random
+import struct
+import sys
+import zlib
+
+
+from . import animation, imager, player, replay
+
+
+FORMATS = ('gif', 'apng')
+DEFAULT_FPS = 20
+
+# Pauses between moves are shortened to this many milliseconds and the last
+# frame is held for `TAIL_TIME`
+MAX_IDLE_TIME = 1000
+TAIL_TIME = 1000
+
+# The longest reveal animation. A time range is rendered from the last
+# frame before it that follows this long (and `QUIET_FRAMES` more frames)
+# without moves: every animation is over there, so the range is drawn as
+# if rendered from the beginning. Has to stay well under `MAX_IDLE_TIME`,
+# or no frame after the first move would ever be quiet and every range
+# would be rendered from the start of the game.
+QUIET_TIME = 1000 * max(
+    settings['time']
+    for settings in animation.CellAnimations.DEFAULT_ANIM_SETTINGS.values()
+)
+QUIET_FRAMES = 2
+
+# Same choice of animations as the main window
+RANDOM_METHOD_MAX_CELLS = 16
+
+FRAMES_PER_SEGMENT = 50
+
+# Segments handed to the pool per worker and not written yet, more would
+# only pile up frames in memory while the file gets written
+SEGMENTS_PER_WORKER = 2
+
+
+def get_move_times(game, max_idle_time=MAX_IDLE_TIME):
+    # Export time in milliseconds of every move
+    times = []
+    export_time = 0
+    last_time = 0
+    for move in game.moves:
+        export_time += min(move.time - last_time, max_idle_time)
+        last_time = move.time
+        times.append(export_time)
+
+    return times
+
+
+def get_nb_frames(game, fps=DEFAULT_FPS, max_idle_time=MAX_IDLE_TIME):
+    move_times = get_move_times(game, max_idle_time=max_idle_time)
+    duration = (move_times[-1] if move_times else 0) + TAIL_TIME
+    return int(math.ceil(duration * fps / 1000)) + 1
+
+
+def render_frames(
+        game, first_frame, last_frame, fps=DEFAULT_FPS,
+        max_idle_time=MAX_IDLE_TIME, backend='pil',
+):
+    # Yields the board images of frames `first_frame` to `last_frame`
+    # (excluded). Moves are played with `player.ReplayPlayer` and revealed
+    # with the same animations as the game, on a clock that ticks once per
+    # frame. The animation choices are seeded by the game seed and the move,
+    # so any time range renders the same as a full render.
+    interval = 1000 / fps
+    move_times = get_move_times(game, max_idle_time=max_idle_time)
+    replay_player = player.ReplayPlayer(game)
+
+    warmup_frame = _get_quiet_frame(move_times, first_frame, interval)
+    move_index = bisect.bisect_left(move_times, warmup_frame * interval)
+    board = replay_player.seek(move_index)
+    board_image = imager.BoardImage(board, backend=backend)
+    animations = animation.CellAnimations(board_image)
+    animated_slots = []
+
+    for frame in range(warmup_frame, last_frame):
+        frame_time = frame * interval
+        while (
+                move_index < len(move_times)
+                and move_times[move_index] <= frame_time
+        ):
+            move_index += 1
+            board = replay_player.seek(move_index)
+            board_image.update_image(board)
+            if board.last_swept:
+                animated_slots.extend(board.last_swept)
+                _reveal(animations, board, game.seed, move_index)
+
+        if animations.is_running:
+            animations.advance(interval)
+
+        if animated_slots and not animations.is_running:
+            # The animations painted over the swept cells
+            board_image.invalidate(animated_slots)
+            board_image.update_image(board)
+            animated_slots = []
+
+        if frame >= first_frame:
+            yield board_image.image
+
+
+def get_warmup_frame(
+        game, frame, fps=DEFAULT_FPS, max_idle_time=MAX_IDLE_TIME,
+):
+    # Frame `render_frames()` starts rendering from to draw `frame`
+    return _get_quiet_frame(
+        get_move_times(game, max_idle_time=max_idle_time),
+        frame,
+        1000 / fps,
+    )
+
+
+def _get_quiet_frame(move_times, frame, interval):
+    # Latest frame at or before `frame` with no move in the `QUIET_TIME`
+    # and `QUIET_FRAMES` before it, the moves at the frame itself are
+    # played by the render loop
+    quiet_time = QUIET_TIME + QUIET_FRAMES * interval
+    while frame > 0:
+        frame_time = frame * interval
+        position = bisect.bisect_left(move_times, frame_time)
+        if (
+                not position
+                or move_times[position - 1] <= frame_time - quiet_time
+        ):
+            return frame
+
+        # Go back to the move, its own frame might be a quiet one
+        frame = min(
+            frame - 1,
+            int(math.ceil(move_times[position - 1] / interval)),
+        )
+
+    return 0
+
+
+def _reveal(animations, board, seed, move_index):
+    rng = random.Random(f'{seed}-{move_index}')
+    cells = [board.get_cell(slot) for slot in board.last_swept]
+    if len(cells) <= RANDOM_METHOD_MAX_CELLS:
+        animations.method = rng.choice(list(animation.METHOD))
+    else:
+        animations.method = animation.CHEAPEST_METHOD
+
+    animations.rng = rng
+    animations.reveal_cells(
+        cells=cells,
+        fill=animations.board_image.UNCOVERED_COLOR,
+        fill_from=animations.board_image.COVERED_COLOR,
+    )
+
+
+def encode_apng_frame(image):
+    # Deflated scanlines of the frame, each row with filter type 0
+    image = image.convert('RGBA')
+    data = image.tobytes()
+    stride = image.width * 4
+    raw = b''.join(
+        b'\x00' + data[row * stride:(row + 1) * stride]
+        for row in range(image.height)
+    )
+    return zlib.compress(raw, 6)
+
+
+def encode_gif_frame(image):
+    # The colour table and the LZW image data of the frame, taken out of a
+    # single frame GIF written by Pillow
+    buffer = io.BytesIO()
+    image.convert('RGB').quantize(colors=256).save(
+        buffer, 'GIF', interlace=False,
+    )
+    data = buffer.getvalue()
+
+    flags = data[10]
+    offset = 13
+    palette = b''
+    if flags & 0x80:
+        palette_size = 3 * (2 << (flags & 7))
+        palette = data[offset:offset + palette_size]
+        offset += palette_size
+
+    while data[offset] != 0x3b:
+        if data[offset] == 0x21:
+            offset = _skip_sub_blocks(data, offset + 2)
+            continue
+
+        # Image descriptor, Pillow writes a global colour table only
+        image_start = offset + 10
+        image_end = _skip_sub_blocks(data, image_start + 1)
+        return palette, data[image_start:image_end]
+
+    raise ValueError('No image in the GIF written by Pillow')
+
+
+def _skip_sub_blocks(data, offset):
+    while data[offset]:
+        offset += data[offset] + 1
+
+    return offset + 1
+
+
+class ApngWriter:
+    # Writes the frames of an animated PNG as they come
+    def __init__(self, f, width, height, nb_frames, delay):
+        self._f = f
+        self._width = width
+        self._height = height
+        self._delay = int(round(delay))
+        self._sequence = 0
+        self._nb_frames = 0
+
+        f.write(b'\x89PNG\r\n\x1a\n')
+        self._write_chunk(
+            b'IHDR',
+            struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0),
+        )
+        self._write_chunk(b'acTL', struct.pack('>II', nb_frames, 0))
+
+    def write_frame(self, data):
+        self._write_chunk(
+            b'fcTL',
+            struct.pack(
+                '>IIIIIHHBB',
+                self._next_sequence(), self._width, self._height, 0, 0,
+                self._delay, 1000, 0, 0,
+            ),
+        )
+        if self._nb_frames == 0:
+            self._write_chunk(b'IDAT', data)
+        else:
+            self._write_chunk(
+                b'fdAT',
+                struct.pack('>I', self._next_sequence()) + data,
+            )
+        self._nb_frames += 1
+
+    def close(self):
+        self._write_chunk(b'IEND', b'')
+
+    def _next_sequence(self):
+        sequence = self._sequence
+        self._sequence += 1
+        return sequence
+
+    def _write_chunk(self, chunk_type, data):
+        self._f.write(struct.pack('>I', len(data)))
+        self._f.write(chunk_type)
+        self._f.write(data)
+        self._f.write(
+            struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff)
+        )
+
+
+class GifWriter:
+    # Writes the frames of an animated GIF as they come, every frame with
+    # its own colour table
+    def __init__(self, f, width, height, nb_frames, delay):
+        self._f = f
+        self._width = width
+        self._height = height
+        self._delay = int(round(delay / 10))
+
+        f.write(b'GIF89a')
+        f.write(struct.pack('<HHBBB', width, height, 0, 0, 0))
+
+        # Loop forever
+        f.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+
+    def write_frame(self, data):
+        palette, image_data = data
+        size_bits = max(0, (len(palette) // 3).bit_length() - 2)
+        self._f.write(
+            struct.pack('<BBBBHBB', 0x21, 0xf9, 4, 0, self._delay, 0, 0)
+        )
+        self._f.write(
+            struct.pack(
+                '<BHHHHB',
+                0x2c, 0, 0, self._width, self._height, 0x80 | size_bits,
+            )
+        )
+        self._f.write(palette)
+        self._f.write(image_data)
+
+    def close(self):
+        self._f.write(b'\x3b')
+
+
+WRITERS = {
+    'apng': (ApngWriter, encode_apng_frame),
+    'gif': (GifWriter, encode_gif_frame),
+}
+
+
+def render_segment(args):
+    # Runs in a worker process, renders and encodes a range of frames
+    game, first_frame, last_frame, fps, max_idle_time, file_format = args
+    _, encode_frame = WRITERS[file_format]
+    return [
+        encode_frame(image)
+        for image in render_frames(
+            game, first_frame, last_frame,
+            fps=fps,
+            max_idle_time=max_idle_time,
+        )
+    ]
+
+
+def export_game(
+        game, file_path, file_format=None, fps=DEFAULT_FPS,
+        max_idle_time=MAX_IDLE_TIME, nb_workers=None,
+        frames_per_segment=FRAMES_PER_SEGMENT,
+):
+    # Renders `game` to an animated GIF or PNG. The frames are split in
+    # segments rendered and encoded by a pool of processes. A segment is
+    # only handed to the pool once fewer than `SEGMENTS_PER_WORKER` per
+    # worker wait to be written, and they are written in order as soon as
+    # they are done, so only the encoded frames of the segments in flight
+    # are ever held in memory.
+    file_format = file_format or get_format(file_path)
+    writer_class, _ = WRITERS[file_format]
+    nb_frames = get_nb_frames(game, fps=fps, max_idle_time=max_idle_time)
+    width, height = imager.BoardImage(player.ReplayBoard(game)).image.size
+
+    tasks = [
+        (
+            game, first_frame,
+            min(nb_frames, first_frame + frames_per_segment),
+            fps, max_idle_time, file_format,
+        )
+        for first_frame in range(0, nb_frames, frames_per_segment)
+    ]
+    nb_workers = nb_workers or multiprocessing.cpu_count()
+    max_pending = SEGMENTS_PER_WORKER * nb_workers
+    with open(file_path, 'wb') as f, multiprocessing.Pool(nb_workers) as pool:
+        writer = writer_class(f, width, height, nb_frames, 1000 / fps)
+        pending = collections.deque()
+        for task in tasks:
+            if len(pending) == max_pending:
+                _write_frames(writer, pending.popleft().get())
+            pending.append(pool.apply_async(render_segment, (task,)))
+
+        while pending:
+            _write_frames(writer, pending.popleft().get())
+        writer.close()
+
+    return nb_frames
+
+
+def _write_frames(writer, frames):
+    for frame in frames:
+        writer.write_frame(frame)
+
+
+def get_format(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.gif':
+        return 'gif'
+    elif extension in ('.png', '.apng'):
+        return 'apng'
+
+    error_msg = (
+        f'Cannot tell the format of {file_path}, '
+        f'should be one of {FORMATS}!'
+    )
+    raise ValueError(error_msg)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Export a recorded game to an animated GIF or PNG',
+    )
+    parser.add_argument('replay_file')
+    parser.add_argument('output_file')
+    parser.add_argument(
+        '--game', type=int, default=-1,
+        help='index of the game in the replay file, the last by default',
+    )
+    parser.add_argument('--format', choices=FORMATS)
+    parser.add_argument('--fps', type=int, default=DEFAULT_FPS)
+    parser.add_argument('--max-idle', type=int, default=MAX_IDLE_TIME)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(argv)
+
+    games = list(replay.read_games(args.replay_file))
+    if not games:
+        print(f'No game recorded in {args.replay_file}')
+        return 1
+
+    nb_frames = export_game(
+        games[args.game],
+        args.output_file,
+        file_format=args.format,
+        fps=args.fps,
+        max_idle_time=args.max_idle,
+        nb_workers=args.workers,
+    )
+    print(f'Wrote {nb_frames} frames to {args.output_file}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
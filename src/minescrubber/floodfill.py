@@ -0,0 +1,74 @@
+import itertools
+
+
+from . import solver
+
+
+class SweptSlots:
+    # `last_swept` of the boards that sweep one ring at a time. Holds the
+    # rings taken so far as they came, reads like the list of their slots
+    # without ever being copied into one.
+    def __init__(self):
+        self._layers = []
+        self._len = 0
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._layers)
+
+    def __len__(self):
+        return self._len
+
+    def __eq__(self, other):
+        try:
+            if len(other) != self._len:
+                return False
+        except TypeError:
+            return NotImplemented
+
+        return all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self)!r})'
+
+    @property
+    def layers(self):
+        return list(self._layers)
+
+    def add_layer(self, layer):
+        self._layers.append(layer)
+        self._len += len(layer)
+
+
+def sweep_layers(slot, width, height, uncover):
+    # Breadth first flood fill from `slot`, yields the slots it uncovers one
+    # ring at a time: the slot itself, then the cells around it and so on
+    # while empty cells keep the region open. `uncover(slot)` uncovers the
+    # cell if it can be (covered, not flagged) and returns its hint, None
+    # otherwise.
+    #
+    # A ring is only computed once the previous one has been taken, so a
+    # caller can show the first rings of a huge opening before the rest of
+    # it is known. No recursion and no list of the whole region.
+    hint = uncover(slot)
+    if hint is None:
+        return
+
+    layer = [slot]
+    empty_slots = [slot] if hint == 0 else []
+    while layer:
+        yield layer
+
+        next_layer = []
+        next_empty_slots = []
+        for empty_slot in empty_slots:
+            for neighbour in solver.get_neighbours(empty_slot, width, height):
+                hint = uncover(neighbour)
+                if hint is None:
+                    continue
+
+                next_layer.append(neighbour)
+                if hint == 0:
+                    next_empty_slots.append(neighbour)
+
+        layer = next_layer
+        empty_slots = next_empty_slots
@@ -0,0 +1,234 @@
+import os
+import random
+
+
+from minescrubber_core import abstract
+
+
+from . import animation, boardgen, seeding, replay
+
+
+class Signal:
+    # Stand-in for a Qt signal, the core only needs `connect()`
+    def __init__(self):
+        self._callbacks = []
+
+    def connect(self, callback):
+        self._callbacks.append(callback)
+
+    def emit(self, *args):
+        for callback in self._callbacks:
+            callback(*args)
+
+
+class HeadlessUI(abstract.UI):
+    def __init__(self):
+        self.board = None
+        self.is_game_over = False
+        self.is_game_solved = False
+        self.seed = None
+        self._new_game_signal = Signal()
+        self._cell_selected_signal = Signal()
+        self._cell_flagged_signal = Signal()
+
+    def init_board(self, board):
+        self.board = board
+        self.is_game_over = False
+        self.is_game_solved = False
+
+    def refresh(self, board, init_image=True):
+        self.board = board
+
+    def game_over(self, board):
+        self.board = board
+        self.is_game_over = True
+
+    def game_solved(self, board):
+        self.board = board
+        self.is_game_solved = True
+
+    def run(self):
+        pass
+
+    @property
+    def new_game_signal(self):
+        return self._new_game_signal
+
+    @property
+    def cell_selected_signal(self):
+        return self._cell_selected_signal
+
+    @property
+    def cell_flagged_signal(self):
+        return self._cell_flagged_signal
+
+    @property
+    def wiring_method_name(self):
+        return 'connect'
+
+    def new_game(self, width, height, nb_mines, seed=None):
+        # A seed fixes the mine layout
+        self.is_game_over = False
+        self.is_game_solved = False
+        self.seed = seed
+        seeding.seed_board(seed)
+        self._new_game_signal.emit((width, height, nb_mines))
+        return self.board
+
+    def select(self, slot):
+        self._cell_selected_signal.emit(slot)
+        return self.board
+
+    def flag(self, slot):
+        self._cell_flagged_signal.emit(slot)
+        return self.board
+
+
+class GeneratedUI:
+    # Same game interface as `HeadlessUI` on `boardgen.GeneratedBoard`s,
+    # for the board sizes the core takes too long to set up. Moves are
+    # played on the board itself, without the core.
+    def __init__(self):
+        self.board = None
+        self.is_game_over = False
+        self.is_game_solved = False
+        self.seed = None
+
+    def new_game(self, width, height, nb_mines, seed=None):
+        self.is_game_over = False
+        self.is_game_solved = False
+        self.seed = seed
+        self.board = boardgen.GeneratedBoard(
+            width, height, nb_mines, seed=seed,
+        )
+        return self.board
+
+    def select(self, slot):
+        for _ in self.sweep(slot):
+            pass
+
+        return self.board
+
+    def sweep(self, slot):
+        # Same as `select()`, yields the rings the select uncovers as the
+        # flood fill gets to them
+        if self.is_game_over or self.is_game_solved:
+            return
+
+        yield from self.board.sweep(slot)
+        cell = self.board.get_cell(slot)
+        if cell.has_mine and cell.is_uncovered:
+            self.is_game_over = True
+        elif self.board.is_solved:
+            self.is_game_solved = True
+
+    def flag(self, slot):
+        if not (self.is_game_over or self.is_game_solved):
+            self.board.flag(slot)
+
+        return self.board
+
+
+class HeadlessController(abstract.Controller):
+    def pre_callback(self):
+        pass
+
+    def post_callback(self):
+        pass
+
+
+def create_ui(generated=False):
+    # `generated` plays on `boardgen.GeneratedBoard`s instead of the boards
+    # of the core
+    if generated:
+        return GeneratedUI()
+
+    ui = HeadlessUI()
+    controller = HeadlessController()
+    controller.run(ui_class=lambda: ui)
+    return ui
+
+
+def record(ui, file_path):
+    # Records the games played on a headless UI from now on, returns the
+    # `replay.ReplayRecorder` to close once done. Connected after the core,
+    # so the board already has each move when it gets recorded.
+    recorder = replay.ReplayRecorder(replay.ReplayWriter(file_path))
+
+    def on_move(record_move, slot):
+        record_move(slot)
+        recorder.update(
+            ui.board,
+            is_done=ui.is_game_over or ui.is_game_solved,
+        )
+
+    ui.new_game_signal.connect(
+        lambda args: recorder.new_game(*args, seed=ui.seed)
+    )
+    ui.cell_selected_signal.connect(
+        lambda slot: on_move(recorder.select, slot)
+    )
+    ui.cell_flagged_signal.connect(
+        lambda slot: on_move(recorder.flag, slot)
+    )
+    return recorder
+
+
+def create_board(width, height, nb_mines, seed=None):
+    return create_ui().new_game(width, height, nb_mines, seed=seed)
+
+
+def use_offscreen_platform():
+    # Lets Qt widgets be created without a display, has to be called before
+    # the QApplication gets created
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def create_application():
+    import sys
+    from PySide2 import QtWidgets
+    use_offscreen_platform()
+    return (
+        QtWidgets.QApplication.instance() or
+        QtWidgets.QApplication(sys.argv)
+    )
+
+
+def play_reveal(
+        board_image, cells, method=animation.METHOD.FADE,
+        fill=None, fill_from=None, time=None, fps=None, on_frame=None,
+        adaptive=False, origin=None, frame_budget=None, seed=None,
+):
+    # Plays a reveal animation on the board image with pure PIL, jumping a
+    # simulated clock from one due frame to the next instead of waiting on
+    # a Qt timer. `on_frame` gets the dirty rect of every frame drawn.
+    # Returns the number of frames drawn.
+    animations = animation.CellAnimations(
+        board_image,
+        method=method,
+        adaptive=adaptive,
+        rng=None if seed is None else random.Random(seed),
+    )
+    if frame_budget is not None:
+        animations.frame_budget = frame_budget
+
+    animations.reveal_cells(
+        cells=cells,
+        fill=fill or board_image.UNCOVERED_COLOR,
+        fill_from=fill_from or board_image.COVERED_COLOR,
+        time=time,
+        fps=fps,
+        origin=origin,
+    )
+
+    nb_frames = 0
+    while animations.is_running:
+        dirty_rect = animations.advance(animations.interval)
+        if dirty_rect is None:
+            continue
+
+        nb_frames += 1
+        if on_frame is not None:
+            on_frame(dirty_rect)
+
+    return nb_frames
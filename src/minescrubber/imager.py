@@ -1,10 +1,16 @@
+import collections
 import enum
+import functools
 
 
-from PIL import Image, ImageFont, ImageDraw, ImageQt
+from PIL import Image, ImageFont, ImageDraw
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
-from . import conf
+from . import boardstate, conf
 
 
 @enum.unique
@@ -19,6 +25,7 @@ class CELL_DRAW_METHOD(enum.Enum):
     mine = 1
     hint = 2
     solved = 3
+    heat = 4
 
 
 class COLOR:
@@ -39,29 +46,291 @@ class COLOR:
     dark_green = (0, 100, 0)
 
 
+@functools.lru_cache(maxsize=None)
+def _get_font(size):
+    return ImageFont.truetype(conf.FONT_FILE_PATH, size=size)
+
+
+def _get_text_size(font, text):
+    # `getsize()` was removed from newer Pillow releases
+    if hasattr(font, 'getsize'):
+        return font.getsize(text)
+
+    _, _, width, height = font.getbbox(text)
+    return width, height
+
+
+def union_rect(rect, other):
+    # Bounding box of two (left, top, right, bottom) boxes, either may be None
+    if rect is None:
+        return other
+
+    if other is None:
+        return rect
+
+    return (
+        min(rect[0], other[0]),
+        min(rect[1], other[1]),
+        max(rect[2], other[2]),
+        max(rect[3], other[3]),
+    )
+
+
+class GlyphAtlas:
+    # Holds ready-made RGBA tiles for every overlay glyph (hints, flags,
+    # skulls and crossed mines) so drawing a cell overlay is a single
+    # `alpha_composite()` instead of loading a font and rasterizing text.
+    # Tiles are grouped by cell image size and only the most recently used
+    # sizes are kept around.
+    MAX_SIZES = 4
+
+    def __init__(self, max_sizes=None):
+        self._max_sizes = max_sizes or self.MAX_SIZES
+        self._tiles_by_size = collections.OrderedDict()
+
+    def get_tile(
+            self, cell_image_size, draw_method, hint=None, fill=None,
+            edge_width=1,
+    ):
+        tiles = self._get_tiles(cell_image_size)
+        if draw_method != CELL_DRAW_METHOD.hint:
+            hint = None
+
+        key = (draw_method, hint, fill, edge_width)
+        tile = tiles.get(key)
+        if tile is None:
+            tile = self._create_tile(cell_image_size, *key)
+            tiles[key] = tile
+
+        return tile
+
+    def get_cell_tile(
+            self, cell_image, cell_style, draw_method=None, hint=None,
+            fill=None, edge_width=1,
+    ):
+        # The cell image with the glyph already composited on it, which is
+        # exactly what drawing the cell and its overlay produces
+        cell_image_size = cell_image.width
+        glyph = None
+        if draw_method is not None:
+            glyph = self.get_tile(
+                cell_image_size=cell_image_size,
+                draw_method=draw_method,
+                hint=hint,
+                fill=fill,
+                edge_width=edge_width,
+            )
+
+        tiles = self._get_tiles(cell_image_size)
+        if draw_method != CELL_DRAW_METHOD.hint:
+            hint = None
+
+        key = (
+            cell_style, cell_image.getpixel((0, 0)), draw_method, hint, fill,
+            edge_width,
+        )
+        tile = tiles.get(key)
+        if tile is None:
+            tile = cell_image.copy()
+            if glyph is not None:
+                tile.alpha_composite(glyph)
+            tiles[key] = tile
+
+        return tile
+
+    def clear(self):
+        self._tiles_by_size.clear()
+
+    def _get_tiles(self, cell_image_size):
+        tiles = self._tiles_by_size.get(cell_image_size)
+        if tiles is None:
+            tiles = {}
+            self._tiles_by_size[cell_image_size] = tiles
+            while len(self._tiles_by_size) > self._max_sizes:
+                self._tiles_by_size.popitem(last=False)
+        else:
+            self._tiles_by_size.move_to_end(cell_image_size)
+
+        return tiles
+
+    def _create_tile(
+            self, cell_image_size, draw_method, hint, fill, edge_width,
+    ):
+        if draw_method == CELL_DRAW_METHOD.heat:
+            # A translucent wash, `fill` carries the alpha
+            return Image.new(
+                'RGBA',
+                (cell_image_size, cell_image_size),
+                color=fill,
+            )
+
+        cell_text = None
+        font_ratio = None
+        height_adjustment = None
+        draw_cross = False
+        if draw_method == CELL_DRAW_METHOD.mine:
+            cell_text = '\U00002620'  # unicode point for skull
+            font_ratio = 1.3
+            height_adjustment = -4
+        elif draw_method == CELL_DRAW_METHOD.hint:
+            cell_text = str(hint)
+            font_ratio = 2.5
+            height_adjustment = 0
+        elif draw_method == CELL_DRAW_METHOD.flag:
+            cell_text = '\U00002690'  # unicode point for flag
+            font_ratio = 1.3
+            height_adjustment = -4
+        elif draw_method == CELL_DRAW_METHOD.solved:
+            cell_text = '\U00002620'  # unicode point for skull
+            font_ratio = 1.3
+            height_adjustment = -4
+            draw_cross = True
+        else:
+            error_msg = (
+                f"Cannot handle unknown `draw_method={draw_method}`"
+            )
+            raise ValueError(error_msg)
+
+        tile = Image.new(
+            'RGBA',
+            (cell_image_size, cell_image_size),
+            color=(0, 0, 0, 0),
+        )
+
+        font = _get_font(int(cell_image_size / font_ratio))
+        font_width, font_height = _get_text_size(font, cell_text)
+        draw_context = ImageDraw.Draw(tile)
+        draw_context.text(
+            (
+                (cell_image_size / 2) - (font_width / 2),
+                (
+                    (cell_image_size / 2)
+                    - (font_height / 2)
+                    + height_adjustment
+                ),
+            ),
+            cell_text,
+            font=font,
+            fill=fill,
+            align="center",
+        )
+
+        if draw_cross:
+            inset_ratio = 0.2
+            incr_small = int(cell_image_size * inset_ratio)
+            incr_large = int(cell_image_size * (1 - inset_ratio))
+
+            draw_context.line(
+                [(incr_small, incr_small), (incr_large, incr_large)],
+                fill=COLOR.gray_60,
+                width=edge_width,
+                joint=None,
+            )
+            draw_context.line(
+                [(incr_small, incr_large), (incr_large, incr_small)],
+                fill=COLOR.gray_60,
+                width=edge_width,
+                joint=None,
+            )
+
+        return tile
+
+
 class BoardImage:
     EDGE_WIDTH_CONTROL = 12  # Lesser produces thicker edges (12 is ideal)
+    GLYPH_ATLAS = GlyphAtlas()
     COVERED_COLOR = COLOR.teal
     UNCOVERED_COLOR = COLOR.gray_200
+    BACKENDS = ('pil', 'numpy')
+    MAX_IMAGE_SIZE = 432
+    MAX_CELL_IMAGE_SIZE = 48
+
+    # The mine probability of a covered cell is shown as one of
+    # `HEATMAP_LEVELS` shades of `HEATMAP_COLOR`
+    HEATMAP_COLOR = COLOR.red
+    HEATMAP_LEVELS = 8
+    HEATMAP_MAX_ALPHA = 200
+
+    def __init__(self, board, backend='pil'):
+        if backend not in self.BACKENDS:
+            error_msg = (
+                f'Unknown backend {backend}, '
+                f'should be one of {self.BACKENDS}!'
+            )
+            raise ValueError(error_msg)
+
+        if backend == 'numpy' and numpy is None:
+            error_msg = 'The numpy backend needs numpy to be installed!'
+            raise RuntimeError(error_msg)
 
-    def __init__(self, board):
+        self._backend = backend
+        self._buffer = None
+        self._qt_image = None
+        self._cell_states = {}
+        self._dirty_rect = None
+        self._is_solved = False
+        self._heatmap = None
+        self._state = None
         self.init_image(board=board)
 
     @property
     def qt_image(self):
-        return ImageQt.ImageQt(self._board_image)
+        # A QImage over the same memory as the PIL image, so whatever gets
+        # drawn on `image` is visible here without any conversion or copy
+        if self._qt_image is None:
+            from .qt import QtGui
+            self._qt_image = QtGui.QImage(
+                self._buffer,
+                self.width,
+                self.height,
+                self.width * 4,
+                QtGui.QImage.Format_RGBA8888,
+            )
+
+        return self._qt_image
+
+    @property
+    def dirty_rect(self):
+        # Box (left, top, right, bottom) of the pixels changed by the last
+        # `init_image()` or `update_image()` call, None if nothing changed
+        return self._dirty_rect
 
     @property
     def board(self):
         return self._board
 
+    @property
+    def state(self):
+        # `boardstate.BoardState` the cells are drawn from
+        return self._state
+
+    @property
+    def heatmap(self):
+        # Mine probability per slot (e.g. a `probability.ProbabilityMap`)
+        # drawn over the covered cells, None to hide it. Cells whose shade
+        # changed are repainted by the next `update_image()`.
+        return self._heatmap
+
+    @heatmap.setter
+    def heatmap(self, heatmap):
+        self._heatmap = heatmap
+
+    @property
+    def backend(self):
+        return self._backend
+
     @property
     def image(self):
         return self._board_image
 
     @image.setter
     def image(self, val):
-        self._board_image = val
+        # Copy into the shared buffer rather than replacing the image so that
+        # `qt_image` and existing draw contexts keep seeing the board
+        if val.size != self._board_image.size:
+            self._board_image = self._create_board_image(size=val.size)
+
+        self._board_image.paste(val.convert('RGBA'), (0, 0))
 
     @property
     def width(self):
@@ -73,17 +342,18 @@ class BoardImage:
 
     @property
     def is_solved(self):
-        return self._board.mine_slots == sorted(
-            self._board.covered_slots +
-            self._board.flagged_slots
-        )
+        # Evaluated once per `draw()`/`update_image()`, not per cell
+        return self._is_solved
+
+    def _compute_is_solved(self):
+        # Solved when every covered (or flagged) cell has a mine and every
+        # mine is still covered
+        return self._state.is_solved
 
     def init_image(self, board):
         self._board = board
-        self.cell_image_size = min(
-            min(48, int(432 / self._board.width)),
-            min(48, int(432 / self._board.height))
-        )
+        self._state = self._create_state(board)
+        self.cell_image_size = self._get_cell_image_size(board)
 
         self._edge_width = int(self.cell_image_size / self.EDGE_WIDTH_CONTROL)
 
@@ -94,9 +364,90 @@ class BoardImage:
         self._cell_image_uncovered = self._create_cell_image(
             cell_state=CELL_STYLE.uncovered
         )
+        self._cell_states = {}
         self._board_image = self._create_board_image()
         self.draw()
 
+    def _get_cell_image_size(self, board):
+        # Largest cell size fitting the whole board in `MAX_IMAGE_SIZE`
+        return min(
+            min(
+                self.MAX_CELL_IMAGE_SIZE,
+                int(self.MAX_IMAGE_SIZE / board.width),
+            ),
+            min(
+                self.MAX_CELL_IMAGE_SIZE,
+                int(self.MAX_IMAGE_SIZE / board.height),
+            ),
+        )
+
+    def update_image(self, board, slots=None):
+        # Repaint only the cells whose state changed since they were last
+        # drawn, falling back to a full `init_image()` when the board
+        # geometry changed. `slots` are the only slots the move changed
+        # (e.g. the swept and flagged ones), the whole board is looked at
+        # when they are not known.
+        if (
+                board.width != self._board.width
+                or board.height != self._board.height
+        ):
+            return self.init_image(board=board)
+
+        self._board = board
+        changed_slots = self._sync_state(board, slots)
+        was_solved = self._is_solved
+        self._is_solved = self._compute_is_solved()
+        if changed_slots is None or self._is_solved != was_solved:
+            changed_slots = self._get_slots()
+
+        dirty_rect = None
+        slots_to_draw = []
+        for slot in changed_slots:
+            cell_state = self._get_cell_state(slot)
+            if self._cell_states.get(slot) == cell_state:
+                continue
+
+            slots_to_draw.append(slot)
+            dirty_rect = union_rect(dirty_rect, self.get_cell_rect(slot))
+
+        self._draw_cells(slots_to_draw)
+        self._dirty_rect = dirty_rect
+
+    def _create_state(self, board):
+        # Boards keeping their own state (`boardgen.GeneratedBoard`) are
+        # drawn from it as is
+        state = getattr(board, 'state', None)
+        if state is not None:
+            return state
+
+        return boardstate.BoardState.from_board(board)
+
+    def _sync_state(self, board, slots):
+        # Returns the slots whose state changed, None for all of them
+        state = getattr(board, 'state', None)
+        if state is not None:
+            self._state = state
+            return slots
+
+        if slots is None:
+            self._state.sync(board)
+            return
+
+        return self._state.sync(board, slots=slots)
+
+    def _get_slots(self):
+        return [
+            (x, y)
+            for y in range(self._board.height)
+            for x in range(self._board.width)
+        ]
+
+    def invalidate(self, slots):
+        # Forget what was drawn for `slots` (e.g. after an animation painted
+        # over them) so that the next `update_image()` repaints them
+        for slot in slots:
+            self._cell_states.pop(slot, None)
+
     def pixel_to_slot(self, x, y):
         quotient_x, remainder_x = divmod(
             x,
@@ -116,28 +467,171 @@ class BoardImage:
         x, y = slot
         return self._get_cell_coordinate(x), self._get_cell_coordinate(y)
 
+    def get_cell_rect(self, slot):
+        x, y = self.slot_to_pixel(slot)
+        return x, y, x + self.cell_image_size, y + self.cell_image_size
+
+    def clip_rect(self, rect):
+        # Part of `rect` inside the image, None if it lies outside
+        if rect is None:
+            return
+
+        left, top, right, bottom = rect
+        left, top = max(0, left), max(0, top)
+        right, bottom = min(self.width, right), min(self.height, bottom)
+        if left >= right or top >= bottom:
+            return
+
+        return left, top, right, bottom
+
     def show(self):
         self._board_image.show()
 
     def draw(self):
-        for y in range(self._board.height):
-            for x in range(self._board.width):
-                self._draw_cell(x, y)
+        self._is_solved = self._compute_is_solved()
+        self._draw_cells(self._get_slots())
+        self._dirty_rect = (0, 0, self.width, self.height)
+
+    def _draw_cells(self, slots):
+        if self._backend == 'numpy':
+            return self._draw_cells_numpy(slots)
+
+        for x, y in slots:
+            self._draw_cell(x, y)
+
+    def _draw_cells_numpy(self, slots):
+        # Same output as `_draw_cell()` for every slot, but the cells are
+        # grouped by what they look like and each group is stamped into the
+        # board buffer with a single vectorized assignment
+        if not slots:
+            return
+
+        size = self.cell_image_size
+        cell_grid = self._get_cell_grid()
+
+        styles = {
+            CELL_STYLE.covered: ([], []),
+            CELL_STYLE.uncovered: ([], []),
+        }
+        glyphs = {}
+        for slot in slots:
+            self._cell_states[slot] = self._get_cell_state(slot)
+            cell_style = (
+                CELL_STYLE.covered
+                if self._state.is_covered(slot)
+                else CELL_STYLE.uncovered
+            )
+            x, y = slot
+
+            draw_method = self._get_draw_method(slot)
+            if draw_method is None:
+                xs, ys = styles[cell_style]
+            else:
+                hint = self._get_glyph_hint(slot, draw_method)
+                key = (cell_style, draw_method, hint)
+                xs, ys = glyphs.setdefault(key, ([], []))
+
+            xs.append(x)
+            ys.append(y)
+
+        # Broadcast the plain covered/uncovered colours
+        for cell_style, (xs, ys) in styles.items():
+            if not xs:
+                continue
+
+            cell_grid[ys, :size, xs, :size] = numpy.asarray(
+                self._get_cell_image(cell_style).getpixel((0, 0)),
+                dtype=numpy.uint8,
+            )
+
+        # Stamp the cells carrying a glyph
+        for (cell_style, draw_method, hint), (xs, ys) in glyphs.items():
+            tile = self.GLYPH_ATLAS.get_cell_tile(
+                cell_image=self._get_cell_image(cell_style),
+                cell_style=cell_style,
+                draw_method=draw_method,
+                hint=hint,
+                fill=self._get_overlay_fill(draw_method, hint),
+                edge_width=self._edge_width,
+            )
+            cell_grid[ys, :size, xs, :size] = numpy.asarray(tile)
+
+    def _get_cell_grid(self):
+        # A (rows, cell, columns, cell, RGBA) view over the board buffer so
+        # that `grid[y, :size, x, :size]` addresses the pixels of cell (x, y)
+        pitch = self.cell_image_size + self._edge_width
+        pixels = numpy.frombuffer(self._buffer, dtype=numpy.uint8).reshape(
+            self.height, self.width, 4,
+        )
+        cells = pixels[
+            self._edge_width:self._edge_width + pitch * self._board.height,
+            self._edge_width:self._edge_width + pitch * self._board.width,
+        ]
+        return cells.reshape(
+            self._board.height, pitch, self._board.width, pitch, 4,
+        )
+
+    def _get_cell_image(self, cell_style):
+        if cell_style == CELL_STYLE.covered:
+            return self._cell_image_covered
+
+        return self._cell_image_uncovered
 
     def _draw_cell(self, x, y):
         slot = (x, y)
-        cell = self._board.data[slot]
+        self._cell_states[slot] = self._get_cell_state(slot)
         cell_image_to_use = (
-            self._cell_image_uncovered
-            if cell.is_uncovered
-            else self._cell_image_covered
+            self._cell_image_covered
+            if self._state.is_covered(slot)
+            else self._cell_image_uncovered
         )
 
         x_coord = self._get_cell_coordinate(x)
         y_coord = self._get_cell_coordinate(y)
 
         self._board_image.paste(cell_image_to_use, (x_coord, y_coord))
-        self. _draw_overlay(x_coord, y_coord, cell)
+        self. _draw_overlay(x_coord, y_coord, slot)
+
+    def _get_cell_state(self, slot):
+        # Everything `_draw_overlay()` looks at when drawing the cell
+        state = self._state
+        if not state.is_covered(slot):
+            return (
+                CELL_STYLE.uncovered,
+                state.has_mine(slot),
+                state.get_hint(slot),
+            )
+
+        return (
+            CELL_STYLE.covered,
+            state.is_flagged(slot),
+            self._is_solved and state.has_mine(slot),
+            self._get_heat_level(slot),
+        )
+
+    def _get_heat_level(self, slot):
+        heatmap = self.heatmap
+        if heatmap is None:
+            return
+
+        probability = heatmap.get(self._get_board_slot(slot))
+        if probability is None:
+            return
+
+        return int(round(probability * self.HEATMAP_LEVELS))
+
+    def _get_board_slot(self, slot):
+        # Slot of the cell on the whole board
+        return slot
+
+    def _get_glyph_hint(self, slot, draw_method):
+        # What tells glyphs of the same draw method apart
+        if draw_method == CELL_DRAW_METHOD.hint:
+            return self._state.get_hint(slot)
+        elif draw_method == CELL_DRAW_METHOD.heat:
+            return self._get_heat_level(slot)
+        else:
+            return
 
     def _get_cell_coordinate(self, coord):
         return (
@@ -145,33 +639,29 @@ class BoardImage:
             + self._edge_width
         )
 
-    def _draw_overlay(self, x, y, cell):
-        if cell.is_uncovered:
-            if cell.has_mine:
-                return self._draw_mine(x, y, cell)
-            elif cell.hint != 0:
-                self._draw_hint(x, y, cell)
+    def _draw_overlay(self, x, y, slot):
+        draw_method = self._get_draw_method(slot)
+        if draw_method is not None:
+            self._overlay(x, y, slot, draw_method=draw_method)
+
+    def _get_draw_method(self, slot):
+        state = self._state
+        if not state.is_covered(slot):
+            if state.has_mine(slot):
+                return CELL_DRAW_METHOD.mine
+            elif state.get_hint(slot) != 0:
+                return CELL_DRAW_METHOD.hint
             else:
                 return
-        elif self.is_solved and cell.has_mine:
-            self._draw_solved(x, y, cell)
-        elif cell.is_flagged:
-            return self._draw_flag(x, y, cell)
+        elif self._is_solved and state.has_mine(slot):
+            return CELL_DRAW_METHOD.solved
+        elif state.is_flagged(slot):
+            return CELL_DRAW_METHOD.flag
+        elif self._get_heat_level(slot):
+            return CELL_DRAW_METHOD.heat
         else:
             return
 
-    def _draw_flag(self, x, y, cell):
-        self._overlay(x, y, cell, draw_method=CELL_DRAW_METHOD.flag)
-
-    def _draw_hint(self, x, y, cell):
-        self._overlay(x, y, cell, draw_method=CELL_DRAW_METHOD.hint)
-
-    def _draw_mine(self, x, y, cell):
-        self._overlay(x, y, cell, draw_method=CELL_DRAW_METHOD.mine)
-
-    def _draw_solved(self, x, y, cell):
-        self._overlay(x, y, cell, draw_method=CELL_DRAW_METHOD.solved)
-
     def _get_hint_font_color(self, hint):
         if hint == 1:
             return COLOR.dark_green
@@ -180,141 +670,36 @@ class BoardImage:
         else:
             return COLOR.dark_red
 
-    def _overlay(self, x, y, cell, draw_method=CELL_DRAW_METHOD.hint):
-        font = None
-        cell_text = None
-        height_adjustment = None
+    def _overlay(self, x, y, slot, draw_method=CELL_DRAW_METHOD.hint):
+        hint = self._get_glyph_hint(slot, draw_method)
+        fill = self._get_overlay_fill(draw_method, hint)
+        self._paste_glyph(x, y, draw_method, hint=hint, fill=fill)
+
+    def _get_overlay_fill(self, draw_method, hint):
         fill = None
-        draw_cross = False
         if draw_method == CELL_DRAW_METHOD.mine:
-            cell_text = '\U00002620'  # unicode point for skull
             fill = COLOR.red
-            font = ImageFont.truetype(
-                conf.FONT_FILE_PATH,
-                size=int(self.cell_image_size / 1.3)
-            )
-            height_adjustment = -4
         elif draw_method == CELL_DRAW_METHOD.hint:
-            cell_text = str(cell.hint)
-            fill = self._get_hint_font_color(hint=cell.hint)
-            font = ImageFont.truetype(
-                conf.FONT_FILE_PATH,
-                size=int(self.cell_image_size / 2.5)
-            )
-            height_adjustment = 0
+            fill = self._get_hint_font_color(hint=hint)
         elif draw_method == CELL_DRAW_METHOD.flag:
-            # TODO: Write logic for flag here
-            cell_text = '\U00002690'  # unicode point for flag
             fill = COLOR.green
-            font = ImageFont.truetype(
-                conf.FONT_FILE_PATH,
-                size=int(self.cell_image_size / 1.3)
-            )
-            height_adjustment = -4
         elif draw_method == CELL_DRAW_METHOD.solved:
-            cell_text = '\U00002620'  # unicode point for skull
             fill = COLOR.gray_80
-            font = ImageFont.truetype(
-                conf.FONT_FILE_PATH,
-                size=int(self.cell_image_size / 1.3)
-            )
-            height_adjustment = -4
-            draw_cross = True
-        else:
-            error_msg = (
-                f"Cannot handle unknown `draw_method={draw_method}`"
-            )
-            raise ValueError(error_msg)
-
-        font_width, font_height = font.getsize(cell_text)
-        draw_context = ImageDraw.Draw(self._board_image)
-        draw_context.text(
-            (
-                (
-                    x
-                    + (self.cell_image_size / 2)
-                    - (font_width / 2)
-                ),
-                (
-                    y
-                    + (self.cell_image_size / 2)
-                    - (font_height / 2)
-                    + height_adjustment
-                ),
-            ),
-            cell_text,
-            font=font,
-            fill=fill,
-            align="center",
-
-        )
-
-        if draw_cross:
-            inset_ratio = 0.2
-            incr_small = int(self.cell_image_size * inset_ratio)
-            incr_large = int(self.cell_image_size * (1 - inset_ratio))
-
-            p1 = (x + incr_small, y + incr_small)
-            p2 = (x + incr_large, y + incr_large)
-            draw_context.line(
-                [p1, p2],
-                fill=COLOR.gray_60,
-                width=self._edge_width,
-                joint=None,
-            )
+        elif draw_method == CELL_DRAW_METHOD.heat:
+            alpha = int(self.HEATMAP_MAX_ALPHA * hint / self.HEATMAP_LEVELS)
+            fill = (*self.HEATMAP_COLOR, alpha)
 
-            p3 = (x + incr_small, y + incr_large)
-            p4 = (x + incr_large, y + incr_small)
-            draw_context.line(
-                [p3, p4],
-                fill=COLOR.gray_60,
-                width=self._edge_width,
-                joint=None,
-            )
-
-    def _draw_hints(self, cell, x, y, draw_mines=False):
-        if not draw_mines and (cell.hint == 0 or cell.hint is None):
-            return
-
-        if draw_mines and cell.has_mine:
-            cell_text = '\U00002620'  # unicode point for skull
-            fill = COLOR.red
-            font = ImageFont.truetype(
-                conf.FONT_FILE_PATH,
-                size=int(self.cell_image_size / 1.3)
-            )
-            height_adjustment = -4
-        else:
-            cell_text = str(cell.hint)
-            fill = COLOR.blue
-            font = ImageFont.truetype(
-                conf.FONT_FILE_PATH,
-                size=int(self.cell_image_size / 2.5)
-            )
-            height_adjustment = 0
+        return fill
 
-        font_width, font_height = font.getsize(cell_text)
-        draw_context = ImageDraw.Draw(self._board_image)
-        draw_context.text(
-            (
-                (
-                    x
-                    + (self.cell_image_size / 2)
-                    - (font_width / 2)
-                ),
-                (
-                    y
-                    + (self.cell_image_size / 2)
-                    - (font_height / 2)
-                    + height_adjustment
-                ),
-            ),
-            cell_text,
-            font=font,
+    def _paste_glyph(self, x, y, draw_method, hint, fill):
+        tile = self.GLYPH_ATLAS.get_tile(
+            cell_image_size=self.cell_image_size,
+            draw_method=draw_method,
+            hint=hint,
             fill=fill,
-            align="center",
-
+            edge_width=self._edge_width,
         )
+        self._board_image.alpha_composite(tile, dest=(x, y))
 
     def _create_cell_image(self, cell_state):
         color = None
@@ -335,17 +720,39 @@ class BoardImage:
             color=color,
         )
 
-    def _create_board_image(self):
-        board_image_width = (
-            (self.cell_image_size + self._edge_width) * self._board.width
-            + self._edge_width
-        )
-        board_image_height = (
-            (self.cell_image_size + self._edge_width) * self._board.height
-            + self._edge_width
-        )
-        return Image.new(
-            'RGBA',
-            (board_image_width, board_image_height),
-            color=COLOR.gray_27,
+    def _create_board_image(self, size=None):
+        if size is None:
+            board_image_width = (
+                (self.cell_image_size + self._edge_width) * self._board.width
+                + self._edge_width
+            )
+            board_image_height = (
+                (self.cell_image_size + self._edge_width) * self._board.height
+                + self._edge_width
+            )
+            size = (board_image_width, board_image_height)
+
+        # The pixels live in a buffer owned by us and shared with
+        # `qt_image`, reused as long as the image size does not change
+        board_image = self._board_image_for_buffer(size)
+        board_image.paste(COLOR.gray_27, (0, 0, *size))
+        return board_image
+
+    def _board_image_for_buffer(self, size):
+        width, height = size
+        if (
+                self._buffer is not None
+                and self._board_image.size == size
+        ):
+            return self._board_image
+
+        self._buffer = bytearray(width * height * 4)
+        self._qt_image = None
+        board_image = Image.frombuffer(
+            'RGBA', size, self._buffer, 'raw', 'RGBA', 0, 1,
         )
+
+        # `frombuffer()` marks the image read-only which makes Pillow copy
+        # it on the first write, writes have to land in the shared buffer
+        board_image.readonly = 0
+        return board_image
@@ -0,0 +1,57 @@
+import enum
+
+
+@enum.unique
+class ACTION(enum.Enum):
+    SELECT = 0
+    FLAG = 1
+
+
+class InputQueue:
+    # Clicks and flags waiting to be applied to the board. The owner pushes
+    # events as they arrive and takes them all once per frame, so that they
+    # reach the board as one batch. Events that would not change the board
+    # are coalesced away: a slot selected again within the batch and a slot
+    # flagged twice in a row (the second flag would undo the first).
+    def __init__(self):
+        self._events = []
+
+    def __len__(self):
+        return len(self._events)
+
+    def __bool__(self):
+        return bool(self._events)
+
+    @property
+    def events(self):
+        return list(self._events)
+
+    def push(self, action, slot):
+        index = self._get_last_index(slot)
+        last_event = None if index is None else self._events[index]
+        if last_event == (ACTION.SELECT, slot):
+            # Selecting twice does nothing more than selecting once, a flag
+            # pushed after a select stays in case the select was a no-op
+            if action == ACTION.SELECT:
+                return
+        elif last_event == (ACTION.FLAG, slot) and action == ACTION.FLAG:
+            # The flag being undone is the latest one on the slot, an
+            # earlier one may be followed by a select
+            del self._events[index]
+            return
+
+        self._events.append((action, slot))
+
+    def take(self):
+        # Returns the queued events in the order they arrived and empties
+        # the queue
+        events, self._events = self._events, []
+        return events
+
+    def clear(self):
+        self._events = []
+
+    def _get_last_index(self, slot):
+        for index in range(len(self._events) - 1, -1, -1):
+            if self._events[index][1] == slot:
+                return index
@@ -0,0 +1,132 @@
+import collections
+import json
+import time
+
+
+class FrameTimer:
+    # Keeps the last `size` values of something measured once per frame (or
+    # per click) in a ring buffer, in milliseconds unless another unit is
+    # given
+    DEFAULT_SIZE = 512
+
+    def __init__(self, name, size=None, unit='ms'):
+        self.name = name
+        self.unit = unit
+        self._durations = collections.deque(maxlen=size or self.DEFAULT_SIZE)
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+
+    def stop(self):
+        if self._start is None:
+            return
+
+        self.record((time.perf_counter() - self._start) * 1000)
+        self._start = None
+
+    def record(self, duration):
+        self._durations.append(duration)
+
+    def clear(self):
+        self._durations.clear()
+
+    @property
+    def durations(self):
+        return list(self._durations)
+
+    @property
+    def last(self):
+        if not self._durations:
+            return
+
+        return self._durations[-1]
+
+    def stats(self):
+        durations = sorted(self._durations)
+        if not durations:
+            return {'name': self.name, 'unit': self.unit, 'count': 0}
+
+        return {
+            'name': self.name,
+            'unit': self.unit,
+            'count': len(durations),
+            'mean': sum(durations) / len(durations),
+            'p50': durations[int((len(durations) - 1) * 0.5)],
+            'p95': durations[int((len(durations) - 1) * 0.95)],
+            'max': durations[-1],
+        }
+
+    def summary(self):
+        stats = self.stats()
+        if not stats['count']:
+            return f'{self.name}: no samples'
+
+        return (
+            f"{self.name}: {stats['count']} samples, "
+            f"mean {stats['mean']:.3f} {self.unit}, "
+            f"p50 {stats['p50']:.3f} {self.unit}, "
+            f"p95 {stats['p95']:.3f} {self.unit}, "
+            f"max {stats['max']:.3f} {self.unit}"
+        )
+
+
+class Instrument:
+    # A `FrameTimer` per stage of the path from a click to its last frame.
+    # Stages timed within one call use the timers directly, stages spanning
+    # several calls (e.g. click to first frame) are measured between
+    # `begin()` and `end()`.
+    def __init__(self, size=None):
+        self._size = size
+        self._timers = collections.OrderedDict()
+        self._starts = {}
+
+    @property
+    def timers(self):
+        return list(self._timers.values())
+
+    def add_timer(self, timer):
+        self._timers[timer.name] = timer
+        return timer
+
+    def get_timer(self, name, unit='ms'):
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self.add_timer(
+                FrameTimer(name, size=self._size, unit=unit)
+            )
+
+        return timer
+
+    def begin(self, name):
+        self._starts[name] = time.perf_counter()
+
+    def end(self, name):
+        # Ending a stage that was not begun does nothing
+        start = self._starts.pop(name, None)
+        if start is None:
+            return
+
+        self.get_timer(name).record((time.perf_counter() - start) * 1000)
+
+    def is_pending(self, name):
+        return name in self._starts
+
+    def record(self, name, value, unit='ms'):
+        self.get_timer(name, unit=unit).record(value)
+
+    def clear(self):
+        self._starts.clear()
+        for timer in self._timers.values():
+            timer.clear()
+
+    def summary(self):
+        return '\n'.join(timer.summary() for timer in self._timers.values())
+
+    def dump(self, file_path):
+        data = {
+            timer.name: dict(timer.stats(), values=timer.durations)
+            for timer in self._timers.values()
+        }
+        with open(file_path, 'w') as f:
+            json.dump(data, f, indent=2)
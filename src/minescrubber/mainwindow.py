@@ -2,34 +2,152 @@ import os
 import random
 
 
-from . import imager, conf, animator
+from . import (
+    imager, conf, animation, animator, viewport, canvas, instrument,
+    inputqueue,
+    solver, probability, seeding, replay, player, noguess,
+)
 from .qt import BaseDialog, QtWidgets, QtCore, QtGui
 
 
+class ProbabilityWorker(QtCore.QThread):
+    # Computes mine probabilities off the GUI thread. Only the latest
+    # request matters, a request arriving while the worker is busy replaces
+    # any other one still waiting.
+    DONE_SIGNAL = QtCore.Signal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent=parent)
+        self._mutex = QtCore.QMutex()
+        self._condition = QtCore.QWaitCondition()
+        self._request = None
+        self._is_stopped = False
+
+    def request(self, request_id, arguments):
+        # `arguments` of `probability.compute_probabilities()`, the result
+        # comes back with `request_id` through `DONE_SIGNAL`
+        self._mutex.lock()
+        self._request = (request_id, arguments)
+        self._condition.wakeOne()
+        self._mutex.unlock()
+        if not self.isRunning():
+            self.start(QtCore.QThread.LowPriority)
+
+    def stop(self):
+        self._mutex.lock()
+        self._is_stopped = True
+        self._condition.wakeOne()
+        self._mutex.unlock()
+        self.wait()
+
+    def run(self):
+        while True:
+            self._mutex.lock()
+            while self._request is None and not self._is_stopped:
+                self._condition.wait(self._mutex)
+            request, self._request = self._request, None
+            is_stopped = self._is_stopped
+            self._mutex.unlock()
+            if is_stopped:
+                return
+
+            request_id, arguments = request
+            self.DONE_SIGNAL.emit(
+                request_id,
+                probability.compute_probabilities(**arguments),
+            )
+
+
 class MainWidget(BaseDialog):
     CELL_SELECTED_SIGNAL = QtCore.Signal(tuple)
     CELL_FLAGGED_SIGNAL = QtCore.Signal(tuple)
     NEW_GAME_SIGNAL = QtCore.Signal(tuple)
 
-    def __init__(self, parent=None):
+    # Larger reveals always use the cheapest animation
+    RANDOM_METHOD_MAX_CELLS = 16
+
+    # Clicks arriving within one frame are applied to the board as a batch
+    INPUT_INTERVAL = 16
+
+    def __init__(self, seed=None, parent=None):
         super().__init__(parent=parent)
+        self._seeds = seeding.SessionSeeds(
+            conf.SEED if seed is None else seed
+        )
+        self._rng = random.Random()
+        self._board_pool = None
+        self._is_no_guess_game = False
+
+        # Created before the core makes the first board, which gets seeded
+        # here like every board after it
+        self._seed_game()
+
+    def _seed_game(self, args=None):
+        # No guess games of `args` (width, height, nb_mines) take a seed
+        # the board pool has ready, the game is a normal one while it has
+        # none yet
+        seed = None
+        if args is not None and self._board_pool is not None:
+            seed = self._board_pool.take(*args)
+
+        self._is_no_guess_game = seed is not None
+        game_seed = self._seeds.next_game(seed=seed)
+        seeding.seed_board(game_seed)
+        self._rng.seed(game_seed)
 
     def init_board(self, board):
+        # `self._board` is the board on display, the replay board while a
+        # replay is watched, `self._game_board` the board of the core
         self._board = board
+        self._game_board = board
         self._last_swept = self._board.last_swept
-        self._board_image = imager.BoardImage(self._board)
-        self._ac = animator.AnimController(board_image=self._board_image)
+        self._board_image = self._create_board_image(self._board)
+        self._ac = animator.AnimController(
+            board_image=self._board_image,
+            adaptive=True,
+            rng=self._rng,
+        )
+        self._clicked_slot = None
+        self._animated_slots = []
+        self._input_queue = inputqueue.InputQueue()
+        self._batch = None
+        self._is_game_done = False
+        self._solver = None
+        self._heatmap_request_id = 0
+        self._probability_worker = ProbabilityWorker()
+        self._recorder = None
+        if conf.REPLAY_FILE:
+            self._recorder = replay.ReplayRecorder(
+                replay.ReplayWriter(conf.REPLAY_FILE)
+            )
+            self._record_new_game()
+        self._player = None
+        self._instrument = instrument.Instrument()
         self._setup_ui()
         self._timer = QtCore.QTimer()
         self._time = 0
+        self._input_timer = QtCore.QTimer()
+        self._input_timer.setSingleShot(True)
+        self._input_timer.setInterval(self.INPUT_INTERVAL)
         self._connect_signals()
+        self._setup_hud()
+        self._set_heatmap_visible(conf.HEATMAP)
+        self._set_no_guess(conf.NO_GUESS)
+        if conf.PLAY_REPLAY_FILE:
+            self.load_replay(conf.PLAY_REPLAY_FILE)
+
+    def _create_board_image(self, board):
+        # Boards too large to be readable in one image get scrolled
+        if viewport.needs_viewport(board):
+            return viewport.ViewportImage(board)
+
+        return imager.BoardImage(board)
 
     def _setup_ui(self):
-        title = 'Minescrubber'
-        self.setWindowTitle(title)
+        self._update_title()
         self.setFixedSize(
-            max(304, self._board_image.qt_image.width() + 40),
-            self._board_image.qt_image.height() + 140
+            max(304, self._board_image.width + 40),
+            self._board_image.height + 140
         )
 
         self._main_layout = QtWidgets.QVBoxLayout(self)
@@ -42,6 +160,10 @@ class MainWidget(BaseDialog):
         self._image_layout_outer = self._create_image_layout()
         self._main_layout.addLayout(self._image_layout_outer)
 
+        # Add replay layout, only shown while a replay plays
+        self._replay_widget = self._create_replay_widget()
+        self._main_layout.addWidget(self._replay_widget)
+
         # Add bottom layout
         self._bottom_layout = self._create_bottom_layout()
         self._main_layout.addLayout(self._bottom_layout)
@@ -49,6 +171,17 @@ class MainWidget(BaseDialog):
         # Move focus away from the line edits
         self._restart_image_label.setFocus()
 
+    def _update_title(self):
+        # The seed is all it takes to play the same board again
+        no_guess = ''
+        if self._is_no_guess_game:
+            no_guess = ', no guess'
+        elif self._board_pool is not None:
+            no_guess = ', no guess from the next game'
+        self.setWindowTitle(
+            f'Minescrubber (seed {self._seeds.game_seed}{no_guess})'
+        )
+
     def _create_top_layout(self):
         self._top_layout = QtWidgets.QHBoxLayout()
 
@@ -89,38 +222,43 @@ class MainWidget(BaseDialog):
     def _create_image_layout(self):
         self._image_layout_inner = QtWidgets.QHBoxLayout()
 
-        # Create Pixmap
-        self._pixmap = QtGui.QPixmap.fromImage(self._board_image.qt_image)
-
-        # Create Label and add the pixmap
-        self._image_label = QtWidgets.QLabel()
-        self._image_label.setPixmap(self._pixmap)
-        self._image_label.setMinimumWidth(self._board_image.qt_image.width())
-        self._image_label.setMinimumHeight(self._board_image.qt_image.height())
-        self._image_label.setCursor(
-            QtGui.QCursor(QtCore.Qt.PointingHandCursor)
-        )
+        # Create the board view, it does its own hit testing
+        self._canvas = canvas.create_canvas(self._board_image)
 
         # Create an innner layout to prohibit horizontal stretching of the
-        # image label
-        self._image_layout_inner.addWidget(self._image_label)
+        # canvas
+        self._image_layout_inner.addWidget(self._canvas)
 
-        # Adding a spacer to the right of the label to make sure that the
-        # image label does not stretch otherwise we cannot get the right
-        # mouse position to pick the pixel
+        # Adding a spacer to the right of the canvas to make sure that the
+        # canvas does not stretch otherwise we cannot get the right mouse
+        # position to pick the pixel
         self._image_layout_inner.addStretch(1)
 
         # Create an outer layout to prohibit the vertical stretching
-        # of the image label
+        # of the canvas
         self._image_layout_outer = QtWidgets.QVBoxLayout()
         self._image_layout_outer.addLayout(self._image_layout_inner)
 
-        # Adding a spacer to the bottom of the label to make sure that the
-        # image label does not stretch otherwise we cannot get the right
-        # mouse position to pick the pixel
+        # Adding a spacer to the bottom of the canvas to make sure that the
+        # canvas does not stretch otherwise we cannot get the right mouse
+        # position to pick the pixel
         self._image_layout_outer.addStretch(1)
         return self._image_layout_outer
 
+    def _create_replay_widget(self):
+        self._replay_widget = QtWidgets.QWidget()
+        replay_layout = QtWidgets.QHBoxLayout(self._replay_widget)
+        replay_layout.setContentsMargins(0, 0, 0, 0)
+
+        self._replay_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
+        self._replay_slider.setFocusPolicy(QtCore.Qt.NoFocus)
+        self._replay_label = QtWidgets.QLabel()
+
+        replay_layout.addWidget(self._replay_slider, 1)
+        replay_layout.addWidget(self._replay_label)
+        self._replay_widget.setVisible(False)
+        return self._replay_widget
+
     def _create_bottom_layout(self):
         self._bottom_layout = QtWidgets.QHBoxLayout()
 
@@ -172,16 +310,168 @@ class MainWidget(BaseDialog):
 
     def _connect_signals(self):
         self._restart_image_label.mousePressEvent = self._restart
-        self._image_label.mousePressEvent = self._on_image_clicked
+        self._canvas.CELL_CLICKED_SIGNAL.connect(self._on_cell_clicked)
+        self._canvas.ZOOMED_SIGNAL.connect(self._update_size)
+        self._canvas.PAINTED_SIGNAL.connect(self._on_canvas_painted)
         self._timer.timeout.connect(self._on_timer_timeout)
-        self._ac.UPDATE_SIGNAL.connect(self._update_image_label)
+        self._input_timer.timeout.connect(self._flush_input)
+        self._ac.UPDATE_SIGNAL.connect(self._canvas.update_rect)
         self._ac.DONE_SIGNAL.connect(self._anim_done)
+        self._probability_worker.DONE_SIGNAL.connect(
+            self._on_probabilities_done
+        )
+        self._replay_slider.valueChanged.connect(self._seek_replay)
+        if self._recorder is not None:
+            self.NEW_GAME_SIGNAL.connect(self._record_new_game)
+            self.CELL_SELECTED_SIGNAL.connect(self._recorder.select)
+            self.CELL_FLAGGED_SIGNAL.connect(self._recorder.flag)
+        self.finished.connect(self._on_finished)
+
+    def _setup_hud(self):
+        for timer in (
+                self._canvas.frame_timer,
+                self._ac.tick_timer,
+                self._ac.dropped_frames,
+        ):
+            self._instrument.add_timer(timer)
+
+        # Timings overlay on the top left corner of the board
+        self._hud_label = QtWidgets.QLabel(self._canvas)
+        self._hud_label.setStyleSheet(
+            "color: white;"
+            "background-color: rgba(0, 0, 0, 160);"
+            "font-size: 10px;"
+        )
+        self._hud_label.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self._hud_timer = QtCore.QTimer()
+        self._hud_timer.timeout.connect(self._update_hud)
+        self._set_hud_visible(conf.HUD)
+
+    def _set_hud_visible(self, is_visible):
+        self._is_hud_visible = is_visible
+        self._hud_label.setVisible(is_visible)
+        if is_visible:
+            self._update_hud()
+            self._hud_timer.start(500)
+        else:
+            self._hud_timer.stop()
+
+    def _update_hud(self):
+        lines = []
+        for timer in self._instrument.timers:
+            stats = timer.stats()
+            if not stats['count']:
+                continue
+
+            lines.append(
+                f"{timer.name}: {timer.last:.1f} "
+                f"(p95 {stats['p95']:.1f}) {timer.unit}"
+            )
+
+        self._hud_label.setText('\n'.join(lines) or 'No timings yet')
+        self._hud_label.adjustSize()
+
+    def _set_heatmap_visible(self, is_visible):
+        self._is_heatmap_visible = is_visible
+        if is_visible:
+            self._solver = None
+            self._update_heatmap()
+            return
+
+        self._heatmap_request_id += 1
+        self._show_heatmap(None)
+
+    def _set_no_guess(self, is_no_guess):
+        # Applies from the next game, the pool starts searching boards of
+        # the current size straight away
+        if is_no_guess == (self._board_pool is not None):
+            return
+
+        if is_no_guess:
+            self._board_pool = noguess.BoardPool()
+            self._board_pool.fill(
+                self._board.width,
+                self._board.height,
+                self._board.nb_mines,
+            )
+        else:
+            self._board_pool.close()
+            self._board_pool = None
+
+        self._update_title()
+
+    def _update_heatmap(self, slots=()):
+        # The solver follows the game in the GUI thread, which is cheap as
+        # it only looks at the cells around `slots`. The probabilities are
+        # left to the worker.
+        if not self._is_heatmap_visible:
+            return
+
+        if self._solver is None:
+            self._solver = solver.Solver(self._board)
+        else:
+            self._solver.update(self._board, slots=slots)
+
+        self._heatmap_request_id += 1
+        self._probability_worker.request(
+            self._heatmap_request_id,
+            probability.get_solver_arguments(
+                self._solver,
+                self._board.nb_mines,
+            ),
+        )
+
+    def _on_probabilities_done(self, request_id, probabilities):
+        # Results of requests made before the latest are stale
+        if request_id != self._heatmap_request_id:
+            return
+
+        self._show_heatmap(probabilities)
+
+    def _show_heatmap(self, probabilities):
+        self._board_image.heatmap = probabilities
+        self._board_image.update_image(self._board)
+        if self._board_image.dirty_rect is not None:
+            self._canvas.update_rect(self._board_image.dirty_rect)
+
+    def keyPressEvent(self, event):
+        if event.key() == QtCore.Qt.Key_F3:
+            self._set_hud_visible(not self._is_hud_visible)
+            return
+
+        if event.key() == QtCore.Qt.Key_F4:
+            self._set_heatmap_visible(not self._is_heatmap_visible)
+            return
+
+        if event.key() == QtCore.Qt.Key_F5:
+            self._set_no_guess(self._board_pool is None)
+            return
+
+        if self._player is not None:
+            steps = {
+                QtCore.Qt.Key_Left: -1,
+                QtCore.Qt.Key_Right: 1,
+                QtCore.Qt.Key_PageUp: -10,
+                QtCore.Qt.Key_PageDown: 10,
+                QtCore.Qt.Key_Home: -self._player.nb_moves,
+                QtCore.Qt.Key_End: self._player.nb_moves,
+            }
+            step = steps.get(event.key())
+            if step is not None:
+                self._replay_slider.setValue(
+                    self._replay_slider.value() + step
+                )
+                return
+
+        super().keyPressEvent(event)
 
     def _on_timer_timeout(self):
         self._time += 1
         self._timer_lcd.display(str(self._time).zfill(3))
 
     def _restart(self, event=None):
+        # The limits are the core ones, the replay board has none
+        self._stop_replay()
         try:
             width = int(self._field_x_line_edit.text())
             height = int(self._field_y_line_edit.text())
@@ -193,7 +483,8 @@ class MainWidget(BaseDialog):
             msg_box.showMessage(error_msg)
             return
 
-        min_cells, max_cells = self._board.MIN_CELLS, self._board.MAX_CELLS
+        min_cells = self._game_board.MIN_CELLS
+        max_cells = self._game_board.MAX_CELLS
         invalid_width = not(min_cells <= width <= max_cells)
         invalid_height = not(min_cells <= height <= max_cells)
         if invalid_width or invalid_height:
@@ -204,6 +495,14 @@ class MainWidget(BaseDialog):
             msg_box.showMessage(error_msg)
             return
 
+        # Seeded before anything else touches the global random module
+        try:
+            self._seed_game(args)
+        except RuntimeError as error:
+            msg_box = QtWidgets.QErrorMessage(parent=self)
+            msg_box.showMessage(str(error))
+            self._seed_game()
+
         self._marked_mines_lcd.display(str(nb_mines).zfill(3))
         self._restart_image_label.setPixmap(
             QtGui.QPixmap(
@@ -216,36 +515,169 @@ class MainWidget(BaseDialog):
         self._timer_lcd.display(str(self._time).zfill(3))
         self._last_swept = []
 
+        # Clicks on the previous board are dropped
+        self._input_timer.stop()
+        self._input_queue.clear()
+        self._is_game_done = False
+        self._solver = None
+
+        self._update_title()
         self.NEW_GAME_SIGNAL.emit(args)
 
-    def _on_image_clicked(self, event):
-        if not self._timer.isActive():
-            self._timer.start(1000)
+        # A no guess board is only solvable from its start slot
+        if self._is_no_guess_game:
+            self._on_cell_clicked(
+                noguess.get_start_slot(width, height),
+                QtCore.Qt.MouseButton.LeftButton,
+            )
 
-        selected_cell = self._board_image.pixel_to_slot(event.x(), event.y())
-        if selected_cell is None:
+    def _on_cell_clicked(self, selected_cell, button):
+        # A replay is only watched
+        if self._player is not None:
             return
 
-        button = event.button()
         if button == QtCore.Qt.MouseButton.RightButton:
-            signal = self.CELL_FLAGGED_SIGNAL
+            action = inputqueue.ACTION.FLAG
         else:
-            signal = self.CELL_SELECTED_SIGNAL
+            action = inputqueue.ACTION.SELECT
+
+        # Clicks the core would ignore are dropped here, as long as no
+        # queued move can still change the cell
+        if not self._input_queue and self._is_ignored(action, selected_cell):
+            return
+
+        if not self._timer.isActive():
+            self._timer.start(1000)
+
+        # Timed from the first click of the batch
+        for name in (
+                'click_to_refresh',
+                'click_to_first_frame',
+                'click_to_last_frame',
+        ):
+            if not self._instrument.is_pending(name):
+                self._instrument.begin(name)
+
+        self._input_queue.push(action, selected_cell)
+        if not self._input_timer.isActive():
+            self._input_timer.start()
+
+    def _is_ignored(self, action, slot):
+        # Uncovered cells cannot be flagged and flagged ones cannot be
+        # selected
+        state = self._board_image.state
+        if action == inputqueue.ACTION.FLAG:
+            return not state.is_covered(slot)
+
+        return state.is_flagged(slot)
+
+    def _flush_input(self):
+        events = self._input_queue.take()
+        self._instrument.record('batched_clicks', len(events), unit='clicks')
+        if not events:
+            return
+
+        # The core refreshes once per event, the refreshes are collected
+        # here and applied once all the events are in
+        self._batch = {
+            'board': None,
+            'init_image': False,
+            'swept': [],
+            'selected': [],
+            'flagged': [],
+            'origin': None,
+        }
+        for action, slot in events:
+            if self._is_game_done:
+                break
+
+            if action == inputqueue.ACTION.FLAG:
+                self._batch['flagged'].append(slot)
+                self.CELL_FLAGGED_SIGNAL.emit(slot)
+            else:
+                if self._batch['origin'] is None:
+                    self._batch['origin'] = slot
+                self._batch['selected'].append(slot)
+                self.CELL_SELECTED_SIGNAL.emit(slot)
+
+        batch, self._batch = self._batch, None
+        if batch['board'] is None:
+            self._update_recorder()
+            return
+
+        self._clicked_slot = batch['origin'] or events[0][1]
+
+        # The moves of the batch only changed the clicked and swept cells,
+        # unless the game ended and the core uncovered the board
+        changed_slots = None
+        if not self._is_game_done:
+            changed_slots = (
+                batch['swept'] + batch['selected'] + batch['flagged']
+            )
 
-        signal.emit(selected_cell)
+        self._refresh(
+            board=batch['board'],
+            init_image=batch['init_image'],
+            swept=batch['swept'],
+            selected=batch['selected'],
+            changed_slots=changed_slots,
+        )
+        self._update_recorder()
+
+    def _update_recorder(self):
+        # The snapshots are copied from the state the board image has just
+        # been synced with, rather than from every cell of the board
+        if self._recorder is not None:
+            self._recorder.update(
+                self._board,
+                is_done=self._is_game_done,
+                state=self._board_image.state,
+            )
 
     def refresh(self, board, init_image=True):
+        self._game_board = board
+        if self._batch is None:
+            swept = []
+            if self._last_swept != board.last_swept:
+                swept = board.last_swept
+            self._last_swept = board.last_swept
+            self._refresh(board=board, init_image=init_image, swept=swept)
+            return
+
+        self._batch['board'] = board
+        self._batch['init_image'] |= init_image
+        if self._last_swept != board.last_swept:
+            self._last_swept = board.last_swept
+            self._batch['swept'].extend(self._last_swept)
+
+    def _refresh(
+            self, board, init_image, swept, selected=(), changed_slots=None,
+    ):
+        self._instrument.end('click_to_refresh')
         self._board = board
 
         if init_image:
-            self._board_image.init_image(self._board)
-
-        self._image_label.setMinimumWidth(self._board_image.qt_image.width())
-        self._image_label.setMinimumHeight(self._board_image.qt_image.height())
-        self.setFixedSize(
-            max(304, self._board_image.qt_image.width() + 40),
-            self._board_image.qt_image.height() + 140
-        )
+            self._instrument.begin('board_update')
+            is_viewport = isinstance(
+                self._board_image,
+                viewport.ViewportImage,
+            )
+            if viewport.needs_viewport(self._board) != is_viewport:
+                heatmap = self._board_image.heatmap
+                self._board_image = self._create_board_image(self._board)
+                self._board_image.heatmap = heatmap
+                self._ac.board_image = self._board_image
+                self._canvas.board_image = self._board_image
+            else:
+                self._board_image.update_image(
+                    self._board,
+                    slots=changed_slots,
+                )
+
+            self._instrument.end('board_update')
+
+        self._update_heatmap(list(swept) + list(selected))
+        self._update_size()
 
         remaining_mines = max(
             0,
@@ -253,30 +685,170 @@ class MainWidget(BaseDialog):
         )
         self._marked_mines_lcd.display(str(remaining_mines).zfill(3))
 
-        if self._last_swept != self._board.last_swept:
-            self._last_swept = self._board.last_swept
+        if swept:
+            # Cells still animating from a previous batch get redrawn
+            # once the merged animation is done
+            self._animated_slots.extend(swept)
             last_swept_cells = []
-            for slot in self._last_swept:
+            for slot in swept:
                 last_swept_cells.append(self._board.get_cell(slot))
 
-            self._ac.method = random.choice(list(animator.METHOD))
+            if len(last_swept_cells) <= self.RANDOM_METHOD_MAX_CELLS:
+                self._ac.method = self._rng.choice(list(animator.METHOD))
+            else:
+                self._ac.method = animation.CHEAPEST_METHOD
+
+            # Flood fills open in waves from the clicked cell, a batch
+            # arriving mid animation joins it
+            if not self._ac.is_running:
+                self._instrument.begin('animation')
             self._ac.reveal_cells(
                 cells=last_swept_cells,
                 fill=self._board_image.UNCOVERED_COLOR,
                 fill_from=self._board_image.COVERED_COLOR,
+                origin=self._clicked_slot,
             )
+        elif self._board_image.dirty_rect is not None:
+            self._canvas.update_rect(self._board_image.dirty_rect)
+
+    def _update_size(self):
+        self._canvas.setFixedSize(
+            self._board_image.width,
+            self._board_image.height,
+        )
+        replay_height = 0
+        if not self._replay_widget.isHidden():
+            replay_height = self._replay_widget.sizeHint().height()
+
+        self.setFixedSize(
+            max(304, self._board_image.width + 40),
+            self._board_image.height + 140 + replay_height
+        )
+
+    def load_replay(self, file_path, game_index=-1):
+        # Shows a recorded game, the slider (or the arrow, page, home and
+        # end keys) seeks through its moves. Restarting ends the replay.
+        try:
+            games = list(replay.read_games(file_path))
+        except (OSError, replay.ReplayError) as e:
+            games = []
+            error_msg = f'Cannot read the replay {file_path}: {e}'
+        else:
+            error_msg = f'No game recorded in {file_path}!'
+
+        if not games:
+            msg_box = QtWidgets.QErrorMessage(parent=self)
+            msg_box.showMessage(error_msg)
+            return
+
+        self._input_timer.stop()
+        self._input_queue.clear()
+        self._timer.stop()
+        self._player = player.ReplayPlayer(games[game_index])
+        self._replay_slider.blockSignals(True)
+        self._replay_slider.setRange(0, self._player.nb_moves)
+        self._replay_slider.setValue(0)
+        self._replay_slider.blockSignals(False)
+        self._replay_widget.setVisible(True)
+        self._seek_replay(0)
+
+    def _seek_replay(self, move_index):
+        if self._player is None:
+            return
+
+        # Only a single step forward is animated, its select is swept one
+        # ring at a time as the animation asks for them
+        layers = None
+        if move_index == self._player.move_index + 1:
+            layers = self._player.step()
+            board = self._player.board
         else:
-            self._update_image_label()
+            board = self._player.seek(move_index)
+
+        # The solver of the heatmap starts over as the board may have gone
+        # back
+        self._solver = None
+        self._clicked_slot = None
+        self._refresh(board=board, init_image=True, swept=[])
+        if layers is not None:
+            if not self._ac.is_running:
+                self._instrument.begin('animation')
+            self._ac.method = animation.CHEAPEST_METHOD
+            self._ac.reveal_layers(
+                layers=self._get_layer_cells(layers),
+                fill=self._board_image.UNCOVERED_COLOR,
+                fill_from=self._board_image.COVERED_COLOR,
+            )
+
+        seconds = self._player.get_move_time(move_index) / 1000
+        self._timer_lcd.display(str(int(seconds)).zfill(3))
+        self._replay_label.setText(
+            f'{move_index}/{self._player.nb_moves} ({seconds:.1f}s)'
+        )
+
+    def _get_layer_cells(self, layers):
+        # Cells of every ring as the sweep gets to it, the rings are redrawn
+        # once the animation is done and the heatmap follows the whole sweep
+        swept = []
+        for layer in layers:
+            swept.extend(layer)
+            self._animated_slots.extend(layer)
+            yield [self._board.get_cell(slot) for slot in layer]
+
+        self._update_heatmap(swept)
+
+    def _stop_replay(self):
+        if self._player is None:
+            return
+
+        # Back to the game the replay was watched over
+        self._player = None
+        self._replay_widget.setVisible(False)
+        self._solver = None
+        self._clicked_slot = None
+        self._refresh(board=self._game_board, init_image=True, swept=[])
 
-    def _update_image_label(self):
-        self._pixmap = QtGui.QPixmap.fromImage(self._board_image.qt_image)
-        self._image_label.setPixmap(self._pixmap)
+    def _on_canvas_painted(self):
+        self._instrument.end('click_to_first_frame')
+        if not self._ac.is_running:
+            self._instrument.end('click_to_last_frame')
 
     def _anim_done(self):
-        self._board_image.init_image(self._board)
-        self._update_image_label()
+        self._instrument.end('animation')
+
+        # The animation painted over the swept cells, have them redrawn
+        self._board_image.invalidate(self._animated_slots)
+        self._animated_slots = []
+        self._board_image.update_image(self._board)
+        if self._board_image.dirty_rect is not None:
+            self._canvas.update_rect(self._board_image.dirty_rect)
+
+    def _record_new_game(self, args=None):
+        # The first board comes from the core, the others from `_restart()`
+        if args is None:
+            args = (
+                self._board.width,
+                self._board.height,
+                self._board.nb_mines,
+            )
+
+        self._recorder.new_game(*args, seed=self._seeds.game_seed)
+
+    def _on_finished(self, result):
+        self._probability_worker.stop()
+        if self._board_pool is not None:
+            self._board_pool.close()
+        if self._recorder is not None:
+            self._recorder.close()
+
+        if conf.FRAME_STATS:
+            print(self._instrument.summary())
+
+        if conf.INSTRUMENT_FILE:
+            self._instrument.dump(conf.INSTRUMENT_FILE)
 
     def game_over(self, board):
+        self._is_game_done = True
         self.refresh(board=board)
         self._timer.stop()
         self._restart_image_label.setPixmap(
@@ -286,6 +858,7 @@ class MainWidget(BaseDialog):
         )
 
     def game_solved(self, board):
+        self._is_game_done = True
         self.refresh(board=board)
         self._timer.stop()
         self._restart_image_label.setPixmap(
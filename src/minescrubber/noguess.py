@@ -0,0 +1,211 @@
+import collections
+import multiprocessing
+import random
+import threading
+
+
+from . import headless, seeding, solver
+
+
+# Seeds tried by a worker per task
+SEEDS_PER_TASK = 20
+
+# Seeds tried before giving up on a board size, at densities where hardly
+# any board can be solved without guessing
+MAX_CANDIDATES = 100000
+
+# No guess seeds kept ready per board size
+POOL_SIZE = 4
+
+
+def get_start_slot(width, height):
+    # A no guess game opens here, the select is played for the player
+    return width // 2, height // 2
+
+
+def is_no_guess(ui, width, height, nb_mines, seed):
+    # Whether the board of `seed` is solved from the start slot by the
+    # moves the solver deduces, without a single guess
+    board = ui.new_game(width, height, nb_mines, seed=seed)
+    board = ui.select(get_start_slot(width, height))
+    board_solver = solver.Solver(board)
+    while not (ui.is_game_over or ui.is_game_solved):
+        slot = board_solver.next_move()
+        if slot is None:
+            return False
+
+        board = ui.select(slot)
+        board_solver.update(board, slots=[slot] + list(board.last_swept))
+
+    return ui.is_game_solved
+
+
+def search_seeds(args):
+    # Runs in a worker process, returns the no guess seeds among the
+    # `nb_seeds` drawn from `seed`
+    width, height, nb_mines, generated, nb_seeds, seed = args
+    seeds = seeding.SessionSeeds(seed)
+    ui = headless.create_ui(generated=generated)
+    found = []
+    for _ in range(nb_seeds):
+        game_seed = seeds.next_game()
+        if is_no_guess(ui, width, height, nb_mines, game_seed):
+            found.append(game_seed)
+
+    return found
+
+
+def get_tasks(width, height, nb_mines, generated, max_candidates, seed):
+    # One seed per task, derived from `seed`, whatever worker runs it
+    seeds = random.Random(seed)
+    for _ in range(0, max_candidates, SEEDS_PER_TASK):
+        yield (
+            width, height, nb_mines, generated, SEEDS_PER_TASK,
+            seeds.randrange(2 ** 32),
+        )
+
+
+def find_seeds(
+        width, height, nb_mines, nb_boards=1, generated=False,
+        nb_workers=None, max_candidates=MAX_CANDIDATES, seed=None,
+):
+    # Yields `nb_boards` no guess seeds, searched by a pool of processes.
+    # The tasks come back in order, so a given `seed` always finds the
+    # same boards.
+    nb_found = 0
+    with multiprocessing.Pool(nb_workers) as pool:
+        tasks = get_tasks(
+            width, height, nb_mines, generated, max_candidates, seed,
+        )
+        for found in pool.imap(search_seeds, tasks):
+            for game_seed in found[:nb_boards - nb_found]:
+                yield game_seed
+                nb_found += 1
+
+            if nb_found == nb_boards:
+                return
+
+    error_msg = (
+        f'No board of {width}x{height} with {nb_mines} mines can be '
+        f'solved without guessing in {max_candidates} tries!'
+    )
+    raise RuntimeError(error_msg)
+
+
+class BoardPool:
+    # Keeps `size` no guess seeds ready per (width, height, nb_mines) so
+    # that a new game starts at once. Seeds are searched in the background
+    # by a pool of processes, which is only started on the first `fill()`.
+    # The seeds come in as the workers find them: a session deals the same
+    # boards again by their own seeds, not from the session seed.
+    #
+    # The pool lives in the GUI process, whose threads must not be forked:
+    # its workers are spawned.
+    def __init__(
+            self, size=POOL_SIZE, generated=False, nb_workers=None,
+            seed=None,
+    ):
+        self._size = size
+        self._generated = generated
+        self._nb_workers = nb_workers or multiprocessing.cpu_count()
+        self._rng = random.Random(seed)
+        self._pool = None
+        self._is_closed = False
+        self._ready = collections.defaultdict(collections.deque)
+        self._nb_pending = collections.Counter()
+        self._nb_candidates = collections.Counter()
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def get_nb_ready(self, width, height, nb_mines):
+        with self._lock:
+            return len(self._ready[(width, height, nb_mines)])
+
+    def fill(self, width, height, nb_mines):
+        # Starts searching for the seeds missing for this board size
+        with self._lock:
+            self._fill((width, height, nb_mines))
+
+    def take(self, width, height, nb_mines):
+        # A ready seed or None while the workers have not found one, never
+        # waits for them. Raises a RuntimeError when the search for this
+        # board size stopped, the next call searches again.
+        key = (width, height, nb_mines)
+        with self._lock:
+            if key in self._errors:
+                self._nb_candidates[key] = 0
+                raise self._errors.pop(key)
+
+            seed = self._ready[key].popleft() if self._ready[key] else None
+            self._fill(key)
+            return seed
+
+    def close(self):
+        with self._lock:
+            self._is_closed = True
+
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def _fill(self, key):
+        # Called with the lock held, keeps every worker busy until the
+        # key has its seeds
+        if self._is_closed or key in self._errors:
+            return
+
+        if self._pool is None:
+            context = multiprocessing.get_context('spawn')
+            self._pool = context.Pool(self._nb_workers)
+
+        while (
+                len(self._ready[key]) < self._size
+                and self._nb_pending[key] < self._nb_workers
+        ):
+            if self._nb_candidates[key] >= MAX_CANDIDATES:
+                if not self._nb_pending[key] and not self._ready[key]:
+                    width, height, nb_mines = key
+                    error_msg = (
+                        f'No board of {width}x{height} with {nb_mines} '
+                        'mines can be solved without guessing in '
+                        f'{MAX_CANDIDATES} tries!'
+                    )
+                    self._errors[key] = RuntimeError(error_msg)
+                return
+
+            self._nb_pending[key] += 1
+            self._nb_candidates[key] += SEEDS_PER_TASK
+            self._pool.apply_async(
+                search_seeds,
+                (key + (
+                    self._generated, SEEDS_PER_TASK,
+                    self._rng.randrange(2 ** 32),
+                ),),
+                callback=lambda found, key=key: self._on_found(key, found),
+                error_callback=(
+                    lambda error, key=key: self._on_error(key, error)
+                ),
+            )
+
+    def _on_found(self, key, found):
+        # Runs in the result thread of the pool
+        with self._lock:
+            self._nb_pending[key] -= 1
+            self._ready[key].extend(found)
+            if found:
+                self._nb_candidates[key] = 0
+            self._fill(key)
+
+    def _on_error(self, key, error):
+        # Whatever failed in the worker, the game falls back to a normal one
+        width, height, nb_mines = key
+        error_msg = (
+            f'Searching boards of {width}x{height} with {nb_mines} mines '
+            f'failed: {error}!'
+        )
+        pool_error = RuntimeError(error_msg)
+        pool_error.__cause__ = error
+        with self._lock:
+            self._nb_pending[key] -= 1
+            self._errors[key] = pool_error
@@ -0,0 +1,208 @@
+import bisect
+
+
+from . import floodfill, replay, solver
+
+
+class ReplayCell:
+    def __init__(self, slot):
+        self.slot = slot
+        self.has_mine = False
+        self.hint = 0
+        self.is_flagged = False
+        self.is_uncovered = False
+
+
+class ReplayBoard:
+    # Stands in for the core board while a replay plays, with the same
+    # attributes the UI reads. Its state is either restored from a snapshot
+    # or moved forward by playing moves the way the core does.
+    def __init__(self, game):
+        self.width = game.width
+        self.height = game.height
+        self.nb_mines = game.nb_mines
+        self.nb_flagged = 0
+        self.last_swept = floodfill.SweptSlots()
+        self.data = {
+            (x, y): ReplayCell((x, y))
+            for y in range(self.height)
+            for x in range(self.width)
+        }
+        self._cells = list(self.data.values())
+
+        mines = set()
+        if game.mines is not None:
+            mines = replay.unpack_mask(game.mines, self.width, self.height)
+
+        for slot in mines:
+            self.data[slot].has_mine = True
+            for neighbour in self._get_neighbours(slot):
+                self.data[neighbour].hint += 1
+
+    @property
+    def cells(self):
+        return self._cells
+
+    def get_cell(self, slot):
+        return self.data[slot]
+
+    def reset(self):
+        self.restore(covered=None, flagged=None)
+
+    def restore(self, covered, flagged):
+        # Masks of a `replay.Snapshot`, None for all covered and none flagged
+        covered_slots = (
+            None if covered is None
+            else replay.unpack_mask(covered, self.width, self.height)
+        )
+        flagged_slots = (
+            set() if flagged is None
+            else replay.unpack_mask(flagged, self.width, self.height)
+        )
+        for cell in self._cells:
+            cell.is_uncovered = (
+                covered_slots is not None and cell.slot not in covered_slots
+            )
+            cell.is_flagged = cell.slot in flagged_slots
+
+        self.nb_flagged = len(flagged_slots)
+        self.last_swept = floodfill.SweptSlots()
+
+    def select(self, slot):
+        for _ in self.sweep(slot):
+            pass
+
+    def sweep(self, slot):
+        # Plays a select one ring of `floodfill.sweep_layers()` at a time,
+        # `last_swept` gets every ring as it is taken
+        self.last_swept = floodfill.SweptSlots()
+        cell = self.data[slot]
+        if cell.has_mine and not (cell.is_flagged or cell.is_uncovered):
+            cell.is_uncovered = True
+            self.last_swept.add_layer([slot])
+            yield [slot]
+            return
+
+        for layer in floodfill.sweep_layers(
+                slot, self.width, self.height, self._uncover,
+        ):
+            self.last_swept.add_layer(layer)
+            yield layer
+
+    def flag(self, slot):
+        cell = self.data[slot]
+        if cell.is_uncovered:
+            return
+
+        cell.is_flagged = not cell.is_flagged
+        self.nb_flagged += 1 if cell.is_flagged else -1
+
+    def _uncover(self, slot):
+        cell = self.data[slot]
+        if cell.is_flagged or cell.is_uncovered:
+            return
+
+        cell.is_uncovered = True
+        return cell.hint
+
+    def _get_neighbours(self, slot):
+        return solver.get_neighbours(slot, self.width, self.height)
+
+
+class ReplayPlayer:
+    # Seeks a recorded game to any move. The board is restored from the
+    # latest snapshot at or before the move and only the moves since that
+    # snapshot are played. Moving forward without passing a snapshot just
+    # plays the moves in between.
+    def __init__(self, game):
+        self._game = game
+        self._board = ReplayBoard(game)
+        self._snapshots = sorted(
+            game.snapshots,
+            key=lambda snapshot: snapshot.move_index,
+        )
+        self._snapshot_indices = [
+            snapshot.move_index for snapshot in self._snapshots
+        ]
+        self._move_index = 0
+        self._sweep = None
+
+    @property
+    def game(self):
+        return self._game
+
+    @property
+    def board(self):
+        return self._board
+
+    @property
+    def move_index(self):
+        # Number of moves played on `board`
+        return self._move_index
+
+    @property
+    def nb_moves(self):
+        return len(self._game.moves)
+
+    def seek(self, move_index):
+        # Returns the board after the first `move_index` moves
+        self._finish_sweep()
+        move_index = max(0, min(self.nb_moves, move_index))
+        position = bisect.bisect_right(self._snapshot_indices, move_index)
+        snapshot = self._snapshots[position - 1] if position else None
+        snapshot_index = 0 if snapshot is None else snapshot.move_index
+
+        is_forward = self._move_index <= move_index
+        if not is_forward or snapshot_index > self._move_index:
+            if snapshot is None:
+                self._board.reset()
+            else:
+                self._board.restore(snapshot.covered, snapshot.flagged)
+            self._move_index = snapshot_index
+
+        swept = floodfill.SweptSlots()
+        for move in self._game.moves[self._move_index:move_index]:
+            if move.record == replay.RECORD.FLAG:
+                self._board.flag(move.slot)
+            else:
+                self._board.select(move.slot)
+                for layer in self._board.last_swept.layers:
+                    swept.add_layer(layer)
+
+        self._board.last_swept = swept
+        self._move_index = move_index
+        return self._board
+
+    def step(self):
+        # Plays the next move like `seek(move_index + 1)` but a select is
+        # swept lazily: the returned generator yields the rings it uncovers
+        # and the board only moves as far as it was taken. Any other call on
+        # the player finishes the sweep first.
+        self._finish_sweep()
+        self._board.last_swept = floodfill.SweptSlots()
+        if self._move_index >= self.nb_moves:
+            return iter(())
+
+        move = self._game.moves[self._move_index]
+        self._move_index += 1
+        if move.record == replay.RECORD.FLAG:
+            self._board.flag(move.slot)
+            return iter(())
+
+        self._sweep = self._board.sweep(move.slot)
+        return self._sweep
+
+    def _finish_sweep(self):
+        if self._sweep is None:
+            return
+
+        for _ in self._sweep:
+            pass
+        self._sweep = None
+
+    def get_move_time(self, move_index):
+        # Milliseconds from the start of the game to the move
+        if not move_index:
+            return 0
+
+        return self._game.moves[min(move_index, self.nb_moves) - 1].time
@@ -0,0 +1,338 @@
+import collections
+import functools
+import math
+import random
+
+
+# Components with more unknown slots than this are sampled instead of
+# enumerated. The enumeration holds the GIL while it runs on the heatmap
+# thread, at most 2 ** 16 leaves keep it short enough for the GUI thread.
+MAX_EXACT_SLOTS = 16
+NB_SAMPLES = 2000
+
+
+class ProbabilityMap:
+    # Chance of a mine under each covered slot. Slots of the frontier and
+    # slots the solver knows about have their own probability, every other
+    # covered slot shares `interior`.
+    def __init__(self, probabilities, interior=None, is_exact=True):
+        self._probabilities = probabilities
+        self.interior = interior
+        self.is_exact = is_exact
+
+    def __getitem__(self, slot):
+        probability = self.get(slot)
+        if probability is None:
+            raise KeyError(slot)
+
+        return probability
+
+    def __contains__(self, slot):
+        return slot in self._probabilities
+
+    def get(self, slot, default=None):
+        probability = self._probabilities.get(slot, self.interior)
+        return default if probability is None else probability
+
+    @property
+    def probabilities(self):
+        return dict(self._probabilities)
+
+
+def get_components(constraints):
+    # Splits the constraints in groups that share no unknown slot, each group
+    # can be solved on its own. `constraints` are (unknown slots, mines).
+    constraints_by_slot = collections.defaultdict(list)
+    for constraint in constraints:
+        for slot in constraint[0]:
+            constraints_by_slot[slot].append(constraint)
+
+    components = []
+    seen = set()
+    for constraint in constraints:
+        if constraint in seen:
+            continue
+
+        seen.add(constraint)
+        component = []
+        stack = [constraint]
+        while stack:
+            current = stack.pop()
+            component.append(current)
+            for slot in current[0]:
+                for other in constraints_by_slot[slot]:
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+
+        components.append(frozenset(component))
+
+    return components
+
+
+@functools.lru_cache(maxsize=1024)
+def count_component(component):
+    # Enumerates every mine layout of the component satisfying all its
+    # constraints. Returns the number of layouts per number of mines and,
+    # per number of mines, the number of those layouts with a mine under
+    # each slot. Cached, components untouched by a move are not counted
+    # again.
+    slots, constraints_by_slot, needs, sizes = _prepare(component)
+    counts = collections.Counter()
+    slot_counts = collections.defaultdict(collections.Counter)
+    assignment = []
+
+    def search(index, nb_mines):
+        if index == len(slots):
+            counts[nb_mines] += 1
+            for slot, has_mine in zip(slots, assignment):
+                if has_mine:
+                    slot_counts[nb_mines][slot] += 1
+            return
+
+        for has_mine in (0, 1):
+            if not _assign(slots[index], has_mine, constraints_by_slot,
+                           needs, sizes):
+                _unassign(slots[index], has_mine, constraints_by_slot,
+                          needs, sizes)
+                continue
+
+            assignment.append(has_mine)
+            search(index + 1, nb_mines + has_mine)
+            assignment.pop()
+            _unassign(slots[index], has_mine, constraints_by_slot, needs,
+                      sizes)
+
+    search(0, 0)
+    return dict(counts), {k: dict(v) for k, v in slot_counts.items()}
+
+
+def sample_component(
+        component, nb_samples=NB_SAMPLES, seed=0,
+):
+    # Approximates `count_component()` for components too large to
+    # enumerate. Each sample walks the slots once, picking at random among
+    # the values the constraints still allow, and its layout counts for the
+    # inverse of the chance the walk had to draw it: divided by
+    # `nb_samples`, the counts estimate the enumerated ones without bias.
+    # Dead ends count for nothing.
+    rng = random.Random(seed)
+    slots, constraints_by_slot, needs, sizes = _prepare(component)
+    counts = collections.Counter()
+    slot_counts = collections.defaultdict(collections.Counter)
+    for _ in range(nb_samples):
+        assignment, weight = _get_random_layout(
+            slots, constraints_by_slot, needs, sizes, rng,
+        )
+        if assignment is None:
+            continue
+
+        nb_mines = sum(assignment)
+        counts[nb_mines] += weight
+        for slot, has_mine in zip(slots, assignment):
+            if has_mine:
+                slot_counts[nb_mines][slot] += weight
+
+    return dict(counts), {k: dict(v) for k, v in slot_counts.items()}
+
+
+def _get_random_layout(slots, constraints_by_slot, needs, sizes, rng):
+    # A layout drawn slot by slot and its weight, the number of layouts the
+    # walk could have drawn with its chance, or (None, 0) when a slot can
+    # take no value. Weights are integers, they outgrow floats on
+    # components of a thousand slots.
+    assignment = []
+    weight = 1
+    for slot in slots:
+        choices = []
+        for has_mine in (0, 1):
+            if _assign(slot, has_mine, constraints_by_slot, needs, sizes):
+                choices.append(has_mine)
+            _unassign(slot, has_mine, constraints_by_slot, needs, sizes)
+
+        if not choices:
+            break
+
+        has_mine = rng.choice(choices)
+        _assign(slot, has_mine, constraints_by_slot, needs, sizes)
+        assignment.append(has_mine)
+        weight *= len(choices)
+
+    layout = list(assignment) if len(assignment) == len(slots) else None
+
+    # Leave the search state as it was for the next sample
+    for slot, has_mine in zip(slots, assignment):
+        _unassign(slot, has_mine, constraints_by_slot, needs, sizes)
+
+    return layout, weight if layout is not None else 0
+
+
+def _prepare(component):
+    # Slots in an order where neighbouring slots follow each other, so that
+    # constraints fail early, and the mutable search state
+    constraints = list(component)
+    constraints_by_slot = collections.defaultdict(list)
+    for index, (unknown, _) in enumerate(constraints):
+        for slot in unknown:
+            constraints_by_slot[slot].append(index)
+
+    slots = []
+    seen = set()
+    for unknown, _ in sorted(constraints, key=lambda c: min(c[0])):
+        for slot in sorted(unknown):
+            if slot not in seen:
+                seen.add(slot)
+                slots.append(slot)
+
+    needs = [nb_mines for _, nb_mines in constraints]
+    sizes = [len(unknown) for unknown, _ in constraints]
+    return slots, constraints_by_slot, needs, sizes
+
+
+def _assign(slot, has_mine, constraints_by_slot, needs, sizes):
+    # Returns False when a constraint of the slot can no longer be met, the
+    # assignment has to be undone with `_unassign()` either way
+    is_valid = True
+    for index in constraints_by_slot[slot]:
+        needs[index] -= has_mine
+        sizes[index] -= 1
+        if not 0 <= needs[index] <= sizes[index]:
+            is_valid = False
+
+    return is_valid
+
+
+def _unassign(slot, has_mine, constraints_by_slot, needs, sizes):
+    for index in constraints_by_slot[slot]:
+        needs[index] += has_mine
+        sizes[index] += 1
+
+
+def _convolve(dist, other):
+    result = collections.Counter()
+    for k, count in dist.items():
+        for other_k, other_count in other.items():
+            result[k + other_k] += count * other_count
+
+    return result
+
+
+def compute_probabilities(
+        constraints, nb_mines, nb_interior, known_mines=(), known_safe=(),
+        max_exact_slots=MAX_EXACT_SLOTS, nb_samples=NB_SAMPLES, seed=0,
+):
+    # `constraints` are the (unknown slots, mines) of the solver frontier,
+    # `nb_mines` the mines left once `known_mines` are taken out and
+    # `nb_interior` the number of covered slots that are neither on the
+    # frontier nor known.
+    #
+    # Each component gives the number of its layouts per number of mines.
+    # A layout of the whole board picks one layout per component and puts
+    # the remaining mines anywhere in the interior, so a component layout
+    # with k mines weighs the number of ways the other components and the
+    # interior can hold the other mines.
+    is_exact = True
+    component_slots = []
+    component_counts = []
+    for component in get_components(list(constraints)):
+        slots = set().union(*(unknown for unknown, _ in component))
+        component_slots.append(slots)
+        if len(slots) <= max_exact_slots:
+            component_counts.append(count_component(component))
+        else:
+            is_exact = False
+            component_counts.append(
+                sample_component(component, nb_samples=nb_samples, seed=seed)
+            )
+
+    def get_weight(nb_frontier_mines):
+        nb_interior_mines = nb_mines - nb_frontier_mines
+        if not 0 <= nb_interior_mines <= nb_interior:
+            return 0
+        return math.comb(nb_interior, nb_interior_mines)
+
+    # Distribution of the mines of all the other components, for each one
+    prefixes = [collections.Counter({0: 1})]
+    for counts, _ in component_counts:
+        prefixes.append(_convolve(prefixes[-1], counts))
+    suffixes = [collections.Counter({0: 1})]
+    for counts, _ in reversed(component_counts):
+        suffixes.append(_convolve(suffixes[-1], counts))
+    suffixes.reverse()
+
+    # Slots never holding a mine do not show up in the slot counts
+    probabilities = {
+        slot: 0.0 for slot in set().union(set(), *component_slots)
+    }
+    probabilities.update({slot: 1.0 for slot in known_mines})
+    probabilities.update({slot: 0.0 for slot in known_safe})
+
+    total = sum(
+        count * get_weight(k) for k, count in prefixes[-1].items()
+    )
+    if total == 0:
+        # Sampling missed every layout compatible with the mine count, fall
+        # back to the probabilities within each component
+        for counts, slot_counts in component_counts:
+            nb_layouts = max(1, sum(counts.values()))
+            for counts_by_slot in slot_counts.values():
+                for slot, count in counts_by_slot.items():
+                    probabilities[slot] += count / nb_layouts
+
+        return ProbabilityMap(probabilities, is_exact=False)
+
+    for index, (counts, slot_counts) in enumerate(component_counts):
+        others = _convolve(prefixes[index], suffixes[index + 1])
+        weights = collections.Counter()
+        for k in counts:
+            weight = sum(
+                count * get_weight(k + other_k)
+                for other_k, count in others.items()
+            )
+            for slot, count in slot_counts.get(k, {}).items():
+                weights[slot] += count * weight
+
+        for slot, weight in weights.items():
+            probabilities[slot] = weight / total
+
+    interior = None
+    if nb_interior:
+        expected_mines = sum(
+            count * get_weight(k) * (nb_mines - k)
+            for k, count in prefixes[-1].items()
+        )
+        interior = expected_mines / total / nb_interior
+
+    return ProbabilityMap(probabilities, interior=interior, is_exact=is_exact)
+
+
+def get_solver_arguments(solver, nb_mines):
+    # Arguments of `compute_probabilities()` for the board `solver` plays
+    # on. Nothing in them refers to the board, so they can be handed over
+    # to another thread while the game goes on.
+    board = solver.board
+    frontier = solver.frontier
+    known_mines = solver.mine_slots
+    known_safe = solver.safe_slots
+    nb_interior = (
+        board.width * board.height
+        - solver.nb_uncovered
+        - len(frontier)
+        - len(known_mines)
+        - len(known_safe)
+    )
+    return {
+        'constraints': list(solver.constraints.values()),
+        'nb_mines': nb_mines - len(known_mines),
+        'nb_interior': nb_interior,
+        'known_mines': known_mines,
+        'known_safe': known_safe,
+    }
+
+
+def compute_solver_probabilities(solver, nb_mines, **kwargs):
+    # Probabilities for the covered slots of the board `solver` plays on
+    return compute_probabilities(
+        **get_solver_arguments(solver, nb_mines),
+        **kwargs
+    )
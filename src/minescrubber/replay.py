@@ -0,0 +1,430 @@
+import collections
+import enum
+import functools
+import queue
+import threading
+import time
+
+
+# A replay file is `MAGIC`, `VERSION` and a stream of records. A record
+# starts with a varint holding the milliseconds since the previous record
+# of the game shifted left by `RECORD_TYPE_BITS`, or'ed with its type, and
+# goes on with varints depending on the type:
+#
+# - NEW_GAME: width, height, nb_mines, seed + 1 (0 when unseeded) and the
+#   start time in seconds since the epoch
+# - SELECT, FLAG: slot index (y * width + x)
+# - MINES: the mines of the board, written once they are placed
+# - SNAPSHOT: the number of moves played so far, the covered and the
+#   flagged cells after them
+#
+# Cell sets are bit masks of the slot indices, prefixed by their length in
+# bytes. A click takes two to four bytes. Files are only ever appended to,
+# several sessions can share one file.
+MAGIC = b'MSRP'
+VERSION = 1
+RECORD_TYPE_BITS = 3
+
+
+@enum.unique
+class RECORD(enum.Enum):
+    NEW_GAME = 0
+    SELECT = 1
+    FLAG = 2
+    MINES = 3
+    SNAPSHOT = 4
+
+
+# Fields of each record, True for masks
+RECORD_FIELDS = {
+    RECORD.NEW_GAME: (False,) * 5,
+    RECORD.SELECT: (False,),
+    RECORD.FLAG: (False,),
+    RECORD.MINES: (True,),
+    RECORD.SNAPSHOT: (False, True, True),
+}
+
+
+Move = collections.namedtuple('Move', ['time', 'record', 'slot'])
+Snapshot = collections.namedtuple(
+    'Snapshot',
+    ['move_index', 'covered', 'flagged'],
+)
+
+
+class ReplayError(Exception):
+    pass
+
+
+def encode_varint(value, buffer):
+    # Little endian base 128, 7 bits per byte
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def decode_varint(data, offset):
+    # Returns the value and the offset past it
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError('Truncated varint')
+
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def pack_mask(slots, width, height):
+    mask = bytearray((width * height + 7) // 8)
+    for x, y in slots:
+        index = y * width + x
+        mask[index >> 3] |= 1 << (index & 7)
+
+    return bytes(mask)
+
+
+def unpack_mask(mask, width, height):
+    return {
+        (index % width, index // width)
+        for index in range(width * height)
+        if mask[index >> 3] >> (index & 7) & 1
+    }
+
+
+def get_board_masks(board, state=None):
+    # Covered and flagged masks of a board. The bit planes of `state`, a
+    # `boardstate.BoardState` in sync with the board, or of the board's own
+    # state have the layout of the masks and are copied as they are.
+    state = _get_state(board, state)
+    if state is not None:
+        return bytes(state.covered), bytes(state.flagged)
+
+    covered = []
+    flagged = []
+    for cell in board.cells:
+        if not cell.is_uncovered:
+            covered.append(cell.slot)
+        if cell.is_flagged:
+            flagged.append(cell.slot)
+
+    return (
+        pack_mask(covered, board.width, board.height),
+        pack_mask(flagged, board.width, board.height),
+    )
+
+
+def get_mines_mask(board):
+    state = _get_state(board)
+    if state is not None:
+        return bytes(state.mines)
+
+    return pack_mask(
+        [cell.slot for cell in board.cells if cell.has_mine],
+        board.width,
+        board.height,
+    )
+
+
+def _get_state(board, state=None):
+    if state is not None:
+        return state
+
+    return getattr(board, 'state', None)
+
+
+class ReplayGame:
+    def __init__(self, width, height, nb_mines, seed=None, start_time=None):
+        self.width = width
+        self.height = height
+        self.nb_mines = nb_mines
+        self.seed = seed
+        self.start_time = start_time
+        self.moves = []
+        self.mines = None
+        self.snapshots = []
+
+    @property
+    def duration(self):
+        # Milliseconds from the start of the game to its last move
+        if not self.moves:
+            return 0
+
+        return self.moves[-1].time
+
+
+class ReplayEncoder:
+    # Turns records into bytes, keeping the per game state (board width and
+    # time of the previous record) that the encoding depends on
+    def __init__(self):
+        self._width = None
+        self._last_time = None
+
+    def encode(self, record, timestamp, data, buffer):
+        # `timestamp` in seconds (`time.monotonic()`), `data` the
+        # (width, height, nb_mines, seed) of a new game or the slot of a move
+        if record == RECORD.NEW_GAME:
+            self._last_time = timestamp
+            width, height, nb_mines, seed = data
+            self._width = width
+            encode_varint(record.value, buffer)
+            encode_varint(width, buffer)
+            encode_varint(height, buffer)
+            encode_varint(nb_mines, buffer)
+            encode_varint(0 if seed is None else seed + 1, buffer)
+            encode_varint(int(time.time()), buffer)
+            return
+
+        if self._width is None:
+            # Moves made before the first recorded game cannot be decoded
+            return
+
+        delta = max(0, int((timestamp - self._last_time) * 1000))
+        self._last_time = timestamp
+        encode_varint((delta << RECORD_TYPE_BITS) | record.value, buffer)
+        if record == RECORD.MINES:
+            self._encode_mask(data, buffer)
+        elif record == RECORD.SNAPSHOT:
+            move_index, covered, flagged = data
+            encode_varint(move_index, buffer)
+            self._encode_mask(covered, buffer)
+            self._encode_mask(flagged, buffer)
+        else:
+            x, y = data
+            encode_varint(y * self._width + x, buffer)
+
+    def _encode_mask(self, mask, buffer):
+        encode_varint(len(mask), buffer)
+        buffer += mask
+
+
+class ReplayWriter:
+    # Appends records to a replay file from a background thread. Recording
+    # a move only takes a timestamp and a queue put, the encoding and the
+    # buffered writes happen on the writer thread, which flushes every
+    # `FLUSH_SIZE` bytes or after `FLUSH_INTERVAL` seconds without records.
+    FLUSH_SIZE = 64 * 1024
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, file_path):
+        self._file_path = file_path
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='ReplayWriter',
+            daemon=True,
+        )
+        self._thread.start()
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    def new_game(self, width, height, nb_mines, seed=None):
+        self._put(RECORD.NEW_GAME, (width, height, nb_mines, seed))
+
+    def select(self, slot):
+        self._put(RECORD.SELECT, slot)
+
+    def flag(self, slot):
+        self._put(RECORD.FLAG, slot)
+
+    def mines(self, board):
+        # The mines of a board never move once placed, their mask is made
+        # on the writer thread
+        self._put(RECORD.MINES, functools.partial(get_mines_mask, board))
+
+    def snapshot(self, board, move_index, state=None):
+        # State of `board` after the first `move_index` moves of the game,
+        # made here as the board keeps changing after the call
+        self._put(
+            RECORD.SNAPSHOT,
+            (move_index, *get_board_masks(board, state=state)),
+        )
+
+    def close(self):
+        # Writes whatever is still queued and waits for the writer thread
+        if not self._thread.is_alive():
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+
+    def _put(self, record, data):
+        self._queue.put((record, time.monotonic(), data))
+
+    def _run(self):
+        encoder = ReplayEncoder()
+        buffer = bytearray()
+        with open(self._file_path, 'ab') as f:
+            if f.tell() == 0:
+                buffer += MAGIC
+                buffer.append(VERSION)
+
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.FLUSH_INTERVAL)
+                except queue.Empty:
+                    self._flush(f, buffer)
+                    continue
+
+                if item is None:
+                    self._flush(f, buffer)
+                    return
+
+                record, timestamp, data = item
+                if callable(data):
+                    data = data()
+                encoder.encode(record, timestamp, data, buffer=buffer)
+                if len(buffer) >= self.FLUSH_SIZE:
+                    self._flush(f, buffer)
+
+    def _flush(self, f, buffer):
+        if not buffer:
+            return
+
+        f.write(buffer)
+        f.flush()
+        buffer.clear()
+
+
+class ReplayRecorder:
+    # Feeds a `ReplayWriter` with the games played. Besides the moves it
+    # writes the mines once the first select has placed them and a snapshot
+    # of the board every `SNAPSHOT_INTERVAL` moves and at the end of the
+    # game, which is what lets a player seek without replaying everything.
+    SNAPSHOT_INTERVAL = 32
+
+    def __init__(self, writer):
+        self._writer = writer
+        self._nb_moves = 0
+        self._snapshot_index = 0
+        self._has_mines = False
+
+    @property
+    def writer(self):
+        return self._writer
+
+    def new_game(self, width, height, nb_mines, seed=None):
+        self._nb_moves = 0
+        self._snapshot_index = 0
+        self._has_mines = False
+        self._writer.new_game(width, height, nb_mines, seed=seed)
+
+    def select(self, slot):
+        self._nb_moves += 1
+        self._writer.select(slot)
+
+    def flag(self, slot):
+        self._nb_moves += 1
+        self._writer.flag(slot)
+
+    def update(self, board, is_done=False, state=None):
+        # To be called once the moves recorded so far are on `board`, and
+        # on `state` (a `boardstate.BoardState`) when one mirrors it
+        state = _get_state(board, state)
+        if state is not None:
+            has_uncovered = state.nb_covered < state.nb_cells
+        else:
+            has_uncovered = any(cell.is_uncovered for cell in board.cells)
+
+        if not self._has_mines and has_uncovered:
+            self._has_mines = True
+            self._writer.mines(board)
+
+        nb_new_moves = self._nb_moves - self._snapshot_index
+        if nb_new_moves >= self.SNAPSHOT_INTERVAL or (
+                is_done and nb_new_moves
+        ):
+            self._snapshot_index = self._nb_moves
+            self._writer.snapshot(board, self._nb_moves, state=state)
+
+    def close(self):
+        self._writer.close()
+
+
+def read_games(file_path):
+    # Yields the recorded games as `ReplayGame`s. A record cut short at the
+    # end of the file (e.g. the game crashed while writing) ends the last
+    # game.
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    if len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC:
+        raise ReplayError(f'{file_path} is not a replay file!')
+
+    version = data[len(MAGIC)]
+    if version != VERSION:
+        raise ReplayError(f'Unsupported replay version {version}!')
+
+    offset = len(MAGIC) + 1
+    game = None
+    elapsed = 0
+    while offset < len(data):
+        try:
+            record, delta, fields, offset = _read_record(data, offset)
+        except ReplayError:
+            break
+
+        if record == RECORD.NEW_GAME:
+            if game is not None:
+                yield game
+
+            width, height, nb_mines, seed, start_time = fields
+            game = ReplayGame(
+                width=width,
+                height=height,
+                nb_mines=nb_mines,
+                seed=None if seed == 0 else seed - 1,
+                start_time=start_time,
+            )
+            elapsed = 0
+            continue
+
+        if game is None:
+            continue
+
+        elapsed += delta
+        if record == RECORD.MINES:
+            game.mines, = fields
+        elif record == RECORD.SNAPSHOT:
+            game.snapshots.append(Snapshot(*fields))
+        else:
+            index, = fields
+            game.moves.append(
+                Move(
+                    elapsed,
+                    record,
+                    (index % game.width, index // game.width),
+                )
+            )
+
+    if game is not None:
+        yield game
+
+
+def _read_record(data, offset):
+    # Returns the record type, its time delta, its fields and the offset
+    # past it
+    value, offset = decode_varint(data, offset)
+    try:
+        record = RECORD(value & ((1 << RECORD_TYPE_BITS) - 1))
+    except ValueError:
+        raise ReplayError('Unknown record type')
+
+    fields = []
+    for is_mask in RECORD_FIELDS[record]:
+        field, offset = decode_varint(data, offset)
+        if is_mask:
+            if offset + field > len(data):
+                raise ReplayError('Truncated mask')
+            field, offset = data[offset:offset + field], offset + field
+
+        fields.append(field)
+
+    return record, value >> RECORD_TYPE_BITS, fields, offset
@@ -0,0 +1,38 @@
+import random
+
+
+def seed_board(seed):
+    # The core places the mines with the global `random` module, seeding it
+    # right before a new game fixes the mine layout (and whatever else the
+    # core draws while the game is played with the same moves)
+    if seed is not None:
+        random.seed(seed)
+
+
+class SessionSeeds:
+    # Seeds of the successive games of a session. Every game gets its own
+    # seed, drawn from a RNG seeded with the session seed, so a session
+    # replays identically from its seed and a single game from its own.
+    MAX_SEED = 2 ** 32
+
+    def __init__(self, seed=None):
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._game_seed = None
+
+    @property
+    def seed(self):
+        return self._seed
+
+    @property
+    def game_seed(self):
+        # Seed of the current game, None before the first one
+        return self._game_seed
+
+    def next_game(self, seed=None):
+        # Seed of the next game, `seed` overrides the session sequence
+        if seed is None:
+            seed = self._rng.randrange(self.MAX_SEED)
+
+        self._game_seed = seed
+        return seed
@@ -0,0 +1,248 @@
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+
+from . import headless, solver, probability, seeding
+
+
+GAMES_PER_CHUNK = 100
+
+
+class RandomStrategy:
+    # Selects covered slots at random. The slots are shuffled once and
+    # taken in turn, skipping the ones uncovered in the meantime.
+    def __init__(self, board, rng):
+        self._rng = rng
+        self._covered = {
+            cell.slot for cell in board.cells if not cell.is_uncovered
+        }
+        self._pending = sorted(self._covered)
+        self._rng.shuffle(self._pending)
+        self.nb_guesses = 0
+
+    def next_move(self):
+        slot = self._take_pending()
+        if slot is not None:
+            self.nb_guesses += 1
+
+        return slot
+
+    def update(self, board, slots):
+        for slot in slots:
+            if board.get_cell(slot).is_uncovered:
+                self._covered.discard(slot)
+
+    def _take_pending(self, excluded=()):
+        # Next covered slot not in `excluded`, skipped slots are dropped
+        # for good
+        while self._pending:
+            slot = self._pending.pop()
+            if slot in self._covered and slot not in excluded:
+                return slot
+
+
+class SolverStrategy(RandomStrategy):
+    # Plays the moves the solver can deduce, guesses among the slots not
+    # known to hold a mine when it is stuck
+    def __init__(self, board, rng):
+        super().__init__(board, rng)
+        self._solver = solver.Solver(board)
+
+    def next_move(self):
+        slot = self._solver.next_move()
+        if slot is not None:
+            return slot
+
+        return self._guess()
+
+    def update(self, board, slots):
+        super().update(board, slots)
+        self._solver.update(board, slots=slots)
+
+    def _guess(self):
+        # Known mines stay mines, dropping them from the pending slots
+        # loses nothing
+        slot = self._take_pending(excluded=self._solver.mine_slots)
+        if slot is not None:
+            self.nb_guesses += 1
+
+        return slot
+
+
+class ProbabilityStrategy(SolverStrategy):
+    # Guesses the slot least likely to hold a mine
+    def __init__(self, board, rng):
+        super().__init__(board, rng)
+        self._nb_mines = board.nb_mines
+
+    def _guess(self):
+        candidates = sorted(self._covered - self._solver.mine_slots)
+        if not candidates:
+            return
+
+        self.nb_guesses += 1
+        probabilities = probability.compute_solver_probabilities(
+            self._solver,
+            self._nb_mines,
+            seed=self._rng.randrange(2 ** 32),
+        )
+        return min(
+            candidates,
+            key=lambda slot: probabilities.get(slot, 1.0),
+        )
+
+
+STRATEGIES = {
+    'random': RandomStrategy,
+    'solver': SolverStrategy,
+    'probability': ProbabilityStrategy,
+}
+
+
+def play_game(
+        ui, width, height, nb_mines, strategy_class, seed=None,
+):
+    # Plays one game to the end, returns whether it was won, the number of
+    # moves and the number of them that were guesses. `seed` fixes the
+    # board and the moves of the strategy.
+    board = ui.new_game(width, height, nb_mines, seed=seed)
+    strategy = strategy_class(board, random.Random(seed))
+    nb_moves = 0
+    while not (ui.is_game_over or ui.is_game_solved):
+        slot = strategy.next_move()
+        if slot is None:
+            break
+
+        board = ui.select(slot)
+        strategy.update(board, [slot] + list(board.last_swept))
+        nb_moves += 1
+
+    return ui.is_game_solved, nb_moves, strategy.nb_guesses
+
+
+def play_games(args):
+    # Runs in a worker process, `args` are pickled by the pool. Every game
+    # gets its own seed from the chunk seed, so a chunk always plays the
+    # same games and any of them can be played again from its seed.
+    width, height, nb_mines, strategy_name, nb_games, seed = args
+    seeds = seeding.SessionSeeds(seed)
+    strategy_class = STRATEGIES[strategy_name]
+    ui = headless.create_ui()
+
+    result = {'games': 0, 'wins': 0, 'moves': 0, 'guesses': 0}
+    start = time.perf_counter()
+    for _ in range(nb_games):
+        is_won, nb_moves, nb_guesses = play_game(
+            ui, width, height, nb_mines, strategy_class,
+            seed=seeds.next_game(),
+        )
+        result['games'] += 1
+        result['wins'] += int(is_won)
+        result['moves'] += nb_moves
+        result['guesses'] += nb_guesses
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def get_chunks(nb_games, chunk_size, seed):
+    # One seed per chunk, derived from `seed`, whatever worker plays it
+    seeds = random.Random(seed)
+    while nb_games > 0:
+        size = min(chunk_size, nb_games)
+        yield size, seeds.randrange(2 ** 32)
+        nb_games -= size
+
+
+def simulate(
+        width, height, nb_mines, nb_games, strategy='solver',
+        nb_workers=None, chunk_size=GAMES_PER_CHUNK, seed=0,
+):
+    # Yields the running totals every time a chunk of games is done
+    if strategy not in STRATEGIES:
+        error_msg = (
+            f'Unknown strategy {strategy}, '
+            f'should be one of {tuple(STRATEGIES)}!'
+        )
+        raise ValueError(error_msg)
+
+    tasks = [
+        (width, height, nb_mines, strategy, size, chunk_seed)
+        for size, chunk_seed in get_chunks(nb_games, chunk_size, seed)
+    ]
+
+    totals = {
+        'games': 0, 'wins': 0, 'moves': 0, 'guesses': 0, 'cpu_seconds': 0,
+    }
+    start = time.perf_counter()
+    with multiprocessing.Pool(nb_workers) as pool:
+        for result in pool.imap_unordered(play_games, tasks):
+            for key in ('games', 'wins', 'moves', 'guesses'):
+                totals[key] += result[key]
+            totals['cpu_seconds'] += result['seconds']
+
+            seconds = time.perf_counter() - start
+            yield dict(
+                totals,
+                seconds=seconds,
+                win_rate=totals['wins'] / totals['games'],
+                moves_per_game=totals['moves'] / totals['games'],
+                guesses_per_game=totals['guesses'] / totals['games'],
+                games_per_second=totals['games'] / max(seconds, 1e-9),
+                ms_per_game=totals['cpu_seconds'] * 1000 / totals['games'],
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Play minescrubber games headlessly with a strategy',
+    )
+    parser.add_argument('--width', type=int, default=9)
+    parser.add_argument('--height', type=int, default=9)
+    parser.add_argument('--mines', type=int, default=10)
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument(
+        '--strategy', choices=tuple(STRATEGIES), default='solver',
+    )
+    parser.add_argument(
+        '--workers', type=int,
+        help='worker processes, defaults to the number of cores',
+    )
+    parser.add_argument('--chunk-size', type=int, default=GAMES_PER_CHUNK)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the final totals to this file')
+    args = parser.parse_args(argv)
+
+    totals = None
+    for totals in simulate(
+            width=args.width,
+            height=args.height,
+            nb_mines=args.mines,
+            nb_games=args.games,
+            strategy=args.strategy,
+            nb_workers=args.workers,
+            chunk_size=args.chunk_size,
+            seed=args.seed,
+    ):
+        print(
+            f"{totals['games']}/{args.games} games, "
+            f"win rate {totals['win_rate'] * 100:.2f}%, "
+            f"{totals['moves_per_game']:.1f} moves/game, "
+            f"{totals['guesses_per_game']:.2f} guesses/game, "
+            f"{totals['ms_per_game']:.2f} ms/game, "
+            f"{totals['games_per_second']:.0f} games/s"
+        )
+
+    if args.json and totals is not None:
+        with open(args.json, 'w') as f:
+            json.dump(totals, f, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
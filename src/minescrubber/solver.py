@@ -0,0 +1,247 @@
+import collections
+
+
+from . import boardstate
+
+
+def get_neighbours(slot, width, height):
+    x, y = slot
+    return [
+        (nx, ny)
+        for ny in range(max(0, y - 1), min(height, y + 2))
+        for nx in range(max(0, x - 1), min(width, x + 2))
+        if (nx, ny) != (x, y)
+    ]
+
+
+class Solver:
+    # Deduces the safe and mined slots of a board from the hints of its
+    # uncovered cells, without ever looking at where the mines are.
+    #
+    # Every uncovered cell with covered neighbours gives a constraint: its
+    # unknown neighbours hold exactly `hint` minus the known mines around
+    # it. Together these form the frontier. Two rules are propagated over
+    # it until nothing more can be deduced:
+    #
+    # - single point: a constraint needing no mine makes all of its unknown
+    #   slots safe, one needing as many mines as it has unknown slots makes
+    #   them all mines
+    # - subset: when the unknown slots of a constraint are a subset of the
+    #   ones of a neighbouring constraint, the difference holds the
+    #   difference of their mines
+    #
+    # After a move only the constraints around the slots that changed are
+    # looked at again, the board is scanned once when the solver is created.
+    # The uncovered cells taken into account so far are kept in a
+    # `boardstate.BoardState` rather than a set of slots.
+    def __init__(self, board):
+        self._board = board
+        self._width = board.width
+        self._height = board.height
+        self._state = boardstate.BoardState(board.width, board.height)
+        self._mines = set()
+        self._safe = set()
+        self._constraints = {}
+        self._dirty = collections.deque()
+        self._is_dirty = set()
+        self.nb_steps = 0
+        self.update(
+            board,
+            slots=[cell.slot for cell in board.cells if cell.is_uncovered],
+        )
+
+    @property
+    def board(self):
+        return self._board
+
+    @property
+    def mine_slots(self):
+        # Slots known to hold a mine
+        return set(self._mines)
+
+    @property
+    def safe_slots(self):
+        # Covered slots known to be safe
+        return set(self._safe)
+
+    @property
+    def nb_uncovered(self):
+        return self._state.nb_cells - self._state.nb_covered
+
+    @property
+    def frontier(self):
+        # Covered slots next to an uncovered hint, whose state is not known
+        return set().union(
+            *(unknown for unknown, _ in self._constraints.values())
+        )
+
+    @property
+    def constraints(self):
+        # Slot of the hint cell: (unknown neighbour slots, mines among them)
+        return dict(self._constraints)
+
+    def neighbours(self, slot):
+        return get_neighbours(slot, self._width, self._height)
+
+    def update(self, board, slots=None):
+        # Takes the slots uncovered since the last update into account,
+        # `board.last_swept` by default, and propagates the new hints.
+        # Slots that are still covered are ignored.
+        self._board = board
+        if slots is None:
+            slots = board.last_swept
+
+        for slot in slots:
+            if not self._state.is_covered(slot):
+                continue
+
+            if not board.get_cell(slot).is_uncovered:
+                continue
+
+            self._state.sync(board, slots=[slot])
+            self._safe.discard(slot)
+            for neighbour in self.neighbours(slot):
+                self._remove_unknown(neighbour, slot, is_mine=False)
+
+            if self._state.has_mine(slot):
+                continue
+
+            self._add_constraint(slot, self._state.get_hint(slot))
+
+        self.propagate()
+
+    def next_move(self):
+        # A covered slot known to be safe or None when nothing can be
+        # deduced any more
+        self.propagate()
+        for slot in self._safe:
+            return slot
+
+    def propagate(self):
+        while self._dirty:
+            slot = self._dirty.popleft()
+            self._is_dirty.discard(slot)
+            constraint = self._constraints.get(slot)
+            if constraint is None:
+                continue
+
+            self.nb_steps += 1
+            self._apply_single_point(slot, *constraint)
+            if slot in self._constraints:
+                self._apply_subsets(slot)
+
+    def _add_constraint(self, slot, hint):
+        unknown = set()
+        nb_mines = hint
+        for neighbour in self.neighbours(slot):
+            if neighbour in self._mines:
+                nb_mines -= 1
+            elif (
+                    self._state.is_covered(neighbour)
+                    and neighbour not in self._safe
+            ):
+                unknown.add(neighbour)
+
+        if not unknown:
+            return
+
+        self._constraints[slot] = (frozenset(unknown), nb_mines)
+        self._mark_dirty(slot)
+
+    def _remove_unknown(self, slot, unknown_slot, is_mine):
+        # `unknown_slot` of the constraint at `slot` became known
+        constraint = self._constraints.get(slot)
+        if constraint is None:
+            return
+
+        unknown, nb_mines = constraint
+        if unknown_slot not in unknown:
+            return
+
+        unknown = unknown - {unknown_slot}
+        if is_mine:
+            nb_mines -= 1
+
+        if unknown:
+            self._constraints[slot] = (unknown, nb_mines)
+            self._mark_dirty(slot)
+        else:
+            del self._constraints[slot]
+
+        # Constraints sharing slots with this one may now be subsets of it
+        for neighbour_slot in self._get_overlapping(unknown):
+            self._mark_dirty(neighbour_slot)
+
+    def _mark_dirty(self, slot):
+        if slot in self._is_dirty:
+            return
+
+        self._is_dirty.add(slot)
+        self._dirty.append(slot)
+
+    def _set_mine(self, slot):
+        if slot in self._mines:
+            return
+
+        self._mines.add(slot)
+        for neighbour in self.neighbours(slot):
+            self._remove_unknown(neighbour, slot, is_mine=True)
+
+    def _set_safe(self, slot):
+        if slot in self._safe or not self._state.is_covered(slot):
+            return
+
+        self._safe.add(slot)
+        for neighbour in self.neighbours(slot):
+            self._remove_unknown(neighbour, slot, is_mine=False)
+
+    def _apply_single_point(self, slot, unknown, nb_mines):
+        if nb_mines == 0:
+            for unknown_slot in unknown:
+                self._set_safe(unknown_slot)
+        elif nb_mines == len(unknown):
+            for unknown_slot in unknown:
+                self._set_mine(unknown_slot)
+
+    def _apply_subsets(self, slot):
+        unknown, nb_mines = self._constraints[slot]
+        for other_slot in self._get_overlapping(unknown):
+            if other_slot == slot:
+                continue
+
+            # Either constraint may have been resolved by a previous rule
+            constraint = self._constraints.get(slot)
+            other = self._constraints.get(other_slot)
+            if constraint is None:
+                return
+            if other is None:
+                continue
+
+            unknown, nb_mines = constraint
+            other_unknown, other_nb_mines = other
+            if unknown < other_unknown:
+                self._apply_difference(
+                    other_unknown - unknown, other_nb_mines - nb_mines,
+                )
+            elif other_unknown < unknown:
+                self._apply_difference(
+                    unknown - other_unknown, nb_mines - other_nb_mines,
+                )
+
+    def _apply_difference(self, slots, nb_mines):
+        if nb_mines == 0:
+            for slot in slots:
+                self._set_safe(slot)
+        elif nb_mines == len(slots):
+            for slot in slots:
+                self._set_mine(slot)
+
+    def _get_overlapping(self, unknown):
+        # Constraints sharing an unknown slot are all within two slots
+        overlapping = set()
+        for unknown_slot in unknown:
+            for neighbour in self.neighbours(unknown_slot):
+                if neighbour in self._constraints:
+                    overlapping.add(neighbour)
+
+        return overlapping
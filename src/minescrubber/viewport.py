@@ -0,0 +1,351 @@
+import collections
+
+
+from . import imager
+
+
+def needs_viewport(board):
+    # Boards that would need cells smaller than `MIN_CELL_IMAGE_SIZE` to fit
+    # in a `BoardImage` get scrolled through a `ViewportImage` instead
+    fitting_cell_image_size = int(
+        imager.BoardImage.MAX_IMAGE_SIZE / max(board.width, board.height)
+    )
+    return fitting_cell_image_size < ViewportImage.MIN_CELL_IMAGE_SIZE
+
+
+class SubBoard:
+    # Read only window over the cells of `board` from slot (x, y), addressed
+    # with its own local slots so that a tile can be drawn by a `BoardImage`
+    def __init__(self, board, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.data = _OffsetData(board.data, x, y)
+
+
+class _OffsetData:
+    def __init__(self, data, x, y):
+        self._data = data
+        self._x = x
+        self._y = y
+
+    def __getitem__(self, slot):
+        x, y = slot
+        return self._data[(x + self._x, y + self._y)]
+
+
+class _OffsetState:
+    # Same window as `SubBoard` over the `boardstate.BoardState` of the
+    # viewport, looked up every time as a new board may come with its own
+    def __init__(self, viewport, x, y):
+        self._viewport = viewport
+        self._x = x
+        self._y = y
+
+    def has_mine(self, slot):
+        return self._viewport.state.has_mine(self._offset(slot))
+
+    def is_covered(self, slot):
+        return self._viewport.state.is_covered(self._offset(slot))
+
+    def is_flagged(self, slot):
+        return self._viewport.state.is_flagged(self._offset(slot))
+
+    def get_hint(self, slot):
+        return self._viewport.state.get_hint(self._offset(slot))
+
+    def _offset(self, slot):
+        x, y = slot
+        return x + self._x, y + self._y
+
+
+class TileImage(imager.BoardImage):
+    # A block of `ViewportImage.TILE_CELLS` cells, drawn at the viewport cell
+    # size and with the solved state of the whole board
+    def __init__(self, board, viewport, backend='pil'):
+        self._viewport = viewport
+        super().__init__(board, backend=backend)
+
+    def _get_cell_image_size(self, board):
+        return self._viewport.cell_image_size
+
+    def _compute_is_solved(self):
+        return self._viewport.is_solved
+
+    def _create_state(self, board):
+        return _OffsetState(self._viewport, board.x, board.y)
+
+    def _sync_state(self, board, slots):
+        # The viewport keeps the state of the whole board in sync
+        return slots
+
+    def _get_board_slot(self, slot):
+        x, y = slot
+        return x + self._board.x, y + self._board.y
+
+    @property
+    def heatmap(self):
+        return self._viewport.heatmap
+
+
+class ViewportImage(imager.BoardImage):
+    # Shows the part of the board under a scrollable, zoomable viewport. The
+    # board is split in tiles of `TILE_CELLS` x `TILE_CELLS` cells that are
+    # drawn on demand and kept in a LRU cache, the viewport image is
+    # composed from the visible tiles. Memory stays bounded by the viewport
+    # and the cache whatever the size of the board.
+    MIN_CELL_IMAGE_SIZE = 16
+    TILE_CELLS = 8
+    MAX_TILES = 64
+
+    def __init__(self, board, backend='pil', cell_image_size=None):
+        self._zoom = cell_image_size
+        self._scroll = (0, 0)
+        self._tiles = collections.OrderedDict()
+        self._stale_rects = []
+        super().__init__(board, backend=backend)
+
+    @property
+    def scroll(self):
+        return self._scroll
+
+    @property
+    def board_width(self):
+        # Width in pixels of the whole board at the current zoom
+        return (
+            (self.cell_image_size + self._edge_width) * self._board.width
+            + self._edge_width
+        )
+
+    @property
+    def board_height(self):
+        return (
+            (self.cell_image_size + self._edge_width) * self._board.height
+            + self._edge_width
+        )
+
+    def init_image(self, board):
+        self._board = board
+        self._state = self._create_state(board)
+        self.cell_image_size = self._get_cell_image_size(board)
+        self._edge_width = int(self.cell_image_size / self.EDGE_WIDTH_CONTROL)
+        self._tiles.clear()
+        self._stale_rects = []
+        self._board_image = self._create_board_image(
+            size=(
+                min(self.MAX_IMAGE_SIZE, self.board_width),
+                min(self.MAX_IMAGE_SIZE, self.board_height),
+            )
+        )
+        self.scroll_to(*self._scroll, force=True)
+
+    def _get_cell_image_size(self, board):
+        if self._zoom is not None:
+            return self._zoom
+
+        return max(
+            self.MIN_CELL_IMAGE_SIZE,
+            super()._get_cell_image_size(board),
+        )
+
+    def update_image(self, board, slots=None):
+        if (
+                board.width != self._board.width
+                or board.height != self._board.height
+        ):
+            return self.init_image(board=board)
+
+        self._board = board
+        changed_slots = self._sync_state(board, slots)
+        was_solved = self._is_solved
+        self._is_solved = self._compute_is_solved()
+
+        # Only the cached tiles need updating, the others get drawn from
+        # scratch if they ever become visible. When the changed slots are
+        # known only their tiles are looked at.
+        tile_slots = None
+        if changed_slots is not None and self._is_solved == was_solved:
+            tile_slots = collections.defaultdict(list)
+            for x, y in changed_slots:
+                tile_x, x = divmod(x, self.TILE_CELLS)
+                tile_y, y = divmod(y, self.TILE_CELLS)
+                tile_slots[(tile_x, tile_y)].append((x, y))
+
+        dirty_rect = None
+        for (tile_x, tile_y), tile in list(self._tiles.items()):
+            if tile_slots is None:
+                tile.update_image(self._get_sub_board(tile_x, tile_y))
+            elif (tile_x, tile_y) in tile_slots:
+                tile.update_image(
+                    self._get_sub_board(tile_x, tile_y),
+                    slots=tile_slots[(tile_x, tile_y)],
+                )
+            else:
+                continue
+
+            if tile.dirty_rect is None:
+                continue
+
+            origin_x, origin_y = self._get_tile_origin(tile_x, tile_y)
+            left, top, right, bottom = tile.dirty_rect
+            rect = self.clip_rect((
+                origin_x + left,
+                origin_y + top,
+                origin_x + right,
+                origin_y + bottom,
+            ))
+            if rect is not None:
+                self._compose(rect)
+                dirty_rect = imager.union_rect(dirty_rect, rect)
+
+        for rect in self._stale_rects:
+            self._compose(rect)
+            dirty_rect = imager.union_rect(dirty_rect, rect)
+
+        self._stale_rects = []
+        self._dirty_rect = dirty_rect
+
+    def invalidate(self, slots):
+        # The tiles still hold the right pixels, the viewport only needs
+        # them composed again over whatever was painted on it
+        for slot in slots:
+            rect = self.clip_rect(self.get_cell_rect(slot))
+            if rect is not None:
+                self._stale_rects.append(rect)
+
+    def draw(self):
+        self._is_solved = self._compute_is_solved()
+        self._tiles.clear()
+        self._compose()
+        self._dirty_rect = (0, 0, self.width, self.height)
+
+    def scroll_to(self, x, y, force=False):
+        x = int(max(0, min(x, self.board_width - self.width)))
+        y = int(max(0, min(y, self.board_height - self.height)))
+        if (x, y) == self._scroll and not force:
+            self._dirty_rect = None
+            return
+
+        self._scroll = (x, y)
+        if force:
+            return self.draw()
+
+        self._compose()
+        self._dirty_rect = (0, 0, self.width, self.height)
+
+    def scroll_by(self, dx, dy):
+        scroll_x, scroll_y = self._scroll
+        self.scroll_to(scroll_x + dx, scroll_y + dy)
+
+    def set_zoom(self, cell_image_size):
+        # Change the cell size keeping the cell under the viewport centre
+        cell_image_size = max(
+            self.MIN_CELL_IMAGE_SIZE,
+            min(self.MAX_CELL_IMAGE_SIZE, int(cell_image_size)),
+        )
+        if cell_image_size == self.cell_image_size:
+            self._dirty_rect = None
+            return
+
+        scroll_x, scroll_y = self._scroll
+        center_x = (scroll_x + self.width / 2) / self.board_width
+        center_y = (scroll_y + self.height / 2) / self.board_height
+
+        self._zoom = cell_image_size
+        self.init_image(self._board)
+        self.scroll_to(
+            center_x * self.board_width - self.width / 2,
+            center_y * self.board_height - self.height / 2,
+        )
+        self._dirty_rect = (0, 0, self.width, self.height)
+
+    def pixel_to_slot(self, x, y):
+        scroll_x, scroll_y = self._scroll
+        slot = super().pixel_to_slot(x + scroll_x, y + scroll_y)
+        if slot is None:
+            return
+
+        slot_x, slot_y = slot
+        if not (
+                0 <= slot_x < self._board.width
+                and 0 <= slot_y < self._board.height
+        ):
+            return
+
+        return slot
+
+    def slot_to_pixel(self, slot):
+        x, y = super().slot_to_pixel(slot)
+        scroll_x, scroll_y = self._scroll
+        return x - scroll_x, y - scroll_y
+
+    def _compose(self, rect=None):
+        # Paste the parts of the tiles overlapping `rect` (viewport pixels)
+        left, top, right, bottom = rect or (0, 0, self.width, self.height)
+        scroll_x, scroll_y = self._scroll
+        tile_size = self.TILE_CELLS * (self.cell_image_size + self._edge_width)
+        nb_tiles_x, nb_tiles_y = self._get_nb_tiles()
+
+        first_tile_x = (left + scroll_x) // tile_size
+        last_tile_x = min(nb_tiles_x - 1, (right - 1 + scroll_x) // tile_size)
+        first_tile_y = (top + scroll_y) // tile_size
+        last_tile_y = min(nb_tiles_y - 1, (bottom - 1 + scroll_y) // tile_size)
+        for tile_y in range(first_tile_y, last_tile_y + 1):
+            for tile_x in range(first_tile_x, last_tile_x + 1):
+                tile = self._get_tile(tile_x, tile_y)
+                origin_x, origin_y = self._get_tile_origin(tile_x, tile_y)
+                crop_box = (
+                    max(left, origin_x) - origin_x,
+                    max(top, origin_y) - origin_y,
+                    min(right, origin_x + tile.width) - origin_x,
+                    min(bottom, origin_y + tile.height) - origin_y,
+                )
+                if crop_box[0] >= crop_box[2] or crop_box[1] >= crop_box[3]:
+                    continue
+
+                self._board_image.paste(
+                    tile.image.crop(crop_box),
+                    (origin_x + crop_box[0], origin_y + crop_box[1]),
+                )
+
+    def _get_nb_tiles(self):
+        return (
+            -(-self._board.width // self.TILE_CELLS),
+            -(-self._board.height // self.TILE_CELLS),
+        )
+
+    def _get_tile_origin(self, tile_x, tile_y):
+        # Top left corner of a tile in viewport pixels
+        tile_size = self.TILE_CELLS * (self.cell_image_size + self._edge_width)
+        scroll_x, scroll_y = self._scroll
+        return tile_x * tile_size - scroll_x, tile_y * tile_size - scroll_y
+
+    def _get_sub_board(self, tile_x, tile_y):
+        x = tile_x * self.TILE_CELLS
+        y = tile_y * self.TILE_CELLS
+        return SubBoard(
+            self._board,
+            x,
+            y,
+            min(self.TILE_CELLS, self._board.width - x),
+            min(self.TILE_CELLS, self._board.height - y),
+        )
+
+    def _get_tile(self, tile_x, tile_y):
+        key = (tile_x, tile_y)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        tile = TileImage(
+            self._get_sub_board(tile_x, tile_y),
+            viewport=self,
+            backend=self._backend,
+        )
+        self._tiles[key] = tile
+        while len(self._tiles) > self.MAX_TILES:
+            self._tiles.popitem(last=False)
+
+        return tile
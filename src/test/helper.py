@@ -0,0 +1,59 @@
+# Shared by the test scripts, which import it before the package so that
+# they run from a checkout as well
+import os
+import random
+import sys
+
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+)
+
+
+from minescrubber import player, replay  # noqa: E402
+
+
+def create_game(width, height, nb_mines, seed):
+    # A `replay.ReplayGame` with `nb_mines` mines at random and no moves
+    rng = random.Random(seed)
+    slots = [(x, y) for y in range(height) for x in range(width)]
+    game = replay.ReplayGame(width, height, nb_mines, seed=seed)
+    game.mines = replay.pack_mask(
+        rng.sample(slots, nb_mines), width, height,
+    )
+    return game
+
+
+def create_board(width, height, nb_mines, seed):
+    # A board played the way the core plays it, without the core
+    return player.ReplayBoard(create_game(width, height, nb_mines, seed))
+
+
+def get_opening_slot(board):
+    for cell in board.cells:
+        if cell.hint == 0 and not cell.has_mine:
+            return cell.slot
+
+
+def get_cell_states(board):
+    return [(cell.is_uncovered, cell.is_flagged) for cell in board.cells]
+
+
+def play_moves(board, nb_moves, seed, flag_ratio=0.3):
+    # Plays `nb_moves` moves on covered cells, never selecting a mine.
+    # Yields the move (record, slot) and the slots it changed.
+    rng = random.Random(seed)
+    for _ in range(nb_moves):
+        covered = sorted(
+            cell.slot for cell in board.cells if not cell.is_uncovered
+        )
+        if not covered:
+            return
+
+        slot = rng.choice(covered)
+        if board.get_cell(slot).has_mine or rng.random() < flag_ratio:
+            board.flag(slot)
+            yield (replay.RECORD.FLAG, slot), [slot]
+        else:
+            board.select(slot)
+            yield (replay.RECORD.SELECT, slot), [slot] + list(board.last_swept)
@@ -0,0 +1,86 @@
+import unittest
+
+
+import helper  # noqa: F401
+from minescrubber import boardgen, solver
+
+
+@unittest.skipIf(boardgen.numpy is None, 'numpy is not installed')
+class TestBoardGen(unittest.TestCase):
+    def _get_hint(self, mines, x, y):
+        height, width = mines.shape
+        return sum(
+            int(mines[ny, nx])
+            for nx, ny in solver.get_neighbours((x, y), width, height)
+        )
+
+    def test_hints(self):
+        rng = boardgen.numpy.random.default_rng(0)
+        for width, height in ((1, 1), (1, 7), (9, 9), (30, 16)):
+            mines = boardgen.place_mines(
+                width, height, width * height // 4, rng=rng,
+            )
+            hints = boardgen.compute_hints(mines)
+            for y in range(height):
+                for x in range(width):
+                    self.assertEqual(
+                        hints[y, x], self._get_hint(mines, x, y), (x, y),
+                    )
+
+    def test_safe_region(self):
+        rng = boardgen.numpy.random.default_rng(1)
+        for safe_slot in ((0, 0), (4, 4), (8, 3), (8, 8)):
+            for _ in range(20):
+                mines = boardgen.place_mines(
+                    9, 9, 72, safe_slot=safe_slot, rng=rng,
+                )
+                self.assertEqual(int(mines.sum()), 72)
+                x, y = safe_slot
+                self.assertFalse(mines[y, x])
+                for nx, ny in solver.get_neighbours(safe_slot, 9, 9):
+                    self.assertFalse(mines[ny, nx], (nx, ny))
+
+    def test_too_many_mines(self):
+        with self.assertRaises(ValueError):
+            boardgen.place_mines(9, 9, 73, safe_slot=(4, 4))
+
+    def test_first_select_opens(self):
+        board = boardgen.GeneratedBoard(30, 30, 150, seed=2)
+        self.assertTrue(board.select((15, 15)))
+        self.assertTrue(board.has_mines)
+        self.assertEqual(board.get_cell((15, 15)).hint, 0)
+        self.assertGreater(len(board.last_swept), 1)
+        for slot in board.last_swept:
+            cell = board.get_cell(slot)
+            self.assertTrue(cell.is_uncovered)
+            self.assertFalse(cell.has_mine)
+        self.assertEqual(
+            sum(cell.has_mine for cell in board.cells), board.nb_mines,
+        )
+
+    def test_seed(self):
+        def get_mines(seed):
+            board = boardgen.GeneratedBoard(20, 20, 60, seed=seed)
+            board.select((3, 3))
+            return bytes(board.state.mines)
+
+        self.assertEqual(get_mines(5), get_mines(5))
+        self.assertNotEqual(get_mines(5), get_mines(6))
+
+    def test_sweep_rings(self):
+        board = boardgen.GeneratedBoard(40, 40, 100, seed=3)
+        rings = list(board.sweep((20, 20)))
+        self.assertEqual(sum(rings, []), board.last_swept)
+        self.assertEqual(board.last_swept.layers, rings)
+        for previous, ring in zip(rings, rings[1:]):
+            empty = {
+                slot for slot in previous if board.get_cell(slot).hint == 0
+            }
+            for slot in ring:
+                self.assertTrue(
+                    empty.intersection(solver.get_neighbours(slot, 40, 40))
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
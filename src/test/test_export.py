@@ -0,0 +1,67 @@
+import random
+import unittest
+
+
+import helper
+from minescrubber import export, replay
+
+
+WIDTH = 9
+HEIGHT = 9
+NB_MINES = 10
+
+
+def create_timed_game(seed, nb_moves):
+    # A game whose moves are spaced from a fraction of an animation to more
+    # than the idle time clamp
+    game = helper.create_game(WIDTH, HEIGHT, NB_MINES, seed)
+    board = helper.create_board(WIDTH, HEIGHT, NB_MINES, seed)
+    rng = random.Random(seed)
+    time = 0
+    moves = []
+    for (record, slot), _ in helper.play_moves(board, nb_moves, seed):
+        time += rng.choice([150, 300, 700, 2000])
+        moves.append(replay.Move(time, record, slot))
+
+    game.moves = moves
+    return game
+
+
+class TestExport(unittest.TestCase):
+    def test_quiet_time(self):
+        self.assertLess(export.QUIET_TIME, export.MAX_IDLE_TIME)
+
+    def test_warmup_frame_close(self):
+        # Every range starts rendering a few moves before its first frame,
+        # not from the start of the game
+        game = create_timed_game(0, 60)
+        nb_frames = export.get_nb_frames(game)
+        interval = 1000 / export.DEFAULT_FPS
+        max_frames = (export.MAX_IDLE_TIME + export.QUIET_TIME) / interval
+        for first_frame in range(0, nb_frames, 7):
+            warmup_frame = export.get_warmup_frame(game, first_frame)
+            self.assertLessEqual(warmup_frame, first_frame)
+            self.assertLessEqual(first_frame - warmup_frame, 3 * max_frames)
+
+    def test_segments_match(self):
+        game = create_timed_game(1, 40)
+        nb_frames = export.get_nb_frames(game)
+        frames = [
+            image.tobytes()
+            for image in export.render_frames(game, 0, nb_frames)
+        ]
+        for frames_per_segment in (5, 13):
+            segmented = []
+            for first_frame in range(0, nb_frames, frames_per_segment):
+                last_frame = min(nb_frames, first_frame + frames_per_segment)
+                segmented.extend(
+                    image.tobytes()
+                    for image in export.render_frames(
+                        game, first_frame, last_frame,
+                    )
+                )
+            self.assertEqual(segmented, frames, frames_per_segment)
+
+
+if __name__ == '__main__':
+    unittest.main()
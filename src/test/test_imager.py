@@ -0,0 +1,88 @@
+import unittest
+
+
+import helper
+from minescrubber import imager
+
+
+def solve(board):
+    # Returns the slots changed
+    slots = []
+    for cell in board.cells:
+        if cell.is_flagged:
+            board.flag(cell.slot)
+            slots.append(cell.slot)
+        if not cell.has_mine:
+            board.select(cell.slot)
+            slots.extend(board.last_swept)
+
+    return slots
+
+
+def get_bytes(board, backend):
+    return imager.BoardImage(board, backend=backend).image.tobytes()
+
+
+class TestBoardImage(unittest.TestCase):
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            imager.BoardImage(
+                helper.create_board(9, 9, 10, 0), backend='cairo',
+            )
+
+    @unittest.skipIf(imager.numpy is None, 'numpy is not installed')
+    def test_backends_are_identical(self):
+        for size, seed in ((9, 0), (16, 1), (30, 2)):
+            board = helper.create_board(size, size, size * size // 6, seed)
+            self._check_backends(board)
+            for _ in helper.play_moves(board, 20, seed):
+                pass
+            self._check_backends(board)
+            solve(board)
+            self._check_backends(board)
+
+    def _check_backends(self, board):
+        self.assertEqual(get_bytes(board, 'pil'), get_bytes(board, 'numpy'))
+
+    def test_update_equals_full_render(self):
+        backends = ['pil'] if imager.numpy is None else ['pil', 'numpy']
+        for backend in backends:
+            board = helper.create_board(16, 16, 40, 3)
+            board_image = imager.BoardImage(board, backend=backend)
+            for _, slots in helper.play_moves(board, 40, 3):
+                board_image.update_image(board, slots=slots)
+                self.assertEqual(
+                    board_image.image.tobytes(), get_bytes(board, backend),
+                )
+
+            # Solving redraws every cell
+            board_image.update_image(board, slots=solve(board))
+            self.assertTrue(board_image.is_solved)
+            self.assertEqual(
+                board_image.image.tobytes(), get_bytes(board, backend),
+            )
+
+    def test_update_without_slots(self):
+        board = helper.create_board(9, 9, 10, 4)
+        board_image = imager.BoardImage(board)
+        for _ in helper.play_moves(board, 10, 4):
+            pass
+        board_image.update_image(board)
+        self.assertEqual(board_image.image.tobytes(), get_bytes(board, 'pil'))
+
+    def test_invalidate(self):
+        board = helper.create_board(9, 9, 10, 5)
+        board_image = imager.BoardImage(board)
+        board_image.invalidate([(0, 0), (1, 1)])
+        board_image.update_image(board)
+        self.assertEqual(
+            board_image.dirty_rect,
+            imager.union_rect(
+                board_image.get_cell_rect((0, 0)),
+                board_image.get_cell_rect((1, 1)),
+            ),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
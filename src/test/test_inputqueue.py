@@ -0,0 +1,53 @@
+import unittest
+
+
+import helper  # noqa: F401
+from minescrubber.inputqueue import ACTION, InputQueue
+
+
+SLOT = (1, 2)
+OTHER_SLOT = (3, 4)
+
+
+class TestInputQueue(unittest.TestCase):
+    def _push(self, *actions, slot=SLOT):
+        queue = InputQueue()
+        for action in actions:
+            queue.push(action, slot)
+
+        return queue.take()
+
+    def test_select_twice(self):
+        self.assertEqual(
+            self._push(ACTION.SELECT, ACTION.SELECT),
+            [(ACTION.SELECT, SLOT)],
+        )
+
+    def test_flag_twice(self):
+        self.assertEqual(self._push(ACTION.FLAG, ACTION.FLAG), [])
+
+    def test_flag_after_select(self):
+        self.assertEqual(
+            self._push(ACTION.SELECT, ACTION.FLAG),
+            [(ACTION.SELECT, SLOT), (ACTION.FLAG, SLOT)],
+        )
+
+    def test_flag_select_flag_flag(self):
+        # The last two flags cancel out, the flag before the select has to
+        # stay or the select would open a flagged cell
+        self.assertEqual(
+            self._push(ACTION.FLAG, ACTION.SELECT, ACTION.FLAG, ACTION.FLAG),
+            [(ACTION.FLAG, SLOT), (ACTION.SELECT, SLOT)],
+        )
+
+    def test_other_slots_kept(self):
+        queue = InputQueue()
+        queue.push(ACTION.FLAG, SLOT)
+        queue.push(ACTION.FLAG, OTHER_SLOT)
+        queue.push(ACTION.FLAG, SLOT)
+        self.assertEqual(queue.take(), [(ACTION.FLAG, OTHER_SLOT)])
+        self.assertFalse(queue)
+
+
+if __name__ == '__main__':
+    unittest.main()
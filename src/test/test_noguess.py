@@ -0,0 +1,56 @@
+import unittest
+
+
+import helper  # noqa: F401
+from minescrubber import boardgen, headless, noguess
+
+
+@unittest.skipIf(boardgen.numpy is None, 'numpy is not installed')
+class TestNoGuess(unittest.TestCase):
+    def test_is_no_guess(self):
+        # A board with a single mine is solved from any opening
+        ui = headless.create_ui(generated=True)
+        for seed in range(5):
+            self.assertTrue(noguess.is_no_guess(ui, 9, 9, 1, seed))
+
+    def test_find_seeds(self):
+        def find_seeds():
+            return list(
+                noguess.find_seeds(
+                    9, 9, 10, nb_boards=3, generated=True, nb_workers=2,
+                    max_candidates=400, seed=0,
+                )
+            )
+
+        seeds = find_seeds()
+        self.assertEqual(len(seeds), 3)
+        self.assertEqual(seeds, find_seeds())
+        ui = headless.create_ui(generated=True)
+        for seed in seeds:
+            self.assertTrue(noguess.is_no_guess(ui, 9, 9, 10, seed))
+
+    def test_find_seeds_gives_up(self):
+        with self.assertRaises(RuntimeError):
+            list(
+                noguess.find_seeds(
+                    9, 9, 64, generated=True, nb_workers=2,
+                    max_candidates=40, seed=0,
+                )
+            )
+
+
+class TestBoardPool(unittest.TestCase):
+    def test_worker_error(self):
+        # Any worker failure comes out of `take()` as a RuntimeError
+        key = (9, 9, 10)
+        pool = noguess.BoardPool()
+        pool._nb_pending[key] += 1
+        pool._on_error(key, ValueError('worker failed'))
+        with self.assertRaises(RuntimeError):
+            pool.take(*key)
+
+        pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
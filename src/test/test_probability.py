@@ -0,0 +1,130 @@
+import collections
+import itertools
+import random
+import unittest
+
+
+import helper
+from minescrubber import probability, solver
+
+
+def brute_force(board):
+    # Chance of a mine under every covered slot, counted over all the mine
+    # layouts that agree with the hints and the number of mines
+    covered = [cell.slot for cell in board.cells if not cell.is_uncovered]
+    hints = [
+        (cell.hint, solver.get_neighbours(cell.slot, board.width,
+                                          board.height))
+        for cell in board.cells if cell.is_uncovered
+    ]
+    counts = dict.fromkeys(covered, 0)
+    nb_layouts = 0
+    for mines in itertools.combinations(covered, board.nb_mines):
+        mines = set(mines)
+        if all(
+                sum(slot in mines for slot in neighbours) == hint
+                for hint, neighbours in hints
+        ):
+            nb_layouts += 1
+            for slot in mines:
+                counts[slot] += 1
+
+    return {slot: count / nb_layouts for slot, count in counts.items()}
+
+
+class TestProbability(unittest.TestCase):
+    def test_matches_brute_force(self):
+        nb_checked = 0
+        for seed in range(40):
+            board = helper.create_board(5, 5, 5, seed)
+            rng = random.Random(seed)
+            safe_slots = [
+                cell.slot for cell in board.cells if not cell.has_mine
+            ]
+            for slot in rng.sample(safe_slots, 3):
+                board.select(slot)
+
+            covered = [c for c in board.cells if not c.is_uncovered]
+            if len(covered) > 20:
+                continue
+
+            probabilities = probability.compute_solver_probabilities(
+                solver.Solver(board), board.nb_mines,
+                max_exact_slots=len(covered),
+            )
+            self.assertTrue(probabilities.is_exact)
+            for slot, expected in brute_force(board).items():
+                self.assertAlmostEqual(
+                    probabilities.get(slot), expected, places=9,
+                    msg=f'seed {seed}, slot {slot}',
+                )
+            nb_checked += 1
+
+        self.assertGreater(nb_checked, 10)
+
+    def test_sampling_is_close(self):
+        # A component over the exact limit is sampled
+        board = helper.create_board(6, 6, 7, 3)
+        for cell in board.cells:
+            if not cell.has_mine and cell.slot[1] == 0:
+                board.select(cell.slot)
+
+        board_solver = solver.Solver(board)
+        exact = probability.compute_solver_probabilities(
+            board_solver, board.nb_mines,
+        )
+        sampled = probability.compute_solver_probabilities(
+            board_solver, board.nb_mines,
+            max_exact_slots=0, nb_samples=20000,
+        )
+        self.assertFalse(sampled.is_exact)
+        for slot, expected in exact.probabilities.items():
+            self.assertAlmostEqual(sampled.get(slot), expected, delta=0.1)
+
+    def test_sample_component_matches_count(self):
+        # The sampled layouts are weighted so that they match the
+        # enumeration, a first valid layout per search is far off
+        def get_chances(counts, slot_counts):
+            nb_layouts = sum(counts.values())
+            by_nb_mines = {
+                k: count / nb_layouts for k, count in counts.items()
+            }
+            by_slot = collections.Counter()
+            for counts_by_slot in slot_counts.values():
+                for slot, count in counts_by_slot.items():
+                    by_slot[slot] += count / nb_layouts
+            return by_nb_mines, by_slot
+
+        nb_checked = 0
+        for seed in range(10):
+            board = helper.create_board(8, 8, 12, seed)
+            board.select(helper.get_opening_slot(board))
+            arguments = probability.get_solver_arguments(
+                solver.Solver(board), board.nb_mines,
+            )
+            for component in probability.get_components(
+                    arguments['constraints']
+            ):
+                counts = probability.count_component(component)
+                if len(counts[0]) < 2:
+                    continue
+
+                exact = get_chances(*counts)
+                sampled = get_chances(
+                    *probability.sample_component(
+                        component, nb_samples=20000, seed=seed,
+                    )
+                )
+                for expected_chances, chances in zip(exact, sampled):
+                    for key, expected in expected_chances.items():
+                        self.assertAlmostEqual(
+                            chances.get(key, 0), expected, delta=0.03,
+                            msg=f'seed {seed}, {key}',
+                        )
+                nb_checked += 1
+
+        self.assertGreater(nb_checked, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
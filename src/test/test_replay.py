@@ -0,0 +1,152 @@
+import os
+import random
+import tempfile
+import unittest
+
+
+import helper
+from minescrubber import boardstate, player, replay
+
+
+WIDTH = 16
+HEIGHT = 16
+NB_MINES = 40
+
+
+def record_game(recorder, seed, nb_moves):
+    # Plays moves on safe cells and records them, returns the moves and
+    # the board states after each of them
+    board = helper.create_board(WIDTH, HEIGHT, NB_MINES, seed)
+    recorder.new_game(WIDTH, HEIGHT, NB_MINES, seed=seed)
+    moves = []
+    states = [helper.get_cell_states(board)]
+    for move, _ in helper.play_moves(board, nb_moves, seed, flag_ratio=0.2):
+        record, slot = move
+        if record == replay.RECORD.FLAG:
+            recorder.flag(slot)
+        else:
+            recorder.select(slot)
+
+        moves.append(move)
+        states.append(helper.get_cell_states(board))
+        recorder.update(board)
+
+    recorder.update(board, is_done=True)
+    return board, moves, states
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        fd, self.file_path = tempfile.mkstemp(suffix='.msrp')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def _record(self, nb_games=3, nb_moves=80):
+        recorder = replay.ReplayRecorder(replay.ReplayWriter(self.file_path))
+        recorded = [
+            record_game(recorder, seed, nb_moves) for seed in range(nb_games)
+        ]
+        recorder.close()
+        return recorded
+
+    def test_varint(self):
+        for value in (0, 1, 127, 128, 300, 2 ** 32, 2 ** 63):
+            buffer = bytearray()
+            replay.encode_varint(value, buffer)
+            self.assertEqual(
+                replay.decode_varint(bytes(buffer), 0),
+                (value, len(buffer)),
+            )
+
+    def test_mask(self):
+        slots = {(0, 0), (3, 1), (4, 4)}
+        mask = replay.pack_mask(slots, 5, 5)
+        self.assertEqual(replay.unpack_mask(mask, 5, 5), slots)
+
+    def test_round_trip(self):
+        recorded = self._record()
+        games = list(replay.read_games(self.file_path))
+        self.assertEqual(len(games), len(recorded))
+        for seed, (game, (board, moves, _)) in enumerate(
+                zip(games, recorded)
+        ):
+            self.assertEqual(
+                (game.width, game.height, game.nb_mines, game.seed),
+                (WIDTH, HEIGHT, NB_MINES, seed),
+            )
+            self.assertEqual(
+                [(move.record, move.slot) for move in game.moves], moves,
+            )
+            self.assertEqual(
+                replay.unpack_mask(game.mines, WIDTH, HEIGHT),
+                {cell.slot for cell in board.cells if cell.has_mine},
+            )
+            self.assertTrue(game.snapshots)
+
+    def test_seek(self):
+        recorded = self._record(nb_games=1, nb_moves=120)
+        game, = replay.read_games(self.file_path)
+        _, _, states = recorded[0]
+        replay_player = player.ReplayPlayer(game)
+        rng = random.Random(0)
+        indices = list(range(len(states))) * 2
+        rng.shuffle(indices)
+        for move_index in indices:
+            board = replay_player.seek(move_index)
+            self.assertEqual(
+                helper.get_cell_states(board), states[move_index],
+            )
+
+    def test_step(self):
+        recorded = self._record(nb_games=1, nb_moves=60)
+        game, = replay.read_games(self.file_path)
+        _, _, states = recorded[0]
+        replay_player = player.ReplayPlayer(game)
+        for move_index in range(1, len(states)):
+            layers = list(replay_player.step())
+            board = replay_player.board
+            self.assertEqual(
+                helper.get_cell_states(board), states[move_index],
+            )
+            self.assertEqual(sum(layers, []), board.last_swept)
+
+    def test_masks_from_state(self):
+        board = helper.create_board(WIDTH, HEIGHT, NB_MINES, 0)
+        for _ in helper.play_moves(board, 40, 0):
+            pass
+
+        state = boardstate.BoardState.from_board(board)
+        self.assertEqual(
+            replay.get_board_masks(board, state=state),
+            replay.get_board_masks(board),
+        )
+
+    def test_truncated_file(self):
+        self._record(nb_games=2)
+        with open(self.file_path, 'rb') as f:
+            data = f.read()
+        with open(self.file_path, 'wb') as f:
+            f.write(data[:-3])
+
+        games = list(replay.read_games(self.file_path))
+        self.assertEqual(len(games), 2)
+
+    def test_not_a_replay(self):
+        with open(self.file_path, 'wb') as f:
+            f.write(b'not a replay')
+
+        with self.assertRaises(replay.ReplayError):
+            list(replay.read_games(self.file_path))
+
+    def test_magic_only(self):
+        with open(self.file_path, 'wb') as f:
+            f.write(replay.MAGIC)
+
+        with self.assertRaises(replay.ReplayError):
+            list(replay.read_games(self.file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
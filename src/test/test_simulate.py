@@ -0,0 +1,69 @@
+import random
+import unittest
+
+
+import helper
+from minescrubber import boardgen, headless, simulate
+
+
+class TestRandomStrategy(unittest.TestCase):
+    def test_moves(self):
+        # Every covered slot once, in an order fixed by the rng
+        def get_moves(seed):
+            board = helper.create_board(9, 9, 10, 0)
+            strategy = simulate.RandomStrategy(board, random.Random(seed))
+            moves = []
+            while True:
+                slot = strategy.next_move()
+                if slot is None:
+                    return moves
+
+                self.assertFalse(board.get_cell(slot).is_uncovered)
+                board.select(slot)
+                strategy.update(board, [slot] + list(board.last_swept))
+                moves.append(slot)
+
+        moves = get_moves(1)
+        self.assertEqual(len(moves), len(set(moves)))
+        self.assertEqual(moves, get_moves(1))
+        self.assertNotEqual(moves, get_moves(2))
+
+
+class TestChunks(unittest.TestCase):
+    def test_chunks(self):
+        chunks = list(simulate.get_chunks(250, 100, 0))
+        self.assertEqual([size for size, _ in chunks], [100, 100, 50])
+        self.assertEqual(chunks, list(simulate.get_chunks(250, 100, 0)))
+
+
+@unittest.skipIf(boardgen.numpy is None, 'numpy is not installed')
+class TestPlayGame(unittest.TestCase):
+    def _play_games(self, strategy_class, nb_games=20):
+        ui = headless.create_ui(generated=True)
+        return [
+            simulate.play_game(ui, 9, 9, 10, strategy_class, seed=seed)
+            for seed in range(nb_games)
+        ]
+
+    def test_seeded(self):
+        for strategy_class in simulate.STRATEGIES.values():
+            self.assertEqual(
+                self._play_games(strategy_class),
+                self._play_games(strategy_class),
+            )
+
+    def test_solver_guesses_less(self):
+        def get_guesses(strategy_class):
+            return sum(
+                nb_guesses
+                for _, _, nb_guesses in self._play_games(strategy_class)
+            )
+
+        self.assertLess(
+            get_guesses(simulate.SolverStrategy),
+            get_guesses(simulate.RandomStrategy),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
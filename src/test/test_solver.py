@@ -0,0 +1,53 @@
+import unittest
+
+
+import helper
+from minescrubber import player, replay, solver
+
+
+class TestSolver(unittest.TestCase):
+    def _check_deductions(self, board, board_solver):
+        for slot in board_solver.mine_slots:
+            self.assertTrue(board.get_cell(slot).has_mine, slot)
+
+        for slot in board_solver.safe_slots:
+            self.assertFalse(board.get_cell(slot).has_mine, slot)
+
+    def test_deductions_are_right(self):
+        for seed in range(50):
+            board = helper.create_board(16, 16, 40, seed)
+            board.select(helper.get_opening_slot(board))
+            board_solver = solver.Solver(board)
+            self._check_deductions(board, board_solver)
+            while True:
+                slot = board_solver.next_move()
+                if slot is None:
+                    break
+
+                board.select(slot)
+                self.assertFalse(board.get_cell(slot).has_mine, slot)
+                board_solver.update(
+                    board, slots=[slot] + list(board.last_swept),
+                )
+                self._check_deductions(board, board_solver)
+
+    def test_solves_board_without_guess(self):
+        # A single mine in a corner is found from the opening
+        game = replay.ReplayGame(5, 5, 1)
+        game.mines = replay.pack_mask([(0, 0)], 5, 5)
+        board = player.ReplayBoard(game)
+        board.select((4, 4))
+        board_solver = solver.Solver(board)
+        self.assertEqual(board_solver.mine_slots, {(0, 0)})
+        self.assertIsNone(board_solver.next_move())
+
+    def test_neighbours(self):
+        self.assertEqual(
+            sorted(solver.get_neighbours((0, 0), 3, 3)),
+            [(0, 1), (1, 0), (1, 1)],
+        )
+        self.assertEqual(len(solver.get_neighbours((1, 1), 3, 3)), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+
+
+import helper
+from minescrubber import imager, viewport
+
+
+CELL_IMAGE_SIZE = 16
+WIDTH = 60
+HEIGHT = 45
+NB_MINES = 300
+
+
+class FullImage(imager.BoardImage):
+    # The whole board at the viewport cell size, whatever its image size
+    def _get_cell_image_size(self, board):
+        return CELL_IMAGE_SIZE
+
+
+class TestViewport(unittest.TestCase):
+    def setUp(self):
+        self.board = helper.create_board(WIDTH, HEIGHT, NB_MINES, 0)
+        self.board.select(helper.get_opening_slot(self.board))
+        self.image = viewport.ViewportImage(
+            self.board, cell_image_size=CELL_IMAGE_SIZE,
+        )
+
+    def _check_pixels(self):
+        # The tiles composed under the viewport are the pixels of the board
+        # drawn in one image
+        scroll_x, scroll_y = self.image.scroll
+        expected = FullImage(self.board).image.crop((
+            scroll_x,
+            scroll_y,
+            scroll_x + self.image.width,
+            scroll_y + self.image.height,
+        ))
+        self.assertEqual(
+            self.image.image.tobytes(), expected.tobytes(),
+            self.image.scroll,
+        )
+
+    def test_needs_viewport(self):
+        self.assertTrue(viewport.needs_viewport(self.board))
+        self.assertFalse(
+            viewport.needs_viewport(helper.create_board(9, 9, 10, 0))
+        )
+
+    def test_scroll(self):
+        self.assertLess(self.image.width, self.image.board_width)
+        for x, y in ((0, 0), (101, 37), (250, 10 ** 6), (10 ** 6, 10 ** 6)):
+            self.image.scroll_to(x, y)
+            self._check_pixels()
+
+        scroll_x, scroll_y = self.image.scroll
+        self.assertEqual(
+            scroll_x + self.image.width, self.image.board_width,
+        )
+        self.assertEqual(
+            scroll_y + self.image.height, self.image.board_height,
+        )
+
+    def test_moves(self):
+        # Cached tiles follow the moves, visible or not
+        self.image.scroll_to(101, 37)
+        for _, slots in helper.play_moves(self.board, 40, 0):
+            self.image.update_image(self.board, slots=slots)
+
+        self._check_pixels()
+        self.image.scroll_to(0, 0)
+        self._check_pixels()
+
+    def test_tiles_bounded(self):
+        tile_size = viewport.ViewportImage.TILE_CELLS * CELL_IMAGE_SIZE
+        for y in range(0, self.image.board_height, tile_size):
+            for x in range(0, self.image.board_width, tile_size):
+                self.image.scroll_to(x, y)
+
+        self.assertLessEqual(
+            len(self.image._tiles), viewport.ViewportImage.MAX_TILES,
+        )
+
+    def test_slots(self):
+        self.image.scroll_to(101, 37)
+        for slot in ((10, 5), (20, 12), (WIDTH - 1, HEIGHT - 1)):
+            x, y = self.image.slot_to_pixel(slot)
+            center = CELL_IMAGE_SIZE // 2
+            self.assertEqual(
+                self.image.pixel_to_slot(x + center, y + center), slot,
+            )
+
+        self.assertIsNone(self.image.pixel_to_slot(-10 ** 6, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()